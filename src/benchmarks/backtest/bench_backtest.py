@@ -0,0 +1,211 @@
+"""
+Benchmark for the report backtest engine.
+
+Generates synthetic daily histories (geometric Brownian motion) for a set of
+symbols and a table of reports whose hypotheses name a target price (some
+after the entry price) and a quarter or month deadline, then times
+services.backtest phase by phase:
+parsing, scoring against the histories and summarizing. The same scoring is
+repeated with a per-report Python loop on a sample, as a reference for speed
+and for agreement of the outcomes. Parsed targets are checked against the
+generated ones and against TARGET_CASES.
+
+Usage (from the directory containing src/):
+    python -m benchmarks.backtest.bench_backtest [--reports 1000000] [--symbols 500] [--distinct 100000] [--output results.json]
+"""
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from src.services import backtest
+from src.utils import quant
+from src.utils.text_processor import extract_symbol
+
+MONTHS = ("January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December")
+SECTORS = ("Technology", "Healthcare", "Financials", "Energy", "Consumer Cyclical", "Industrials", None)
+RECOMMENDATIONS = ("BUY", "HOLD", "SELL", None)
+# (hypothesis, target quant.parse_target should return)
+TARGET_CASES = (
+    ("Apple (AAPL) will reach $220 by Q2 2025", 220.0),
+    ("Apple (AAPL) at $195 will hit $250 by Dec 2026", 250.0),
+    ("Tesla (TSLA) will fall to $150 from $250 by June 2026", 150.0),
+    ("Apple (AAPL), now $195, to $250 by March 2026", 250.0),
+    ("Apple (AAPL) will climb from $195 to $250 by Q4 2026", 250.0),
+    ("Exxon (XOM) will drop below $90 after trading at $110 by Q1 2026", 90.0),
+    ("Bitcoin (BTC) will exceed $100,000 by 2026", 100000.0),
+    ("Nvidia (NVDA) will reach $1.5k by 2026", 1500.0),
+    ("Apple (AAPL) will outperform the market by 2026", None),
+)
+# (hypothesis, quant.parse_direction: 1 downside, 0 upside, None to infer from the entry price)
+DIRECTION_CASES = (
+    ("Apple (AAPL) will reach $250 by fall 2025", None),
+    ("Apple (AAPL) won't go down; it will exceed $250 by Q4 2026", 0),
+    ("Apple (AAPL) will rise to $250 by March 2026", 0),
+    ("Tesla (TSLA) will fall to $150 by summer 2026", 1),
+    ("Exxon (XOM) will drop below $90 after trading at $110 by Q1 2026", 1),
+    ("Exxon (XOM) won't fall below $90 by Q1 2026", None),
+    ("Apple (AAPL) at $195 will hit $250 by Dec 2026", None),
+    ("Short Apple (AAPL): it will hit $150 by Q3 2026", None),
+)
+
+
+def generate_histories(symbols: list, start: str, end: str, rng) -> dict:
+    days = np.arange(np.datetime64(start), np.datetime64(end))
+    days = days[np.is_busday(days)].astype(np.int64)
+    histories = {}
+    for symbol in symbols:
+        sigma = rng.uniform(0.15, 0.6) / np.sqrt(quant.TRADING_DAYS)
+        close = rng.uniform(20, 500) * np.exp(np.cumsum(rng.normal(0, sigma, len(days))))
+        spread = np.abs(rng.normal(0, sigma, len(days))) * close
+        histories[symbol] = {"date": days, "high": close + spread, "low": close - spread, "close": close}
+    return histories
+
+
+def generate_reports(histories: dict, count: int, distinct: int, rng) -> dict:
+    """Reports sampled from a pool of `distinct` hypotheses, created on random history days."""
+    symbols = list(histories)
+    pool_symbol = rng.integers(len(symbols), size=distinct)
+    pool_created = np.empty(distinct, dtype=np.int64)
+    pool_target = np.empty(distinct)
+    # Stated direction: 1 for "fall to", -1 for "reach" (follows the entry price)
+    pool_down = np.empty(distinct, dtype=np.int8)
+    pool_text = []
+    for index, code in enumerate(pool_symbol):
+        symbol = symbols[code]
+        history = histories[symbol]
+        bar = rng.integers(len(history["date"]) - 30)
+        created = history["date"][bar]
+        pool_created[index] = created
+        price = history["close"][bar]
+        target = round(float(price * rng.uniform(0.6, 1.6)), 2)
+        pool_target[index] = target
+        year = int(np.datetime64(int(created), "D").astype("datetime64[Y]").astype(int)) + 1970 + int(rng.integers(0, 2))
+        verb = "fall to" if target < price and rng.random() < 0.8 else "reach"
+        pool_down[index] = 1 if verb == "fall to" else -1
+        roll = rng.random()
+        if roll < 0.45:
+            timeframe = f"Q{rng.integers(1, 5)} {year}"
+        elif roll < 0.9:
+            timeframe = f"{MONTHS[rng.integers(12)]} {year}"
+        else:
+            # A season deadline; "fall" must not read as a downside call
+            timeframe = f"{('spring', 'summer', 'fall')[rng.integers(3)]} {year}"
+        # Some hypotheses quote the entry price before the target
+        entry = f" at ${price:,.2f}" if rng.random() < 0.3 else ""
+        pool_text.append(f"Company {code} ({symbol}){entry} will {verb} ${target:,} by {timeframe}")
+    pool_text = np.array(pool_text, dtype=object)
+
+    picks = rng.integers(distinct, size=count)
+    return {
+        "hypothesis": pool_text[picks],
+        "target": pool_target[picks],
+        "down": pool_down[picks],
+        # Report dates around the hypothesis' creation day (same history bar or a few days later)
+        "created": pool_created[picks] + rng.integers(0, 3, size=count),
+        "confidence_score": np.round(rng.beta(2, 2, size=count), 2),
+        "recommendation": np.array(RECOMMENDATIONS, dtype=object)[rng.integers(len(RECOMMENDATIONS), size=count)],
+        "sector": np.array(SECTORS, dtype=object)[rng.integers(len(SECTORS), size=count)],
+    }
+
+
+def loop_status(hypothesis: str, created: int, histories: dict, as_of: int) -> int:
+    """The per-report Python loop the engine replaces."""
+    target, deadline = quant.parse_target(hypothesis), quant.parse_deadline(hypothesis)
+    history = histories.get(extract_symbol(hypothesis))
+    if not target or deadline is None or history is None:
+        return backtest.UNRESOLVABLE
+    deadline = int(np.datetime64(deadline, "D").astype(np.int64))
+    if deadline < created:
+        return backtest.UNRESOLVABLE
+    days = history["date"]
+    first = int(np.searchsorted(days, created, side="right"))
+    if first == 0:
+        return backtest.UNRESOLVABLE
+    last_day = min(int(days[-1]), as_of)
+    end = int(np.searchsorted(days, min(deadline, last_day), side="right"))
+    direction = quant.parse_direction(hypothesis)
+    down = direction if direction is not None else int(target < history["close"][first - 1])
+    if end > first:
+        if down and history["low"][first:end].min() <= target:
+            return backtest.HIT
+        if not down and history["high"][first:end].max() >= target:
+            return backtest.HIT
+    return backtest.MISS if deadline <= last_day else backtest.PENDING
+
+
+def direction_accuracy(reports: dict, outcome: dict) -> float:
+    """Share of scored reports whose resolved direction is the stated one, or for "reach" the target vs the entry price."""
+    scored = np.isfinite(outcome["entry"])
+    expected = np.where(reports["down"] >= 0, reports["down"], reports["target"] < outcome["entry"])
+    return round(float((outcome["down"] == expected)[scored].mean()), 6)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reports", type=int, default=1_000_000)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--distinct", type=int, default=100_000, help="distinct hypotheses among the reports")
+    parser.add_argument("--loop-sample", type=int, default=20_000, help="reports scored by the reference loop")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    histories = generate_histories([f"T{index:03d}" for index in range(args.symbols)], "2019-01-01", "2025-01-01", rng)
+    as_of = max(int(history["date"][-1]) for history in histories.values())
+    reports = generate_reports(histories, args.reports, min(args.distinct, args.reports), rng)
+
+    timings = {}
+    started = time.perf_counter()
+    parsed = backtest.parse_hypotheses(reports["hypothesis"])
+    timings["parse_s"] = time.perf_counter() - started
+    started = time.perf_counter()
+    outcome = backtest.evaluate(parsed["symbol"], reports["created"], parsed["target"], parsed["deadline"], parsed["down"], histories, as_of)
+    timings["evaluate_s"] = time.perf_counter() - started
+    started = time.perf_counter()
+    rows = backtest.summarize(outcome["status"], reports["confidence_score"], {"recommendation": reports["recommendation"], "sector": reports["sector"]})
+    timings["summarize_s"] = time.perf_counter() - started
+    timings["total_s"] = sum(timings.values())
+
+    sample = rng.choice(args.reports, size=min(args.loop_sample, args.reports), replace=False)
+    started = time.perf_counter()
+    expected = np.array([loop_status(reports["hypothesis"][i], int(reports["created"][i]), histories, as_of) for i in sample])
+    loop_seconds = time.perf_counter() - started
+
+    overall = rows[0]
+    results = {
+        "reports": args.reports,
+        "symbols": args.symbols,
+        "bars_per_symbol": len(next(iter(histories.values()))["date"]),
+        "engine": {name: round(seconds, 3) for name, seconds in timings.items()},
+        "engine_reports_per_s": round(args.reports / timings["total_s"]),
+        "loop_sample": len(sample),
+        "loop_reports_per_s": round(len(sample) / loop_seconds),
+        "loop_estimated_total_s": round(loop_seconds / len(sample) * args.reports, 1),
+        "agreement": round(float((expected == outcome["status"][sample]).mean()), 6),
+        "target_accuracy": round(float(np.isclose(parsed["target"], reports["target"]).mean()), 6),
+        "target_cases_failed": [text for text, target in TARGET_CASES if quant.parse_target(text) != target],
+        "direction_cases_failed": [text for text, down in DIRECTION_CASES if quant.parse_direction(text) != down],
+        "direction_accuracy": direction_accuracy(reports, outcome),
+        "statuses": {name: int((outcome["status"] == code).sum()) for name, code in
+                     (("unresolvable", backtest.UNRESOLVABLE), ("pending", backtest.PENDING), ("hit", backtest.HIT), ("miss", backtest.MISS))},
+        "overall": {key: overall[key] for key in ("resolved", "hit_rate", "mean_confidence", "brier_score", "brier_skill")},
+        "summary_rows": len(rows),
+    }
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output)
+    passed = (
+        results["agreement"] == 1.0 and results["target_accuracy"] == 1.0 and results["direction_accuracy"] == 1.0
+        and not results["target_cases_failed"] and not results["direction_cases_failed"]
+    )
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Benchmark for utils.text_processor.extract_json_from_response.
+
+Replays a corpus of agent outputs (fenced and unfenced objects and arrays,
+prose around the JSON, trailing commas, stray escapes, truncated responses,
+long prose with unclosed brackets) through the current extractor and the
+previous regex-based one, reporting success rate and per-call latency. Fails
+if the current extractor is less successful or any sample exceeds --max-ms.
+
+Usage (from the directory containing src/):
+    python -m benchmarks.json_extract.bench_json_extract [--repeat 200] [--max-ms 20] [--output results.json]
+"""
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+from src.utils.text_processor import extract_json_from_response
+
+CORPUS = Path(__file__).with_name("corpus.jsonl")
+
+
+def legacy_extract(text):
+    """The regex + replace + json.loads extractor this benchmark replaced."""
+    match = re.search(r'```(json)?\s*([\s\S]*?)\s*```', text)
+    text_to_parse = match.group(2) if match else text
+    text_to_parse = text_to_parse.replace("\\'", "'")
+    try:
+        return json.loads(text_to_parse.strip())
+    except json.JSONDecodeError:
+        start = text_to_parse.find('{')
+        end = text_to_parse.rfind('}') + 1
+        if start != -1 and end != 0:
+            return json.loads(text_to_parse[start:end])
+    raise ValueError("no JSON")
+
+
+def _succeeded(result, expect: str) -> bool:
+    return isinstance(result, dict) if expect == "object" else isinstance(result, list)
+
+
+def _parse(extractor, sample) -> bool:
+    # expect "none": prose without JSON, which the extractor should reject
+    try:
+        result = extractor(sample["output"])
+    except Exception:
+        return sample["expect"] == "none"
+    return sample["expect"] != "none" and _succeeded(result, sample["expect"])
+
+
+def run(extractor, samples, repeat: int) -> dict:
+    successes, timings = 0, []
+    by_agent = {}
+    for sample in samples:
+        ok = _parse(extractor, sample)
+        successes += ok
+        agent = by_agent.setdefault(sample["agent"], {"total": 0, "parsed": 0})
+        agent["total"] += 1
+        agent["parsed"] += ok
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            try:
+                extractor(sample["output"])
+            except Exception:
+                pass
+        timings.append((time.perf_counter() - start) / repeat * 1e6)
+
+    return {
+        "success_rate": round(successes / len(samples), 4),
+        "by_agent": by_agent,
+        "mean_us": round(statistics.mean(timings), 2),
+        "median_us": round(statistics.median(timings), 2),
+        "max_us": round(max(timings), 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=200, help="timed calls per sample")
+    parser.add_argument("--max-ms", type=float, default=20.0, help="latency budget per call of the current extractor")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    samples = [json.loads(line) for line in CORPUS.read_text().splitlines() if line.strip()]
+    results = {
+        "samples": len(samples),
+        "current": run(extract_json_from_response, samples, args.repeat),
+        "legacy": run(legacy_extract, samples, args.repeat),
+    }
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output)
+    ok = results["current"]["success_rate"] >= results["legacy"]["success_rate"]
+    return 0 if ok and results["current"]["max_us"] <= args.max_ms * 1000 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""
+Load benchmark for POST /process with stand-in Gemini and data providers.
+
+Runs the API app in-process (lifespan included) against FakeGenerativeModel
+and a local ReplayServer, drives /process at a fixed concurrency and reports
+p50/p95/p99 latency, requests per second, errors and peak RSS. Results are
+written as JSON named after the current commit, so runs can be diffed between
+commits; --baseline compares against an earlier file and exits 1 when latency
+or throughput regressed by more than --max-regression.
+
+No Gemini or provider quota is used. Each analysis makes six Gemini calls, so
+GEMINI_RATE (10/s by default) caps throughput at about 1.7 requests per
+second; set GEMINI_RATE=0 to measure the pipeline itself. The database
+defaults to a throwaway SQLite file; set DATABASE_URL to use another one.
+
+Usage (from the directory containing src/):
+    python -m benchmarks.load.bench_load [--concurrency 8] [--requests 200 | --duration 30]
+        [--llm-latency 0.2] [--provider-latency 0.05] [--output FILE] [--baseline FILE]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import resource
+import tempfile
+import subprocess
+from pathlib import Path
+from datetime import datetime, timezone
+
+from .fake_model import FakeGenerativeModel
+from .replay_server import RECORDINGS, ReplayServer, load_recordings
+
+RESULTS_DIR = Path(__file__).with_name("results")
+HYPOTHESES = [
+    "Apple (AAPL) will reach $220 by Q2 2026",
+    "Microsoft (MSFT) will rise to $480 by Q3 2026",
+    "NVIDIA (NVDA) will exceed $150 by Q1 2026",
+    "Tesla (TSLA) will decline to $180 by Q2 2026",
+    "Amazon (AMZN) will reach $230 by Q4 2026",
+    "Alphabet (GOOGL) will rise to $200 by Q3 2026",
+    "Meta Platforms (META) will exceed $650 by Q2 2026",
+    "JPMorgan Chase (JPM) will reach $260 by Q4 2026",
+]
+# Compared with --baseline: (result key, metric, True if higher is better)
+TRACKED = [("latency_ms", "p50", False), ("latency_ms", "p95", False), ("latency_ms", "p99", False), ("throughput", "rps", True)]
+
+
+def _percentile(ordered: list, fraction: float):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _commit() -> str:
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return output.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _configure(server: ReplayServer, workdir: str):
+    # Must run before the app is imported: the services read these at import time.
+    os.environ.update(server.endpoints())
+    os.environ.setdefault("ALPHA_VANTAGE_API_KEY", "replay")
+    os.environ.setdefault("FMP_API_KEY", "replay")
+    os.environ.setdefault("GEMINI_API_KEY", "replay")
+    os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{workdir}/bench.db")
+    os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+    os.environ.setdefault("OHLCV_STORE_PATH", f"{workdir}/ohlcv")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # The three providers share one replay host, so give it their combined connection budget.
+    os.environ.setdefault("HTTP_MAX_PER_HOST", "30")
+
+
+async def _drive(app, args) -> dict:
+    import httpx
+
+    latencies, statuses, errors = [], {}, 0
+    issued = 0
+    deadline = None
+
+    def next_index():
+        nonlocal issued
+        if args.duration:
+            if time.perf_counter() >= deadline:
+                return None
+        elif issued >= args.requests:
+            return None
+        issued += 1
+        return issued - 1
+
+    async def request(client, index, record=True):
+        nonlocal errors
+        body = {"hypothesis": HYPOTHESES[index % len(HYPOTHESES)], "bypass_cache": not args.reuse}
+        started = time.perf_counter()
+        try:
+            response = await client.post("/process", json=body)
+            status = response.status_code
+            failed = status >= 400 or "error" in response.json()
+        except Exception as e:
+            status, failed = type(e).__name__, True
+        if record:
+            latencies.append(time.perf_counter() - started)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            errors += failed
+
+    async def worker(client):
+        while (index := next_index()) is not None:
+            await request(client, index)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            await asyncio.gather(*(request(client, i, record=False) for i in range(args.warmup)))
+            started = time.perf_counter()
+            deadline = started + (args.duration or 0)
+            await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": statuses,
+        "elapsed_s": round(elapsed, 3),
+        "throughput": {"rps": round(len(latencies) / elapsed, 2) if elapsed else None},
+        "latency_ms": {
+            "p50": round(_percentile(ordered, 0.50) * 1000, 1) if ordered else None,
+            "p95": round(_percentile(ordered, 0.95) * 1000, 1) if ordered else None,
+            "p99": round(_percentile(ordered, 0.99) * 1000, 1) if ordered else None,
+            "mean": round(sum(ordered) / len(ordered) * 1000, 1) if ordered else None,
+            "max": round(ordered[-1] * 1000, 1) if ordered else None,
+        },
+    }
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list:
+    """Returns one row per tracked metric with the relative change and whether it regressed."""
+    rows = []
+    for group, metric, higher_is_better in TRACKED:
+        new, old = results.get(group, {}).get(metric), baseline.get(group, {}).get(metric)
+        if new is None or not old:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        rows.append({
+            "metric": f"{group}.{metric}",
+            "baseline": old,
+            "current": new,
+            "change_pct": round(change * 100, 1),
+            "regressed": worse > max_regression,
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight at once")
+    parser.add_argument("--requests", type=int, default=200, help="requests to send (ignored with --duration)")
+    parser.add_argument("--duration", type=float, help="send requests for this many seconds instead")
+    parser.add_argument("--warmup", type=int, default=4, help="unrecorded requests sent first")
+    parser.add_argument("--reuse", action="store_true", help="let the app reuse saved reports instead of bypassing caches")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per stand-in Gemini call")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="fraction of Gemini calls failing with 503")
+    parser.add_argument("--provider-latency", type=float, default=0.05, help="seconds per replayed provider response")
+    parser.add_argument("--provider-error-rate", type=float, default=0.0, help="fraction of provider responses that are 503s")
+    parser.add_argument("--recordings", default=str(RECORDINGS), help="recorded provider responses (JSON)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="results path (default: benchmarks/load/results/<commit>.json)")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10, help="allowed relative slowdown before failing")
+    args = parser.parse_args(argv)
+
+    server = ReplayServer(
+        load_recordings(args.recordings),
+        latency=args.provider_latency,
+        error_rate=args.provider_error_rate,
+    ).start()
+    workdir = tempfile.TemporaryDirectory(prefix="marketai-bench-")
+    _configure(server, workdir.name)
+
+    from src.adk.main import app
+    from src.services import llm_gateway
+
+    model = FakeGenerativeModel(latency=args.llm_latency, error_rate=args.llm_error_rate, seed=args.seed)
+    llm_gateway.set_model(model)
+    try:
+        run = asyncio.run(_drive(app, args))
+    finally:
+        server.stop()
+        workdir.cleanup()
+
+    gateway = llm_gateway.stats()
+    commit = _commit()
+    results = {
+        "benchmark": "load",
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            "concurrency": args.concurrency,
+            "requests": args.requests if not args.duration else None,
+            "duration_s": args.duration,
+            "reuse": args.reuse,
+            "llm_latency_s": args.llm_latency,
+            "llm_error_rate": args.llm_error_rate,
+            "provider_latency_s": args.provider_latency,
+            "provider_error_rate": args.provider_error_rate,
+            "gemini_rate": gateway["rate_limit"]["rate"],
+            "gemini_max_concurrency": gateway["concurrency"]["maximum"],
+        },
+        **run,
+        "peak_rss_mb": _peak_rss_mb(),
+        "llm_calls": model.calls,
+        "provider_requests": server.requests,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        results["comparison"] = compare(results, json.loads(Path(args.baseline).read_text()), args.max_regression)
+        exit_code = 1 if any(row["regressed"] for row in results["comparison"]) else 0
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    path = Path(args.output) if args.output else RESULTS_DIR / f"{commit or 'local'}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(output)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Stand-in for google.generativeai.GenerativeModel used by the load benchmark.
+
+Answers each agent with a canned response after a configurable delay, so the
+pipeline can be driven at load without Gemini quota. The agent is recognised
+from the "You are the <Name> Agent" line its instruction starts with.
+"""
+import re
+import json
+import random
+import asyncio
+from types import SimpleNamespace
+from typing import Callable, Dict, Union
+
+_AGENT = re.compile(r"You are the (\w+) Agent")
+_HYPOTHESIS = re.compile(r'Hypothesis: "(.*?)"', re.DOTALL)
+
+
+def _echo_hypothesis(prompt: str) -> str:
+    # Hypotheses sent by the load generator are already structured.
+    match = _HYPOTHESIS.search(prompt)
+    return match.group(1) if match else "Apple (AAPL) will reach $220 by Q2 2026"
+
+
+CANNED_OUTPUTS = {
+    "hypothesis": _echo_hypothesis,
+    "context": json.dumps({
+        "asset_info": {"primary_symbol": "AAPL", "asset_name": "Apple Inc.", "asset_type": "stock", "sector": "Technology"},
+        "hypothesis_details": {"direction": "bullish", "price_target": 220, "timeframe": "Q2 2026", "confidence_level": "medium"},
+        "research_guidance": {"key_metrics": ["revenue growth", "gross margins"], "search_terms": ["Apple earnings"]},
+        "risk_analysis": {"primary_risks": ["China exposure", "regulatory scrutiny"]},
+    }),
+    "research": (
+        "AAPL currently trades at $195.64, requiring 12.4% appreciation to reach $220 target.\n"
+        "P/E ratio: 32.5x (vs sector avg 25.2x)\nMarket cap: $3.04T\nYTD performance: +8.2%\n"
+        "Recent news: 'Services revenue hits record' (Reuters, Jan 30)"
+    ),
+    "contradiction": "```json\n" + json.dumps([
+        {"quote": "App Store fees face regulatory pressure in the EU", "reason": "Services margin risk", "source": "Market Analysis", "strength": "Strong"},
+        {"quote": "iPhone upgrade cycles are lengthening", "reason": "Hardware revenue may stall", "source": "Market Analysis", "strength": "Medium"},
+        {"quote": "Valuation above the five-year average P/E", "reason": "Limits multiple expansion", "source": "Market Analysis", "strength": "Medium"},
+    ], indent=2) + "\n```",
+    "synthesis": json.dumps({
+        "summary": "Services growth supports the target, but valuation and regulation cap the upside.",
+        "confirmations": [
+            {"quote": "Services revenue grew 14% year over year", "reason": "High-margin recurring revenue", "source": "Market Analysis", "strength": "Strong"},
+            {"quote": "Buybacks of $90B per year", "reason": "Supports EPS growth", "source": "Market Analysis", "strength": "Medium"},
+        ],
+        "contradictions": [
+            {"quote": "EU Digital Markets Act compliance costs", "reason": "Pressure on App Store fees", "source": "Market Analysis", "strength": "Medium"},
+        ],
+        "confidence_score": 0.62,
+        "recommendation": "Favorable Outlook",
+    }),
+    "alert": json.dumps([
+        {"type": "entry", "message": "Enter 1-2% position if AAPL holds above $195", "priority": "medium"},
+        {"type": "risk", "message": "Set stop-loss at $185", "priority": "high"},
+        {"type": "monitor", "message": "Watch Q2 earnings for Services growth", "priority": "low"},
+    ]),
+}
+
+
+class FakeServiceError(Exception):
+    """Mimics a google.api_core error carrying an HTTP status as `.code`."""
+
+    def __init__(self, code: int):
+        self.code = code
+        super().__init__(f"{code} stand-in error")
+
+
+class FakeGenerativeModel:
+    """
+    Async stand-in for GenerativeModel.generate_content_async.
+
+    Args:
+        latency: Seconds per call, or a dict of seconds per agent (key "default" for the rest).
+        jitter: Relative spread of the latency, e.g. 0.5 draws from [0.5x, 1.5x].
+        error_rate: Fraction of calls failing with `error_code` (503 by default, which the
+            gateway treats as overload and retries).
+        outputs: Per-agent overrides of CANNED_OUTPUTS; values are text or prompt -> text.
+    """
+
+    model_name = "fake-gemini"
+
+    def __init__(
+        self,
+        latency: Union[float, Dict[str, float]] = 0.2,
+        jitter: float = 0.5,
+        error_rate: float = 0.0,
+        error_code: int = 503,
+        outputs: Dict[str, Union[str, Callable[[str], str]]] = None,
+        seed: int = None,
+    ):
+        self.latency = latency if isinstance(latency, dict) else {"default": latency}
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.outputs = dict(CANNED_OUTPUTS, **(outputs or {}))
+        self.calls = {}
+        self._random = random.Random(seed)
+
+    def _delay(self, agent: str) -> float:
+        base = self.latency.get(agent, self.latency.get("default", 0.0))
+        return max(0.0, base * self._random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    async def generate_content_async(self, prompt: str):
+        match = _AGENT.search(prompt)
+        agent = match.group(1).lower() if match else "unknown"
+        self.calls[agent] = self.calls.get(agent, 0) + 1
+        await asyncio.sleep(self._delay(agent))
+        if self._random.random() < self.error_rate:
+            raise FakeServiceError(self.error_code)
+
+        output = self.outputs.get(agent, "")
+        text = output(prompt) if callable(output) else output
+        usage = SimpleNamespace(prompt_token_count=len(prompt) // 4, candidates_token_count=len(text) // 4)
+        return SimpleNamespace(text=text, usage_metadata=usage)
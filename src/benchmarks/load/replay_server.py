@@ -0,0 +1,227 @@
+"""
+Local HTTP server replaying recorded Alpha Vantage, FMP and Yahoo responses.
+
+Routes mirror the provider endpoints under a per-provider prefix, so the
+services only need their base URLs pointed here (see endpoints()):
+
+    /alphavantage/query?function=GLOBAL_QUOTE|NEWS_SENTIMENT&...
+    /fmp/quote/<SYMBOL[,SYMBOL...]>
+    /fmp/historical-price-full/<SYMBOL>?from=YYYY-MM-DD
+    /yahoo/quote/<SYMBOL>
+    /yahoo/chart/<SYMBOL>?period1=<epoch seconds>
+
+Recordings (recordings.json by default) hold responses per provider and
+endpoint, keyed by symbol or news topic with "*" as the fallback. The string
+"{{symbol}}" is replaced by the requested symbol. News timestamps are shifted
+so the newest recorded article was published when the server started, and
+daily bars by whole weeks so the newest one falls in the past week. Yahoo
+chart responses are built from the FMP history recording.
+
+Usage (from the directory containing src/), to serve on its own:
+    python -m benchmarks.load.replay_server [--port 8765] [--latency 0.05] [--recordings FILE]
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+RECORDINGS = Path(__file__).with_name("recordings.json")
+AV_TIME_FORMAT = "%Y%m%dT%H%M%S"
+
+
+def _fill(value, symbol: str):
+    if isinstance(value, str):
+        return value.replace("{{symbol}}", symbol)
+    if isinstance(value, list):
+        return [_fill(item, symbol) for item in value]
+    if isinstance(value, dict):
+        return {key: _fill(item, symbol) for key, item in value.items()}
+    return value
+
+
+def _shift_news(recordings: dict, now: datetime):
+    # Keeps replayed articles inside the services' "last N days" window.
+    for response in recordings.get("alpha_vantage", {}).get("NEWS_SENTIMENT", {}).values():
+        feed = response.get("feed", [])
+        stamps = [datetime.strptime(article["time_published"], AV_TIME_FORMAT) for article in feed]
+        if not stamps:
+            continue
+        shift = now - max(stamps)
+        for article, stamp in zip(feed, stamps):
+            article["time_published"] = (stamp + shift).strftime(AV_TIME_FORMAT)
+
+
+def _shift_history(recordings: dict, now: datetime):
+    for response in recordings.get("fmp", {}).get("historical-price-full", {}).values():
+        bars = response.get("historical", [])
+        if not bars:
+            continue
+        newest = max(datetime.strptime(bar["date"], "%Y-%m-%d") for bar in bars)
+        # Whole weeks keep every bar on the weekday it was recorded on.
+        shift = timedelta(weeks=(now - newest).days // 7)
+        for bar in bars:
+            bar["date"] = (datetime.strptime(bar["date"], "%Y-%m-%d") + shift).strftime("%Y-%m-%d")
+
+
+def _chart(history: dict, period1: int) -> dict:
+    # Yahoo's chart layout: parallel arrays under indicators.quote[0], oldest first.
+    bars = sorted(
+        (bar for bar in history.get("historical", [])
+         if datetime.strptime(bar["date"], "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp() >= period1),
+        key=lambda bar: bar["date"],
+    )
+    timestamps = [int(datetime.strptime(bar["date"], "%Y-%m-%d").replace(hour=14, minute=30, tzinfo=timezone.utc).timestamp()) for bar in bars]
+    quote = {field: [bar[field] for bar in bars] for field in ("open", "high", "low", "close", "volume")}
+    return {"chart": {"result": [{"meta": {"symbol": history.get("symbol")}, "timestamp": timestamps, "indicators": {"quote": [quote]}}], "error": None}}
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """
+    Serves recorded responses on a background thread.
+
+    Args:
+        recordings: Parsed recordings (see the module docstring).
+        latency: Seconds per response, or a dict of seconds per provider
+            ("alpha_vantage", "fmp", "yahoo"; key "default" for the rest).
+        jitter: Relative spread of the latency.
+        error_rate: Fraction of requests answered with HTTP 503.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, recordings: dict, host: str = "127.0.0.1", port: int = 0, latency=0.05, jitter: float = 0.5, error_rate: float = 0.0):
+        super().__init__((host, port), _Handler)
+        self.recordings = recordings
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        _shift_news(self.recordings, now)
+        _shift_history(self.recordings, now)
+        self.latency = latency if isinstance(latency, dict) else {"default": latency}
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def endpoints(self) -> dict:
+        """Environment overrides pointing the services' provider URLs at this server."""
+        return {
+            "ALPHA_VANTAGE_URL": f"{self.url}/alphavantage/query",
+            "FMP_URL": f"{self.url}/fmp",
+            "YAHOO_QUOTE_URL": f"{self.url}/yahoo/quote",
+            "YAHOO_CHART_URL": f"{self.url}/yahoo/chart",
+        }
+
+    def delay(self, provider: str) -> float:
+        base = self.latency.get(provider, self.latency.get("default", 0.0))
+        return max(0.0, base * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def count(self, provider: str, status: int):
+        with self._lock:
+            counts = self.requests.setdefault(provider, {})
+            counts[status] = counts.get(status, 0) + 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="replay-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        segments = [segment for segment in parts.path.split("/") if segment]
+        params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        provider = {"alphavantage": "alpha_vantage", "fmp": "fmp", "yahoo": "yahoo"}.get(segments[0] if segments else "")
+
+        time.sleep(self.server.delay(provider))
+        if provider is None:
+            return self._send(provider, 404, {"error": "unknown route"})
+        if random.random() < self.server.error_rate:
+            return self._send(provider, 503, {"error": "replayed outage"})
+
+        recorded = self.server.recordings.get(provider, {})
+        if provider == "alpha_vantage":
+            function = params.get("function", "")
+            key = params.get("symbol") or params.get("topics") or ""
+            body = self._lookup(recorded.get(function, {}), key)
+            if function == "NEWS_SENTIMENT" and body and params.get("time_from"):
+                # time_from has minute resolution (YYYYMMDDTHHMM)
+                body = dict(body, feed=[a for a in body.get("feed", []) if a["time_published"][:13] > params["time_from"]])
+        elif provider == "fmp" and len(segments) == 3 and segments[1] == "quote":
+            body = [quote for quote in (self._lookup(recorded.get("quote", {}), symbol) for symbol in segments[2].split(",")) if quote]
+        elif provider == "fmp" and len(segments) == 3 and segments[1] == "historical-price-full":
+            body = self._lookup(recorded.get("historical-price-full", {}), segments[2])
+            if body and params.get("from"):
+                body = dict(body, historical=[bar for bar in body["historical"] if bar["date"] >= params["from"]])
+        elif provider == "yahoo" and len(segments) == 3 and segments[1] == "quote":
+            body = self._lookup(recorded.get("quote", {}), segments[2])
+        elif provider == "yahoo" and len(segments) == 3 and segments[1] == "chart":
+            history = self._lookup(self.server.recordings.get("fmp", {}).get("historical-price-full", {}), segments[2])
+            body = _chart(history, int(params.get("period1", 0))) if history else None
+        else:
+            return self._send(provider, 404, {"error": "unknown route"})
+
+        if body is None:
+            return self._send(provider, 404, {"error": "no recording"})
+        self._send(provider, 200, body)
+
+    def _lookup(self, responses: dict, key: str):
+        response = responses.get(key, responses.get("*"))
+        return _fill(response, key.upper()) if response is not None else None
+
+    def _send(self, provider, status: int, body):
+        self.server.count(provider or "unknown", status)
+        if isinstance(body, str):
+            payload, content_type = body.encode(), "text/html; charset=utf-8"
+        else:
+            payload, content_type = json.dumps(body).encode(), "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def load_recordings(path: Path = RECORDINGS) -> dict:
+    return json.loads(Path(path).read_text())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--recordings", default=str(RECORDINGS))
+    args = parser.parse_args(argv)
+
+    server = ReplayServer(load_recordings(args.recordings), args.host, args.port, args.latency, error_rate=args.error_rate)
+    for name, value in server.endpoints().items():
+        print(f"{name}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
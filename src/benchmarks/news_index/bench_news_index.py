@@ -0,0 +1,181 @@
+"""
+Benchmark for news near-duplicate collapsing and relevance search.
+
+Generates a feed of distinct stories, each syndicated in a few edited copies
+(source suffixes, truncated summaries, reworded headlines, changed words),
+merges it into a TopicFeed and reports:
+
+- merge time per article (fingerprinting, dedupe lookup and indexing)
+- dedupe precision and recall against the known story of every copy
+- search latency for hypothesis-like queries over the whole feed
+- distinct stories and on-topic articles among the 20 returned, for the
+  previous behaviour (20 most recent, copies included) and for search
+
+Usage (from the directory containing src/):
+    python -m benchmarks.news_index.bench_news_index [--stories 1500] [--queries 200] [--output results.json]
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+from pathlib import Path
+from datetime import datetime, timedelta
+
+from src.services.news_store import TopicFeed, AV_TIME_FORMAT, av_timestamp_to_iso
+
+COMPANIES = [
+    ("Apple", "AAPL"), ("Microsoft", "MSFT"), ("Nvidia", "NVDA"), ("Tesla", "TSLA"), ("Amazon", "AMZN"),
+    ("Alphabet", "GOOGL"), ("Meta Platforms", "META"), ("Netflix", "NFLX"), ("AMD", "AMD"), ("Intel", "INTC"),
+    ("JPMorgan Chase", "JPM"), ("Exxon Mobil", "XOM"), ("Pfizer", "PFE"), ("Boeing", "BA"), ("Walmart", "WMT"),
+    ("Disney", "DIS"), ("Coca-Cola", "KO"), ("Nike", "NKE"), ("Salesforce", "CRM"), ("Oracle", "ORCL"),
+]
+TOPICS = [
+    ("iPhone demand", "smartphone"), ("cloud revenue", "cloud"), ("data center chips", "chip"), ("deliveries", "vehicle"),
+    ("ad sales", "advertising"), ("subscriber growth", "streaming"), ("loan growth", "lending"), ("refining margins", "oil"),
+    ("drug trial results", "pharma"), ("aircraft orders", "aerospace"), ("holiday sales", "retail"), ("AI spending", "ai"),
+    ("layoffs", "workforce"), ("buyback plan", "capital"), ("guidance", "outlook"), ("antitrust probe", "regulation"),
+]
+MOVES = [("climb", "rose"), ("jump", "gained"), ("slide", "fell"), ("sink", "dropped"), ("rally", "advanced"), ("slip", "declined")]
+SOURCES = ["Reuters", "Bloomberg", "Benzinga", "Zacks", "Motley Fool", "MarketWatch", "CNBC", "Seeking Alpha", "Yahoo Finance"]
+FILLER = [
+    "analysts said the results exceeded consensus expectations",
+    "the company reiterated its full-year outlook",
+    "management pointed to stronger pricing and cost discipline",
+    "investors weighed the implications for margins next quarter",
+    "the move follows a volatile session for the broader market",
+    "executives said supply constraints were easing faster than expected",
+    "the stock has outperformed the S&P 500 so far this year",
+    "several brokers raised their price targets after the report",
+    "the update comes ahead of the company's investor day",
+    "options activity pointed to elevated expectations into the print",
+]
+
+
+def story(rng, index):
+    company, symbol = rng.choice(COMPANIES)
+    topic, keyword = rng.choice(TOPICS)
+    move, past = rng.choice(MOVES)
+    pct = round(rng.uniform(0.5, 9.5), 1)
+    day = rng.choice(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"])
+    title = f"{company} shares {move} {pct}% on {topic} {rng.choice(['update', 'report', 'news', 'surprise', 'concerns'])}"
+    summary = (
+        f"{company} ({symbol}) stock {past} {pct}% on {day} after the latest {topic} figures, "
+        f"with {keyword} volumes at {rng.randint(10, 990)} million. " + ". ".join(rng.sample(FILLER, 3)).capitalize() + "."
+    )
+    return {"story": index, "company": company, "topic": topic, "title": title, "summary": summary}
+
+
+def copy_of(rng, original, kind):
+    title, summary = original["title"], original["summary"]
+    if kind == "suffix":
+        title = f"{title} - {rng.choice(SOURCES)}"
+    elif kind == "truncated":
+        summary = summary[: rng.randint(90, 140)].rsplit(" ", 1)[0] + "..."
+    elif kind == "reworded":
+        title = title.replace(" shares ", " stock ").replace(" on ", " after ")
+    elif kind == "edited":
+        words = summary.split()
+        position = rng.randrange(len(words))
+        words[position] = rng.choice(["reportedly", "notably", "sharply", "also"])
+        summary = " ".join(words)
+    return dict(original, title=title, summary=summary)
+
+
+def generate_feed(stories: int, rng, now: datetime) -> list:
+    """(av_timestamp, article) pairs, newest first like the API returns them."""
+    pairs = []
+    for index in range(stories):
+        original = story(rng, index)
+        published = now - timedelta(minutes=rng.randint(0, 7 * 24 * 60 - 60))
+        copies = [("original", original)]
+        for _ in range(rng.choice([0, 0, 1, 2, 3, 5])):
+            kind = rng.choice(["identical", "suffix", "truncated", "reworded", "edited"])
+            copies.append((kind, copy_of(rng, original, kind)))
+        for offset, (kind, article) in enumerate(copies):
+            stamp = (published + timedelta(minutes=offset * rng.randint(1, 20))).strftime(AV_TIME_FORMAT)
+            pairs.append((stamp, {
+                "title": article["title"],
+                "summary": article["summary"],
+                "source": rng.choice(SOURCES),
+                "url": f"https://news.example/{index}/{offset}",
+                "published": av_timestamp_to_iso(stamp),
+                "sentiment_score": round(rng.uniform(-0.5, 0.5), 3),
+                "sentiment_label": "Neutral",
+                "_story": index,
+                "_company": article["company"],
+                "_topic": article["topic"],
+            }))
+    pairs.sort(key=lambda pair: pair[0], reverse=True)
+    return pairs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--stories", type=int, default=1500)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    pairs = generate_feed(args.stories, rng, datetime.now())
+    copies_total = len(pairs) - args.stories
+
+    feed = TopicFeed()
+    started = time.perf_counter()
+    feed.merge(pairs, max_articles=len(pairs))
+    merge_seconds = time.perf_counter() - started
+
+    kept_stories = [article["_story"] for article in feed.articles]
+    false_merges = args.stories - len(set(kept_stories))
+    collapsed = feed.collapsed
+    missed = len(kept_stories) - len(set(kept_stories))
+
+    previous = [article for _, article in pairs[:20]]
+    latencies, relevant_new, relevant_previous, distinct_new = [], [], [], []
+    for _ in range(args.queries):
+        company, symbol = rng.choice(COMPANIES)
+        topic, _ = rng.choice(TOPICS)
+        hypothesis = f"{company} ({symbol}) will rise on {topic} by Q4 {datetime.now().year}"
+        started = time.perf_counter()
+        results = feed.search(hypothesis, 7, 20)
+        latencies.append((time.perf_counter() - started) * 1000)
+        relevant_new.append(sum(article["_company"] == company for article in results))
+        relevant_previous.append(sum(article["_company"] == company for article in previous))
+        distinct_new.append(len({article["_story"] for article in results}))
+
+    latencies.sort()
+    results = {
+        "articles": len(pairs),
+        "stories": args.stories,
+        "copies": copies_total,
+        "merge_ms_per_1000_articles": round(merge_seconds / len(pairs) * 1e6, 2),
+        "dedupe": {
+            "collapsed": collapsed,
+            "recall": round((copies_total - missed) / copies_total, 4) if copies_total else None,
+            "false_merges": false_merges,
+            "precision": round((collapsed - false_merges) / collapsed, 4) if collapsed else None,
+        },
+        "search_ms": {
+            "indexed": len(feed.articles),
+            "p50": round(latencies[len(latencies) // 2], 3),
+            "p95": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+        },
+        "top20": {
+            "previous_distinct_stories": len({article["_story"] for article in previous}),
+            "search_distinct_stories": round(statistics.mean(distinct_new), 2),
+            "previous_on_company": round(statistics.mean(relevant_previous), 2),
+            "search_on_company": round(statistics.mean(relevant_new), 2),
+        },
+    }
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Benchmark for the rolling sentiment aggregates.
+
+Generates 30 days of per-ticker sentiment observations (some tickers with
+only zero-relevance articles) and times
+services.sentiment_aggregates.aggregate for every ticker at once (a full
+refresh) and for the handful of tickers a news refresh touches. Every
+ticker is also aggregated with a per-ticker Python loop, as a reference for
+speed and agreement.
+
+Usage (from the directory containing src/):
+    python -m benchmarks.sentiment.bench_sentiment [--tickers 2000] [--observations 500000] [--output results.json]
+"""
+import sys
+import json
+import math
+import time
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from src.services.sentiment_aggregates import WINDOWS, BULLISH, BEARISH, aggregate
+
+
+def generate(tickers: int, count: int, now: datetime, rng) -> dict:
+    names = np.array([f"T{index:04d}" for index in range(tickers)], dtype=object)
+    # Coverage is skewed: a few tickers get most of the articles
+    codes = np.minimum(rng.zipf(1.3, size=count) - 1, tickers - 1)
+    ages = rng.uniform(0, 30 * 86400, size=count)
+    relevance = np.round(rng.uniform(0.05, 1, size=count), 4)
+    # Alpha Vantage sends relevance_score "0" for passing mentions; some tickers only get those
+    relevance[(rng.random(tickers) < 0.05)[codes]] = 0.0
+    return {
+        "ticker": list(names[codes]),
+        "published": [now - timedelta(seconds=float(age)) for age in ages],
+        "score": list(np.round(rng.normal(0.1, 0.25, size=count).clip(-1, 1), 4)),
+        "relevance": list(relevance),
+    }
+
+
+def loop_aggregate(observations: dict, now: datetime) -> dict:
+    """The per-ticker loop aggregate() replaces: {(ticker, window): (articles, mean, dispersion, bullish, bearish)}."""
+    grouped = {}
+    for ticker, published, score, relevance in zip(*(observations[key] for key in ("ticker", "published", "score", "relevance"))):
+        grouped.setdefault(ticker, []).append((now.timestamp() - published.timestamp(), score, relevance))
+    result = {}
+    for ticker, items in grouped.items():
+        for name, days in WINDOWS.items():
+            inside = [(score, weight) for age, score, weight in items if age < days * 86400]
+            if inside and not sum(weight for _, weight in inside):
+                inside = [(score, 1.0) for score, _ in inside]
+            total = sum(weight for _, weight in inside)
+            mean = sum(score * weight for score, weight in inside) / total if total else None
+            variance = sum(weight * (score - mean) ** 2 for score, weight in inside) / total if total else None
+            bullish = sum(score >= BULLISH for score, _ in inside) / len(inside) if inside else None
+            bearish = sum(score <= BEARISH for score, _ in inside) / len(inside) if inside else None
+            result[(ticker, name)] = (len(inside), mean, math.sqrt(variance) if total else None, bullish, bearish)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tickers", type=int, default=2000)
+    parser.add_argument("--observations", type=int, default=500_000)
+    parser.add_argument("--touched", type=int, default=20, help="tickers touched by one news refresh")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    now = datetime.now()
+    observations = generate(args.tickers, args.observations, now, rng)
+
+    started = time.perf_counter()
+    rows = aggregate(observations, now)
+    full_seconds = time.perf_counter() - started
+
+    # What one incremental flush aggregates: the observations of the tickers it touched
+    touched = set(rng.choice(sorted(set(observations["ticker"])), size=args.touched, replace=False))
+    keep = [index for index, ticker in enumerate(observations["ticker"]) if ticker in touched]
+    subset = {key: [values[index] for index in keep] for key, values in observations.items()}
+    started = time.perf_counter()
+    aggregate(subset, now)
+    incremental_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    expected = loop_aggregate(observations, now)
+    loop_seconds = time.perf_counter() - started
+
+    def close(value, reference):
+        return value is None and reference is None or value is not None and abs(value - reference) < 1e-3
+
+    agree = sum(
+        row["articles"] == expected[(row["ticker"], row["window"])][0]
+        and all(close(row[field], reference) for field, reference in
+                zip(("mean", "dispersion", "bullish", "bearish"), expected[(row["ticker"], row["window"])][1:]))
+        for row in rows
+    )
+    results = {
+        "observations": args.observations,
+        "tickers": len(set(observations["ticker"])),
+        "full_refresh_ms": round(full_seconds * 1000, 1),
+        "incremental": {"tickers": args.touched, "observations": len(keep), "ms": round(incremental_seconds * 1000, 2)},
+        "loop_full_refresh_ms": round(loop_seconds * 1000, 1),
+        "rows": len(rows),
+        "agreement": round(agree / len(rows), 6),
+    }
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output)
+    return 0 if results["agreement"] == 1.0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Import-time budget check for the API app.
+
+Imports src.adk.main in fresh interpreters and reports the median wall time, the
+slowest modules (from -X importtime) and whether any lazily loaded SDK was
+pulled in at import. Exits 1 if the median exceeds the budget or a lazy module
+was imported, so it can gate CI.
+
+Usage (from the directory containing src/):
+    python -m benchmarks.startup.bench_import_time [--runs 5] [--budget-ms 1200] [--output results.json]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+TARGET = "src.adk.main"
+# Modules that must only load on first use, never while importing the app.
+LAZY_MODULES = ("google.generativeai", "google.api_core", "bs4", "asyncpg", "aiosqlite", "uvicorn", "numpy")
+
+_PROBE = f"""
+import sys, time, json
+started = time.perf_counter()
+import {TARGET}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    env.setdefault("PYTHONWARNINGS", "ignore")
+    return env
+
+
+def probe() -> dict:
+    output = subprocess.run([sys.executable, "-c", _PROBE], capture_output=True, text=True, env=_env(), check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def slowest_packages(top: int) -> list:
+    """Sums -X importtime self times per top-level package, slowest first."""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {TARGET}"],
+        capture_output=True, text=True, env=_env(), check=True
+    )
+    totals = {}
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        totals[package] = totals.get(package, 0) + int(self_us)
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [{"package": package, "ms": round(us / 1000, 1)} for package, us in ranked]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to time")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "1200")))
+    parser.add_argument("--top", type=int, default=10, help="slowest packages to list")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    probes = [probe() for _ in range(args.runs)]
+    timings = [p["ms"] for p in probes]
+    loaded = sorted({module for p in probes for module in p["loaded"]})
+    results = {
+        "target": TARGET,
+        "runs": args.runs,
+        "median_ms": round(statistics.median(timings), 1),
+        "min_ms": round(min(timings), 1),
+        "max_ms": round(max(timings), 1),
+        "budget_ms": args.budget_ms,
+        "lazy_modules_loaded": loaded,
+        "slowest_packages": slowest_packages(args.top),
+    }
+    results["passed"] = results["median_ms"] <= args.budget_ms and not loaded
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output)
+    return 0 if results["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Benchmark for the Yahoo Finance quote page parser.
+
+Parses quote pages with services.yahoo_quote.parse_quote_page and with the
+previous approach (a full html.parser BeautifulSoup tree searched for one
+fin-streamer tag), reporting CPU time, peak allocations and whether the right
+price was found.
+
+By default it runs on generated pages that mimic the live layouts (header
+tickers before the quote, ~1 MB of markup, fin-streamer, table-cell and
+embedded-JSON variants, the last also with related tickers' quotes around the
+symbol's). Point --pages at a directory of saved pages named
+<SYMBOL>.html to run on real ones.
+
+Usage (from the directory containing src/):
+    python -m benchmarks.yahoo_parse.bench_yahoo_parse [--pages DIR] [--repeat 20] [--output results.json]
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+import tracemalloc
+from pathlib import Path
+
+from src.services.yahoo_quote import parse_quote_page
+
+HEADER_TICKERS = [("^GSPC", 5123.41), ("^DJI", 38790.43), ("^IXIC", 16103.45), ("CL=F", 81.47), ("GC=F", 2164.3), ("BTC-USD", 67012.0)]
+
+
+def legacy_parse(html, symbol):
+    """The BeautifulSoup lookup this benchmark replaced (price only)."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    price_element = soup.find('fin-streamer', {'data-field': 'regularMarketPrice'})
+    if not price_element:
+        raise ValueError("Could not find price element on Yahoo Finance page")
+    return {'source': 'yahoo_scraped', 'symbol': symbol, 'price': float(price_element.get('value', 0))}
+
+
+def _streamer(symbol, field, value):
+    return f'<fin-streamer class="livePrice" data-symbol="{symbol}" data-field="{field}" data-trend="none" value="{value}" active>{value}</fin-streamer>'
+
+
+def _filler(rng, kilobytes):
+    blocks, size = [], 0
+    while size < kilobytes * 1024:
+        block = (
+            f'<div class="card-{rng.randint(0, 999)}" data-testid="module-{rng.randint(0, 99)}"><ul>'
+            + "".join(f'<li><a href="/news/story-{rng.randint(0, 10**6)}.html">Headline {rng.random():.6f}</a> <span>{rng.randint(1, 59)}m ago</span></li>' for _ in range(8))
+            + '</ul></div><script>window.__metrics=' + json.dumps({"k": rng.random(), "v": [rng.randint(0, 9) for _ in range(20)]}) + ';</script>'
+        )
+        blocks.append(block)
+        size += len(block)
+    return "".join(blocks)
+
+
+def _quote_object(symbol, price, previous_close, volume) -> dict:
+    change = round(price - previous_close, 2)
+    return {
+        "symbol": symbol,
+        "regularMarketPrice": {"raw": price, "fmt": f"{price:,.2f}"},
+        "regularMarketPreviousClose": {"raw": previous_close, "fmt": f"{previous_close:,.2f}"},
+        "regularMarketChange": {"raw": change, "fmt": f"{change:+.2f}"},
+        "regularMarketChangePercent": {"raw": round(change / previous_close * 100, 4), "fmt": "x%"},
+        "regularMarketVolume": {"raw": volume, "fmt": f"{volume:,}"},
+    }
+
+
+def generate_page(symbol, layout, rng):
+    """Returns (html, expected price) for a synthetic quote page."""
+    price = round(rng.uniform(20, 900), 2)
+    previous_close = round(price * rng.uniform(0.95, 1.05), 2)
+    change = round(price - previous_close, 2)
+    volume = rng.randint(10**5, 10**8)
+    header = "".join(
+        _streamer(ticker, "regularMarketPrice", value) + _streamer(ticker, "regularMarketChange", 1.2)
+        for ticker, value in HEADER_TICKERS
+    )
+    quote_json = _quote_object(symbol, price, previous_close, volume)
+    if layout == "related":
+        # Related tickers' quotes embedded right before and after this one
+        quote_json = [
+            _quote_object("RELA", price * 2 + 1, previous_close * 2, volume + 1),
+            quote_json,
+            _quote_object("RELB", price / 2, previous_close / 2, volume - 1),
+        ]
+    quote_json = json.dumps(quote_json)
+    embedded = f'<script type="application/json" data-sveltekit-fetched>{{"body":{json.dumps(quote_json)}}}</script>'
+
+    if layout == "streamers":
+        quote = (
+            f'<section data-testid="quote-price">{_streamer(symbol, "regularMarketPrice", price)}'
+            f'{_streamer(symbol, "regularMarketChange", change)}{_streamer(symbol, "regularMarketChangePercent", round(change / previous_close * 100, 4))}</section>'
+            f'<ul data-testid="quote-statistics"><li>Previous Close {_streamer(symbol, "regularMarketPreviousClose", previous_close)}</li>'
+            f'<li>Volume {_streamer(symbol, "regularMarketVolume", volume)}</li></ul>'
+        )
+    elif layout == "table":
+        quote = (
+            f'<div id="quote-header-info">{_streamer(symbol, "regularMarketPrice", price)}{_streamer(symbol, "regularMarketChange", change)}</div>'
+            f'<table><tr><td>Previous Close</td><td class="Ta(end)" data-test="PREV_CLOSE-value">{previous_close:,.2f}</td></tr>'
+            f'<tr><td>Volume</td><td data-test="TD_VOLUME-value">{_streamer(symbol, "regularMarketVolume", volume)}</td></tr></table>'
+        )
+    else:
+        quote = ""
+
+    html = (
+        f'<!DOCTYPE html><html><head><title>{symbol} Stock Price</title></head><body>'
+        f'<header>{header}</header>{_filler(rng, 400)}<main>{quote}{_filler(rng, 500)}</main>{embedded}{_filler(rng, 100)}</body></html>'
+    )
+    return html, price
+
+
+def load_pages(directory):
+    if directory:
+        return [(path.stem.upper(), path.name, path.read_text(errors="replace"), None) for path in sorted(Path(directory).glob("*.html"))]
+    rng = random.Random(7)
+    pages = []
+    for symbol, layout in [("AAPL", "streamers"), ("MSFT", "streamers"), ("NVDA", "table"), ("TSLA", "json"), ("AMZN", "related")]:
+        html, price = generate_page(symbol, layout, rng)
+        pages.append((symbol, f"{symbol}-{layout}", html, price))
+    return pages
+
+
+def measure(parser, pages, repeat: int) -> dict:
+    per_page = {}
+    for symbol, name, html, expected in pages:
+        try:
+            quote = parser(html, symbol)
+        except Exception:
+            quote = None
+        correct = quote is not None and (expected is None or abs(quote["price"] - expected) < 1e-6)
+
+        started = time.process_time()
+        for _ in range(repeat):
+            try:
+                parser(html, symbol)
+            except Exception:
+                pass
+        cpu_ms = (time.process_time() - started) / repeat * 1000
+
+        tracemalloc.start()
+        try:
+            parser(html, symbol)
+        except Exception:
+            pass
+        peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+
+        per_page[name] = {
+            "correct": correct,
+            "fields": sorted(quote) if quote else [],
+            "cpu_ms": round(cpu_ms, 3),
+            "peak_kb": round(peak_kb, 1),
+        }
+    return {
+        "correct": sum(page["correct"] for page in per_page.values()),
+        "mean_cpu_ms": round(statistics.mean(page["cpu_ms"] for page in per_page.values()), 3),
+        "mean_peak_kb": round(statistics.mean(page["peak_kb"] for page in per_page.values()), 1),
+        "pages": per_page,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", help="directory of saved <SYMBOL>.html quote pages")
+    parser.add_argument("--repeat", type=int, default=20, help="timed parses per page")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    pages = load_pages(args.pages)
+    results = {
+        "pages": len(pages),
+        "average_page_kb": round(statistics.mean(len(html) for _, _, html, _ in pages) / 1024, 1),
+        "current": measure(parse_quote_page, pages, args.repeat),
+        "legacy": measure(legacy_parse, pages, max(1, args.repeat // 4)),
+    }
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output)
+    return 0 if results["current"]["correct"] >= results["legacy"]["correct"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
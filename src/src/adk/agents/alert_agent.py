@@ -1,10 +1,8 @@
-import os
-import google.generativeai as genai
+from ...services import llm_gateway
 from ...utils.text_processor import extract_json_from_response
+from ...utils.log import get_logger
 
-# Configure the Gemini API key
-genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
-model = genai.GenerativeModel('gemini-2.0-flash')
+logger = get_logger("agents.alert")
 
 ALERT_INSTRUCTION = """
 You are the Alert Agent for TradeSage AI. Generate SPECIFIC, ACTIONABLE alerts.
@@ -47,8 +45,11 @@ async def generate_alerts(final_report: dict) -> list:
     prompt = f"{ALERT_INSTRUCTION}\n\nFinal Report: {final_report}"
 
     try:
-        response = await model.generate_content_async(prompt)
-        return extract_json_from_response(response.text)
+        return await llm_gateway.generate(
+            "alert", ALERT_INSTRUCTION, prompt,
+            inputs={"final_report": final_report},
+            parse=extract_json_from_response
+        )
     except Exception as e:
-        print(f"Error in Alert Agent: {e}")
+        logger.error("Error in Alert Agent: %s", e)
         return [{"error": "Failed to generate alerts.", "details": str(e)}]
@@ -1,10 +1,8 @@
-import os
-import google.generativeai as genai
+from ...services import llm_gateway
 from ...utils.text_processor import extract_json_from_response
+from ...utils.log import get_logger
 
-# Configure the Gemini API key
-genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
-model = genai.GenerativeModel('gemini-2.0-flash')
+logger = get_logger("agents.context")
 
 CONTEXT_INSTRUCTION = """
 You are the Context Agent for TradeSage AI. Extract structured context from hypotheses.
@@ -57,8 +55,11 @@ async def get_context(structured_hypothesis: str) -> dict:
     prompt = f"{CONTEXT_INSTRUCTION}\n\nHypothesis: \"{structured_hypothesis}\""
 
     try:
-        response = await model.generate_content_async(prompt)
-        return extract_json_from_response(response.text)
+        return await llm_gateway.generate(
+            "context", CONTEXT_INSTRUCTION, prompt,
+            inputs={"hypothesis": structured_hypothesis},
+            parse=extract_json_from_response
+        )
     except Exception as e:
-        print(f"Error in Context Agent: {e}")
+        logger.error("Error in Context Agent: %s", e)
         return {"error": "Failed to generate context.", "details": str(e)}
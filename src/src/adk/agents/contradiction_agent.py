@@ -1,13 +1,13 @@
-import os
+import asyncio
 import re
 import json
-import google.generativeai as genai
-from ...tools import news_tool, market_data_tool
+from ...services import llm_gateway
+from ...tools import news_tool, market_data_tool, price_history_tool, sentiment_tool
+from ...utils.evidence_digest import build_evidence_digest, budget_for
 from ...utils.text_processor import extract_json_from_response
+from ...utils.log import get_logger
 
-# Configure the Gemini API key
-genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
-model = genai.GenerativeModel('gemini-2.0-flash')
+logger = get_logger("agents.contradiction")
 
 CONTRADICTION_INSTRUCTION = """
 You are the Contradiction Agent for TradeSage AI. Find and present SPECIFIC market risks and contradictions.
@@ -40,6 +40,8 @@ Format your response as a JSON array of contradictions:
 ]
 
 Generate 3-5 SPECIFIC, REALISTIC contradictions based on actual market conditions.
+When citing price risk (volatility, drawdowns, the required move, the probability of
+reaching the target), use the Quant figures from the tool data exactly as given.
 """
 
 async def find_contradictory_evidence(structured_hypothesis: dict) -> list:
@@ -47,7 +49,7 @@ async def find_contradictory_evidence(structured_hypothesis: dict) -> list:
     Uses tools to find news and market data, then uses Gemini to find contradictions.
     """
     hypothesis_str = structured_hypothesis.get("structured_hypothesis", "")
-    print(f"Contradiction Agent is looking for risks for: {hypothesis_str}")
+    logger.debug("Looking for risks", extra={"hypothesis": hypothesis_str})
 
     # Extract symbol and query from the hypothesis string
     symbol_match = re.search(r'\((.*?)\)', hypothesis_str)
@@ -55,15 +57,24 @@ async def find_contradictory_evidence(structured_hypothesis: dict) -> list:
     query = hypothesis_str.split('(')[0].strip()
 
     # Use tools to get real data
-    news_data = news_tool.search_news(query)
-    market_data = market_data_tool.search_market_data(symbol)
+    news_data, market_data, quant_facts, sentiment = await asyncio.gather(
+        news_tool.search_news_async(query, relevant_to=hypothesis_str),
+        market_data_tool.search_market_data_async(symbol),
+        price_history_tool.get_quant_facts_async(symbol, hypothesis_str),
+        sentiment_tool.get_sentiment_async(symbol)
+    )
 
-    prompt = f"{CONTRADICTION_INSTRUCTION}\n\nHypothesis: \"{hypothesis_str}\"\n\nTool Data (News): {news_data}\n\nTool Data (Market): {market_data}"
+    # Compact, de-duplicated view of the tool data instead of the raw dicts
+    evidence = build_evidence_digest(hypothesis_str, news_data, market_data, budget_for("contradiction"), quant_facts, sentiment)
+    prompt = f"{CONTRADICTION_INSTRUCTION}\n\nHypothesis: \"{hypothesis_str}\"\n\nTool Data:\n{evidence}"
 
     try:
-        response = await model.generate_content_async(prompt)
         # Use the robust JSON extractor
-        return extract_json_from_response(response.text)
+        return await llm_gateway.generate(
+            "contradiction", CONTRADICTION_INSTRUCTION, prompt,
+            inputs={"hypothesis": hypothesis_str, "evidence": evidence},
+            parse=extract_json_from_response
+        )
     except Exception as e:
-        print(f"Error in Contradiction Agent: {e}")
+        logger.error("Error in Contradiction Agent: %s", e)
         return [{"error": "Failed to generate contradictions.", "details": str(e)}]
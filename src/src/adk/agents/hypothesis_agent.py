@@ -1,11 +1,7 @@
-import os
-import google.generativeai as genai
+from ...services import llm_gateway
+from ...utils.log import get_logger
 
-# Configure the Gemini API key
-# In a real app, use a more secure method like Secret Manager
-genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
-
-model = genai.GenerativeModel('gemini-2.0-flash')
+logger = get_logger("agents.hypothesis")
 
 HYPOTHESIS_INSTRUCTION = """
 You are the Hypothesis Agent for TradeSage AI. Process and structure trading hypotheses.
@@ -43,15 +39,18 @@ async def structure_hypothesis(query: str) -> dict:
 
     try:
         # The new prompt asks for a direct string, not JSON
-        response = await model.generate_content_async(prompt)
-        structured_statement = response.text.strip()
+        response_text = await llm_gateway.generate(
+            "hypothesis", HYPOTHESIS_INSTRUCTION, prompt,
+            inputs={"query": query}
+        )
+        structured_statement = response_text.strip()
         
         # We will return this as a dictionary for consistency in the orchestrator
         return {
             "structured_hypothesis": structured_statement
         }
     except Exception as e:
-        print(f"Error structuring hypothesis: {e}")
+        logger.error("Error structuring hypothesis: %s", e)
         return {
             "error": "Failed to structure hypothesis.",
             "details": str(e)
@@ -1,11 +1,11 @@
-import os
+import asyncio
 import re
-import google.generativeai as genai
-from ...tools import news_tool, market_data_tool
+from ...services import llm_gateway
+from ...tools import news_tool, market_data_tool, price_history_tool, sentiment_tool
+from ...utils.evidence_digest import build_evidence_digest, budget_for
+from ...utils.log import get_logger
 
-# Configure the Gemini API key
-genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
-model = genai.GenerativeModel('gemini-2.0-flash')
+logger = get_logger("agents.research")
 
 RESEARCH_INSTRUCTION = """
 You are the Research Agent for TradeSage AI. Gather SPECIFIC market data and analysis to support the hypothesis.
@@ -31,6 +31,9 @@ BAD OUTPUT (NEVER do this):
 "Let me look up the latest market data for AAPL"
 
 Use the provided tool data to get REAL data, then present the ACTUAL findings.
+The Quant lines are computed from price history: copy returns, volatility, drawdowns,
+required move and probabilities from them exactly. Never estimate a figure the tool data
+does not contain; write "n/a" instead.
 NO meta-commentary about what you're doing.
 """
 
@@ -39,7 +42,7 @@ async def find_supporting_evidence(structured_hypothesis: dict) -> list:
     Uses tools to find news and market data, then uses Gemini to format it as supporting evidence.
     """
     hypothesis_str = structured_hypothesis.get("structured_hypothesis", "")
-    print(f"Research Agent is looking for evidence for: {hypothesis_str}")
+    logger.debug("Looking for evidence", extra={"hypothesis": hypothesis_str})
 
     # Extract symbol and query from the hypothesis string
     symbol_match = re.search(r'\((.*?)\)', hypothesis_str)
@@ -47,15 +50,24 @@ async def find_supporting_evidence(structured_hypothesis: dict) -> list:
     query = hypothesis_str.split('(')[0].strip()
 
     # Use tools to get real data
-    news_data = news_tool.search_news(query)
-    market_data = market_data_tool.search_market_data(symbol)
+    news_data, market_data, quant_facts, sentiment = await asyncio.gather(
+        news_tool.search_news_async(query, relevant_to=hypothesis_str),
+        market_data_tool.search_market_data_async(symbol),
+        price_history_tool.get_quant_facts_async(symbol, hypothesis_str),
+        sentiment_tool.get_sentiment_async(symbol)
+    )
 
-    prompt = f"{RESEARCH_INSTRUCTION}\n\nHypothesis: \"{hypothesis_str}\"\n\nTool Data (News): {news_data}\n\nTool Data (Market): {market_data}"
+    # Compact, de-duplicated view of the tool data instead of the raw dicts
+    evidence = build_evidence_digest(hypothesis_str, news_data, market_data, budget_for("research"), quant_facts, sentiment)
+    prompt = f"{RESEARCH_INSTRUCTION}\n\nHypothesis: \"{hypothesis_str}\"\n\nTool Data:\n{evidence}"
 
     try:
-        response = await model.generate_content_async(prompt)
+        response_text = await llm_gateway.generate(
+            "research", RESEARCH_INSTRUCTION, prompt,
+            inputs={"hypothesis": hypothesis_str, "evidence": evidence}
+        )
         # The prompt asks for a direct string, so we wrap it in a list for consistency
-        return [response.text.strip()]
+        return [response_text.strip()]
     except Exception as e:
-        print(f"Error in Research Agent: {e}")
+        logger.error("Error in Research Agent: %s", e)
         return [{"error": "Failed to generate research findings.", "details": str(e)}]
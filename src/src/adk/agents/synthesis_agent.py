@@ -1,11 +1,10 @@
-import os
 import json
-import google.generativeai as genai
+from ...services import llm_gateway
 from ...utils.text_processor import extract_json_from_response
+from ...utils.evidence_digest import digest_evidence, budget_for
+from ...utils.log import get_logger
 
-# Configure the Gemini API key
-genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
-model = genai.GenerativeModel('gemini-2.0-flash')
+logger = get_logger("agents.synthesis")
 
 SYNTHESIS_INSTRUCTION = """
 You are the Synthesis Agent for TradeSage AI. Create a comprehensive investment analysis based on the provided evidence.
@@ -34,6 +33,17 @@ BAD EXAMPLES (NEVER generate these):
 Generate the complete JSON output based on the provided hypothesis and evidence.
 """
 
+def _parse_report(response_text: str) -> dict:
+    # Raw responses are only logged at debug level, and truncated.
+    logger.debug("Raw synthesis response", extra={"chars": len(response_text), "head": response_text[:500]})
+
+    # Use the robust JSON extractor
+    report = extract_json_from_response(response_text)
+    # The report is saved field by field; an array (e.g. just the confirmations) is a failed response
+    if not isinstance(report, dict):
+        raise ValueError(f"Synthesis response is a JSON {type(report).__name__}, not an object")
+    return report
+
 async def synthesize_evidence(
     structured_hypothesis: dict,
     supporting_evidence: list,
@@ -43,20 +53,25 @@ async def synthesize_evidence(
     Uses the Gemini API to synthesize all gathered evidence into a final report.
     """
     hypothesis_str = structured_hypothesis.get("structured_hypothesis", "")
-    prompt = f"{SYNTHESIS_INSTRUCTION}\n\nHypothesis: \"{hypothesis_str}\"\n\nSupporting Evidence: {supporting_evidence}\n\nContradictory Evidence: {contradictory_evidence}\n\nJSON Output:"
+    # Each side of the evidence gets half of the synthesis budget
+    evidence_budget = budget_for("synthesis") // 2
+    supporting = digest_evidence(supporting_evidence, evidence_budget)
+    contradictory = digest_evidence(contradictory_evidence, evidence_budget)
+    prompt = f"{SYNTHESIS_INSTRUCTION}\n\nHypothesis: \"{hypothesis_str}\"\n\nSupporting Evidence:\n{supporting}\n\nContradictory Evidence:\n{contradictory}\n\nJSON Output:"
 
     try:
-        response = await model.generate_content_async(prompt)
-        
-        print("--- RAW GEMINI RESPONSE (SYNTHESIS AGENT) ---")
-        print(response.text)
-        print("---------------------------------------------")
-
-        # Use the robust JSON extractor
-        report = extract_json_from_response(response.text)
+        report = await llm_gateway.generate(
+            "synthesis", SYNTHESIS_INSTRUCTION, prompt,
+            inputs={
+                "hypothesis": hypothesis_str,
+                "supporting": supporting,
+                "contradictory": contradictory
+            },
+            parse=_parse_report
+        )
         return report
     except Exception as e:
-        print(f"Error synthesizing evidence: {e}")
+        logger.error("Error synthesizing evidence: %s", e)
         return {
             "error": "Failed to synthesize evidence.",
             "details": str(e)
@@ -0,0 +1,102 @@
+import os
+import time
+import uuid
+import asyncio
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import crud
+from ..utils.log import get_logger
+
+logger = get_logger("backtest")
+
+# Concurrent history refreshes when a backtest is run with refresh=True
+BACKTEST_REFRESH_CONCURRENCY = int(os.getenv("BACKTEST_REFRESH_CONCURRENCY", "8"))
+
+
+async def _refresh(service, symbols) -> int:
+    slots = asyncio.Semaphore(BACKTEST_REFRESH_CONCURRENCY)
+
+    async def refresh(symbol):
+        async with slots:
+            return "error" not in await service.get_history_async(symbol)
+
+    results = await asyncio.gather(*(refresh(symbol) for symbol in symbols))
+    return results.count(False)
+
+
+def _histories(store, symbols) -> dict:
+    histories = {}
+    for symbol in symbols:
+        try:
+            history = store.read(symbol)
+        except ValueError:
+            # Not a symbol the store accepts (e.g. free text in parentheses)
+            continue
+        if history is not None:
+            histories[symbol] = history
+    return histories
+
+
+def _score(engine, columns: dict, parsed: dict, histories: dict, as_of: int) -> list:
+    import numpy as np
+    created = np.array(columns["created_at"], dtype="datetime64[D]").astype(np.int64)
+    outcome = engine.evaluate(parsed["symbol"], created, parsed["target"], parsed["deadline"], parsed["down"], histories, as_of)
+    return engine.summarize(
+        outcome["status"],
+        np.array(columns["confidence_score"], dtype=np.float64),
+        {"recommendation": columns["recommendation"], "sector": columns["sector"]},
+    )
+
+
+async def run_backtest(db: AsyncSession, refresh: bool = False) -> dict:
+    """
+    Scores every saved report against the local price history and stores hit
+    rates, Brier scores and calibration curves overall, per recommendation and
+    per sector under a new run id.
+
+    Args:
+        db: The database session.
+        refresh: Bring the history of every referenced symbol up to date first.
+
+    Returns:
+        The run id, counts and summary rows, or an error dict.
+    """
+    # The engine needs NumPy; load it here rather than with the API.
+    from ..services import backtest as engine
+    from ..services.price_history_service import price_history_service
+
+    started = time.perf_counter()
+    columns = await crud.load_report_columns(db)
+    if not columns["id"]:
+        return {"error": "No reports to backtest"}
+    loaded = time.perf_counter()
+
+    parsed = await asyncio.to_thread(engine.parse_hypotheses, columns["hypothesis"], columns["symbol"])
+    symbols = list(engine.factorize(parsed["symbol"])[1])
+    refresh_failures = await _refresh(price_history_service, symbols) if refresh else 0
+    histories = await asyncio.to_thread(_histories, price_history_service.store, symbols)
+
+    as_of = datetime.utcnow()
+    today = (as_of.date() - datetime(1970, 1, 1).date()).days
+    scoring = time.perf_counter()
+    rows = await asyncio.to_thread(_score, engine, columns, parsed, histories, today)
+    scored = time.perf_counter()
+
+    run_id = str(uuid.uuid4())
+    await crud.save_backtest_summary(db, run_id, rows, as_of)
+    timings = {
+        "load_s": round(loaded - started, 3),
+        "score_s": round(scored - scoring, 3),
+        "total_s": round(time.perf_counter() - started, 3),
+    }
+    logger.info("Backtest complete", extra={"run_id": run_id, "reports": len(columns["id"]), "symbols": len(histories), **timings})
+    return {
+        "run_id": run_id,
+        "as_of": as_of,
+        "reports": len(columns["id"]),
+        "symbols": len(symbols),
+        "symbols_with_history": len(histories),
+        "refresh_failures": refresh_failures,
+        "timings": timings,
+        "summary": rows,
+    }
@@ -0,0 +1,183 @@
+import os
+import uuid
+import asyncio
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import crud
+from .orchestrator import run_analysis
+from ..utils.log import get_logger, trace
+
+logger = get_logger("jobs")
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+# Seconds a running job's claim lasts without renewal; a job whose process
+# stopped is re-queued once it lapses. Also the recovery sweep interval.
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class JobQueue:
+    """
+    Background runner for analyses.
+
+    Jobs are persisted in the jobs table before they are queued. Several
+    processes (uvicorn workers, replicas) can share the table: a worker
+    claims a job atomically (queued -> running) before running it and renews
+    a lease on it while it runs, so each job runs once. A recovery sweep, at
+    startup and every lease period, re-queues running jobs whose lease lapsed
+    and takes up queued jobs this process does not hold yet, up to
+    max_queued. A fixed pool of worker tasks bounds how many analyses run at
+    once.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession], workers: int = JOB_WORKERS, max_queued: int = JOB_QUEUE_SIZE):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.max_queued = max_queued
+        self.owner = uuid.uuid4().hex
+        self._queue = None
+        self._tasks = []
+        # Job ids waiting in this process's queue
+        self._held = set()
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        """Starts the workers and picks up jobs left unfinished by stopped processes."""
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.ensure_future(self._worker(i)) for i in range(self.workers)]
+        await self.recover()
+        self._tasks.append(asyncio.ensure_future(self._sweep()))
+
+    async def recover(self) -> int:
+        """
+        Re-queues running jobs whose lease lapsed and enqueues queued jobs not
+        yet held here, up to max_queued. Returns how many were enqueued.
+        """
+        room = self.max_queued - self._queue.qsize()
+        async with self.session_factory() as db:
+            stale = await crud.requeue_stale_jobs(db, datetime.utcnow())
+            job_ids = await crud.get_queued_job_ids(db, room + len(self._held)) if room > 0 else []
+        # Jobs past the bound stay queued in the table for a later sweep
+        job_ids = [job_id for job_id in job_ids if job_id not in self._held][:max(room, 0)]
+        for job_id in job_ids:
+            self._enqueue(job_id)
+        if stale or job_ids:
+            logger.info("Recovered unfinished jobs", extra={"stale": stale, "jobs": len(job_ids)})
+        return len(job_ids)
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS)
+            try:
+                await self.recover()
+            except Exception:
+                logger.exception("Job recovery failed")
+
+    def _enqueue(self, job_id: str):
+        self._held.add(job_id)
+        self._queue.put_nowait(job_id)
+
+    def _lease(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._held.clear()
+
+    async def submit(self, hypothesis: str, bypass_cache: bool = False, max_age: Optional[int] = None) -> dict:
+        """
+        Persists and enqueues a job, returning its id and status.
+
+        Raises:
+            QueueFullError: when max_queued jobs are already waiting.
+        """
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running")
+        if self._queue.qsize() >= self.max_queued:
+            raise QueueFullError(f"Job queue is full ({self.max_queued} jobs waiting)")
+
+        async with self.session_factory() as db:
+            db_job = await crud.create_job(db, hypothesis, bypass_cache=bypass_cache, max_age=max_age)
+            job = {"job_id": db_job.id, "status": db_job.status}
+        self._enqueue(job["job_id"])
+        return job
+
+    async def _worker(self, index: int):
+        while True:
+            job_id = await self._queue.get()
+            self._held.discard(job_id)
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job worker failed", extra={"worker": index, "job_id": job_id})
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        # The job id doubles as the trace id, so a job's logs can be found from its id.
+        with trace(job_id):
+            await self._run_job(job_id)
+
+    async def _run_job(self, job_id: str):
+        # Job bookkeeping uses its own session so progress commits never touch the pipeline's transaction.
+        async with self.session_factory() as job_db, self.session_factory() as db:
+            # Other processes may hold the same job id; only one claim succeeds.
+            if not await crud.claim_job(job_db, job_id, self.owner, self._lease()):
+                return
+            job = await crud.get_job(job_db, job_id)
+            heartbeat = asyncio.ensure_future(self._heartbeat(job_id))
+
+            completed = []
+
+            async def record_progress(stage_name, _):
+                completed.append(stage_name)
+                await crud.update_job(job_db, job_id, progress={"completed_stages": list(completed)})
+
+            try:
+                result = await run_analysis(
+                    job.hypothesis,
+                    db,
+                    bypass_cache=bool(job.bypass_cache),
+                    max_age=job.max_age,
+                    on_stage_complete=record_progress
+                )
+                failed = "error" in result
+                fields = {
+                    "status": "failed" if failed else "succeeded",
+                    "result": jsonable_encoder(result),
+                    "error": result.get("error") if failed else None,
+                }
+            except Exception as e:
+                fields = {"status": "failed", "error": str(e)}
+            finally:
+                heartbeat.cancel()
+            await crud.update_job(job_db, job_id, finished_at=datetime.utcnow(), lease_expires_at=None, **fields)
+
+    async def _heartbeat(self, job_id: str):
+        # Renews the lease with its own session; job_db is busy with progress updates.
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                async with self.session_factory() as db:
+                    renewed = await crud.renew_job_lease(db, job_id, self.owner, self._lease())
+            except Exception:
+                logger.exception("Job lease renewal failed", extra={"job_id": job_id})
+                continue
+            if not renewed:
+                logger.warning("Job lease lost", extra={"job_id": job_id})
+                return
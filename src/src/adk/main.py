@@ -1,19 +1,32 @@
-from fastapi import FastAPI, Depends
-from pydantic import BaseModel
-import uvicorn
-from sqlalchemy.orm import Session
+import time
+_import_started = time.perf_counter()
 
-from ..database import database
-from .orchestrator import run_analysis
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from datetime import datetime
+from fastapi import APIRouter, FastAPI, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
 
-# Create DB tables
-database.init_db()
+from ..database import database, crud
+from ..services import http_client, market_data_service, news_service, llm_cache, llm_gateway, sentiment_service
+from ..tools.single_flight import tool_calls
+from ..tools import price_history_tool
+from .orchestrator import run_analysis, run_batch, stream_analysis
+from .backtest import run_backtest
+from .jobs import JobQueue, QueueFullError
+from ..utils import metrics
+from ..utils.log import get_logger, trace
 
-app = FastAPI(
-    title="MarketAI API",
-    description="API for running financial hypothesis analysis with an agentic system.",
-    version="0.1.0",
-)
+logger = get_logger("api")
+
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
+router = APIRouter()
 
 class HealthCheck(BaseModel):
     status: str
@@ -21,19 +34,328 @@ class HealthCheck(BaseModel):
 class HypothesisRequest(BaseModel):
     hypothesis: str
     mode: str = "analyze"
+    bypass_cache: bool = False
+    # Seconds within which a saved report for the same hypothesis is reused (0 disables)
+    max_age: Optional[int] = None
+
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+
+class BatchHypothesisRequest(BaseModel):
+    hypotheses: List[str] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+    bypass_cache: bool = False
+    max_age: Optional[int] = None
+    # Analyses run at once; capped by the server's BATCH_CONCURRENCY
+    concurrency: Optional[int] = None
+
+job_queue = JobQueue(database.SessionLocal)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Creates tables and starts the job workers and the sentiment pipeline on
+    startup, logging how long each step (and the module imports) took; stops
+    them and closes pools on shutdown.
+    """
+    timings = {"imports": IMPORT_SECONDS}
+    started = time.perf_counter()
+    await database.init_db()
+    timings["init_db"] = time.perf_counter() - started
+    started = time.perf_counter()
+    await job_queue.start()
+    timings["job_queue"] = time.perf_counter() - started
+    started = time.perf_counter()
+    await sentiment_service.sentiment_pipeline.start()
+    timings["sentiment_pipeline"] = time.perf_counter() - started
+    logger.info("Startup complete", extra={**{f"{step}_s": round(seconds, 3) for step, seconds in timings.items()}, "total_s": round(sum(timings.values()), 3)})
+
+    yield
+
+    await job_queue.stop()
+    await sentiment_service.sentiment_pipeline.stop()
+    # Close the shared outbound HTTP and database connection pools.
+    await http_client.aclose()
+    await database.dispose_db()
+
+def create_app() -> FastAPI:
+    """Builds the API application."""
+    app = FastAPI(
+        title="MarketAI API",
+        description="API for running financial hypothesis analysis with an agentic system.",
+        version="0.1.0",
+        lifespan=lifespan,
+    )
+    app.include_router(router)
+
+    @app.middleware("http")
+    async def trace_requests(request: Request, call_next):
+        # Honour a caller's trace id so logs can be joined across services.
+        with trace(request.headers.get("X-Trace-Id")) as request_trace_id:
+            response = await call_next(request)
+        response.headers["X-Trace-Id"] = request_trace_id
+        return response
+
+    return app
+
+@metrics.registry.collector
+def _component_metrics():
+    """Scrape-time gauges derived from the components' own counters."""
+    tools = tool_calls.stats()
+    llm = llm_cache.llm_cache.stats()
+    llm_lookups = llm["hits"] + llm["misses"]
+    gateway = llm_gateway.stats()
+    providers = market_data_service.market_data_service.provider_stats()["providers"]
+
+    ratio_help = "Share of lookups served without an upstream call."
+    yield "marketai_cache_hit_ratio", "gauge", ratio_help, {"cache": "quote"}, market_data_service.market_data_service.cache_stats()["hit_ratio"]
+    yield "marketai_cache_hit_ratio", "gauge", ratio_help, {"cache": "llm"}, round(llm["hits"] / llm_lookups, 4) if llm_lookups else 0.0
+    yield "marketai_cache_hit_ratio", "gauge", ratio_help, {"cache": "tool_calls"}, round((tools["coalesced"] + tools["request_hits"]) / tools["calls"], 4) if tools["calls"] else 0.0
 
-@app.get("/health", response_model=HealthCheck)
+    in_flight_help = "Operations currently in flight."
+    yield "marketai_in_flight", "gauge", in_flight_help, {"component": "gemini"}, gateway["concurrency"]["in_flight"]
+    yield "marketai_in_flight", "gauge", in_flight_help, {"component": "tool_calls"}, tools["in_flight"]
+    yield "marketai_in_flight", "gauge", in_flight_help, {"component": "jobs_queued"}, job_queue.depth
+    yield "marketai_gemini_concurrency_limit", "gauge", "Current adaptive Gemini concurrency limit.", {}, gateway["concurrency"]["limit"]
+    for name, provider in providers.items():
+        yield "marketai_provider_breaker_open", "gauge", "1 while a quote provider's circuit breaker is open.", {"provider": name}, int(provider["breaker"] == "open")
+    for agent, agent_stats in gateway["agents"].items():
+        yield "marketai_llm_tokens_total", "counter", "Gemini tokens reported by the API.", {"agent": agent, "kind": "prompt"}, agent_stats["prompt_tokens"]
+        yield "marketai_llm_tokens_total", "counter", "Gemini tokens reported by the API.", {"agent": agent, "kind": "output"}, agent_stats["output_tokens"]
+
+@router.get("/health", response_model=HealthCheck)
 def health_check():
     """Endpoint to check if the API is running."""
     return {"status": "ok"}
 
-@app.post("/process")
-async def process_hypothesis(request: HypothesisRequest, db: Session = Depends(database.get_db)):
+@router.get("/stats")
+def get_stats():
+    """Endpoint exposing internal counters for the tool and data layers."""
+    return {
+        "tool_calls": tool_calls.stats(),
+        "quote_cache": market_data_service.market_data_service.cache_stats(),
+        "quote_providers": market_data_service.market_data_service.provider_stats(),
+        "news_store": news_service.news_store.stats(),
+        "sentiment_pipeline": sentiment_service.sentiment_pipeline.stats(),
+        "price_history": price_history_tool.stats(),
+        "llm_cache": llm_cache.llm_cache.stats(),
+        "llm_prompt_tokens": llm_gateway.prompt_stats(),
+        "llm_gateway": llm_gateway.stats(),
+        "jobs": {"queued": job_queue.depth, "workers": job_queue.workers},
+    }
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus scrape endpoint: latency histograms, cache hit ratios and in-flight gauges."""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@router.post("/process")
+async def process_hypothesis(request: HypothesisRequest, db: AsyncSession = Depends(database.get_db)):
     """
     Main endpoint to process a user's financial hypothesis.
     """
-    result = await run_analysis(request.hypothesis, db)
+    result = await run_analysis(
+        request.hypothesis,
+        db,
+        bypass_cache=request.bypass_cache,
+        max_age=request.max_age
+    )
+    return result
+
+@router.post("/process/batch")
+async def process_hypothesis_batch(request: BatchHypothesisRequest):
+    """
+    Analyzes a list of hypotheses, returning one entry per input in the same order.
+    """
+    results = await run_batch(
+        request.hypotheses,
+        database.SessionLocal,
+        concurrency=request.concurrency,
+        bypass_cache=request.bypass_cache,
+        max_age=request.max_age
+    )
+    return {"results": results}
+
+@router.post("/process/stream")
+async def process_hypothesis_stream(request: HypothesisRequest):
+    """
+    Streaming variant of /process. Emits one NDJSON line per stage result
+    (hypothesis, context, supporting_evidence, contradictions, report, alerts)
+    as soon as it is ready, followed by a final "result" or "error" line.
+    """
+    async def events():
+        # The session must outlive the endpoint call, so it is owned by the stream itself.
+        async with database.SessionLocal() as db:
+            async for event in stream_analysis(
+                request.hypothesis,
+                db,
+                bypass_cache=request.bypass_cache,
+                max_age=request.max_age
+            ):
+                yield json.dumps(jsonable_encoder(event)) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@router.get("/reports")
+async def list_reports(
+    symbol: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(database.get_db)
+):
+    """
+    Lists past reports, newest first, optionally filtered by symbol and a
+    created_at range. Pass `next_cursor` back as `cursor` for the next page.
+    """
+    try:
+        reports, next_cursor = await crud.list_reports(db, symbol=symbol, start=start, end=end, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "items": [crud.to_dict(report, crud.REPORT_LIST_COLUMNS) for report in reports],
+        "next_cursor": next_cursor,
+    }
+
+@router.get("/reports/{report_id}")
+async def get_report(report_id: int, db: AsyncSession = Depends(database.get_db)):
+    """
+    Returns a full report with its alerts.
+    """
+    report = await crud.get_report(db, report_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    report_dict = crud.to_dict(report)
+    report_dict["alerts"] = [crud.to_dict(alert) for alert in await crud.get_alerts(db, report_id)]
+    return report_dict
+
+@router.get("/reports/{report_id}/alerts")
+async def list_report_alerts(
+    report_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(database.get_db)
+):
+    """
+    Lists the alerts generated for a report, newest first.
+    """
+    return await list_alerts(report_id=report_id, limit=limit, cursor=cursor, db=db)
+
+@router.get("/alerts")
+async def list_alerts(
+    report_id: Optional[int] = None,
+    priority: Optional[str] = None,
+    type: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(database.get_db)
+):
+    """
+    Lists alerts, newest first, filtered by report, priority and/or type.
+    """
+    try:
+        alerts, next_cursor = await crud.list_alerts(
+            db, report_id=report_id, priority=priority, alert_type=type, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": [crud.to_dict(alert) for alert in alerts], "next_cursor": next_cursor}
+
+@router.post("/backtest")
+async def create_backtest(refresh: bool = False, db: AsyncSession = Depends(database.get_db)):
+    """
+    Scores all saved reports against price history and stores the summary.
+    With `refresh`, the history of every referenced symbol is updated first.
+    """
+    result = await run_backtest(db, refresh=refresh)
+    if "error" in result:
+        raise HTTPException(status_code=409, detail=result["error"])
     return result
 
+@router.get("/backtest")
+async def get_backtest(run_id: Optional[str] = None, db: AsyncSession = Depends(database.get_db)):
+    """
+    Returns the summary rows of a backtest run, the latest by default.
+    """
+    rows = await crud.get_backtest_summary(db, run_id)
+    if not rows:
+        raise HTTPException(status_code=404, detail="Backtest not found")
+    return {
+        "run_id": rows[0].run_id,
+        "as_of": rows[0].as_of,
+        "summary": [crud.to_dict(row) for row in rows],
+    }
+
+@router.get("/sentiment")
+async def list_sentiment(
+    tickers: Optional[str] = Query(None, description="Comma-separated tickers; all if omitted"),
+    window: Optional[str] = None,
+    db: AsyncSession = Depends(database.get_db)
+):
+    """
+    Returns the precomputed rolling news sentiment per ticker and window
+    (1d/7d/30d): coverage, weighted mean, dispersion and bullish/bearish shares.
+    """
+    rows = await crud.get_sentiment_aggregates(
+        db, [ticker.strip() for ticker in tickers.split(",") if ticker.strip()] if tickers else None, window
+    )
+    return {"items": [crud.to_dict(row) for row in rows]}
+
+@router.get("/sentiment/{ticker}")
+async def get_sentiment(ticker: str, db: AsyncSession = Depends(database.get_db)):
+    """
+    Returns one ticker's rolling news sentiment keyed by window.
+    """
+    rows = await crud.get_sentiment_aggregates(db, [ticker])
+    if not rows:
+        raise HTTPException(status_code=404, detail="No sentiment for this ticker")
+    return sentiment_service.by_window(rows)
+
+@router.post("/jobs", status_code=202)
+async def submit_job(request: HypothesisRequest):
+    """
+    Queues a hypothesis for background analysis and returns its job id immediately.
+    """
+    try:
+        return await job_queue.submit(
+            request.hypothesis,
+            bypass_cache=request.bypass_cache,
+            max_age=request.max_age
+        )
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str, db: AsyncSession = Depends(database.get_db)):
+    """
+    Reports a job's status and the pipeline stages it has completed.
+    """
+    job = await crud.get_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "progress": job.progress,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str, db: AsyncSession = Depends(database.get_db)):
+    """
+    Returns the analysis result of a finished job.
+    """
+    job = await crud.get_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status not in ("succeeded", "failed"):
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return job.result if job.result is not None else {"error": job.error}
+
+app = create_app()
+
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8080)
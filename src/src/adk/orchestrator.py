@@ -1,59 +1,243 @@
+import os
 import asyncio
-from sqlalchemy.orm import Session
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from .agents import hypothesis_agent, context_agent, research_agent, contradiction_agent, synthesis_agent, alert_agent
+from .scheduler import Halt, Scheduler, Stage
 from ..database import crud
+from ..services import llm_cache
+from ..tools.single_flight import request_scope
+from ..utils import metrics
+from ..utils.log import get_logger, trace
 
-async def run_analysis(hypothesis: str, db: Session) -> dict:
+logger = get_logger("orchestrator")
+
+# Reports for the same structured hypothesis younger than this are reused (seconds, 0 disables)
+REPORT_REUSE_MAX_AGE = int(os.getenv("REPORT_REUSE_MAX_AGE", "600"))
+
+# Default and maximum number of analyses a batch runs at once
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+# Per-stage timeouts in seconds, overridable with STAGE_TIMEOUT_<NAME> (0 disables)
+STAGE_TIMEOUT = float(os.getenv("STAGE_TIMEOUT", "120"))
+
+def _stage_timeout(name: str) -> Optional[float]:
+    timeout = float(os.getenv(f"STAGE_TIMEOUT_{name.upper()}", STAGE_TIMEOUT))
+    return timeout if timeout > 0 else None
+
+def _report_to_dict(db_report, db_alerts) -> dict:
+    # Manually convert the SQLAlchemy objects to dictionaries to ensure serialization
+    report_dict = crud.to_dict(db_report)
+    report_dict["alerts"] = [crud.to_dict(alert) for alert in db_alerts]
+    return report_dict
+
+def build_pipeline(hypothesis: str, db: AsyncSession, bypass_cache: bool, max_age: int) -> Scheduler:
     """
-    This is the main orchestrator for the agentic workflow.
+    Describes the analysis as a graph of stages:
+
+        hypothesis -> reuse -> research, contradiction -> synthesis -> alerts -> save
+        hypothesis -> context (off the critical path; save records its sector if it is done by then)
     """
-    print(f"Orchestrator received hypothesis: {hypothesis}")
+    # Filled by the context stage; read, not awaited, by save.
+    context_facts = {}
 
     # 1. Structure the hypothesis
-    structured_hypothesis_obj = await hypothesis_agent.structure_hypothesis(hypothesis)
-    if structured_hypothesis_obj.get("error"):
+    async def structure(_):
+        logger.info("Received hypothesis", extra={"hypothesis": hypothesis})
+        structured_hypothesis_obj = await hypothesis_agent.structure_hypothesis(hypothesis)
+        if structured_hypothesis_obj.get("error"):
+            raise Halt(structured_hypothesis_obj)
+        logger.info("Structured hypothesis", extra={"structured_hypothesis": structured_hypothesis_obj.get("structured_hypothesis", "")})
         return structured_hypothesis_obj
-    
-    structured_hypothesis = structured_hypothesis_obj.get("structured_hypothesis", "")
-    print(f"Structured hypothesis: {structured_hypothesis}")
+
+    # 1.1. Reuse a fresh report for the same hypothesis
+    async def reuse(inputs):
+        if max_age <= 0 or bypass_cache:
+            return None
+        structured_hypothesis = inputs["hypothesis"].get("structured_hypothesis", "")
+        recent_report = await crud.get_recent_report(db, structured_hypothesis, max_age)
+        if recent_report is not None:
+            logger.info("Reusing saved report", extra={"report_id": recent_report.id})
+            report_dict = _report_to_dict(recent_report, await crud.get_alerts(db, recent_report.id))
+            report_dict["reused"] = True
+            raise Halt(report_dict)
+        return None
 
     # 1.5. Get context
-    context = await context_agent.get_context(structured_hypothesis)
-    if context.get("error"):
+    async def context(inputs):
+        context = await context_agent.get_context(inputs["hypothesis"].get("structured_hypothesis", ""))
+        if context.get("error"):
+            logger.warning("Context agent failed", extra={"details": context.get("details")})
+        else:
+            logger.debug("Generated context", extra={"context": context})
+            asset_info = context.get("asset_info")
+            if isinstance(asset_info, dict) and asset_info.get("sector"):
+                context_facts["sector"] = str(asset_info["sector"])
         return context
-    print(f"Generated context: {context}")
 
     # 2. Gather evidence in parallel
-    supporting_evidence_task = research_agent.find_supporting_evidence(structured_hypothesis_obj)
-    contradictory_evidence_task = contradiction_agent.find_contradictory_evidence(structured_hypothesis_obj)
+    async def research(inputs):
+        supporting_evidence = await research_agent.find_supporting_evidence(inputs["hypothesis"])
+        logger.info("Research finished", extra={"items": len(supporting_evidence)})
+        return supporting_evidence
 
-    supporting_evidence, contradictory_evidence = await asyncio.gather(
-        supporting_evidence_task,
-        contradictory_evidence_task
-    )
-    print(f"Found {len(supporting_evidence)} supporting pieces of evidence.")
-    print(f"Found {len(contradictory_evidence)} contradictory pieces of evidence.")
+    async def contradiction(inputs):
+        contradictory_evidence = await contradiction_agent.find_contradictory_evidence(inputs["hypothesis"])
+        logger.info("Contradiction search finished", extra={"items": len(contradictory_evidence)})
+        return contradictory_evidence
 
     # 3. Synthesize the final report
-    final_report = await synthesis_agent.synthesize_evidence(
-        structured_hypothesis_obj,
-        supporting_evidence,
-        contradictory_evidence
-    )
-    print("Final report generated.")
-
-    # 4. Save the report to the database
-    if "error" not in final_report:
+    async def synthesis(inputs):
+        final_report = await synthesis_agent.synthesize_evidence(
+            inputs["hypothesis"],
+            inputs["research"],
+            inputs["contradiction"]
+        )
+        if "error" in final_report:
+            raise Halt(final_report)
+        logger.info("Final report generated")
+        return final_report
+
+    # 4. Generate alerts
+    async def alerts(inputs):
+        return await alert_agent.generate_alerts(inputs["synthesis"])
+
+    # 5. Save the report and its alerts to the database in one transaction
+    async def save(inputs):
         # The hypothesis to save should be the structured one for consistency
-        hypothesis_to_save = structured_hypothesis
-        db_report = crud.save_report(db=db, hypothesis=hypothesis_to_save, report_data=final_report)
-        
-        # 5. Generate and save alerts
-        alerts = await alert_agent.generate_alerts(final_report)
-        crud.save_alerts(db=db, report_id=db_report.id, alerts_data=alerts)
-        
-        # Manually convert the SQLAlchemy object to a dictionary to ensure serialization
-        report_dict = {c.name: getattr(db_report, c.name) for c in db_report.__table__.columns}
-        return report_dict
-
-    return final_report
+        hypothesis_to_save = inputs["hypothesis"].get("structured_hypothesis", "")
+        db_report, db_alerts = await crud.save_report(
+            db=db,
+            hypothesis=hypothesis_to_save,
+            report_data=inputs["synthesis"],
+            alerts_data=inputs["alerts"],
+            sector=context_facts.get("sector")
+        )
+        return _report_to_dict(db_report, db_alerts)
+
+    return Scheduler([
+        Stage("hypothesis", structure, timeout=_stage_timeout("hypothesis")),
+        Stage("reuse", reuse, deps=("hypothesis",), timeout=_stage_timeout("reuse")),
+        Stage("context", context, deps=("hypothesis",), timeout=_stage_timeout("context"), required=False),
+        Stage("research", research, deps=("hypothesis", "reuse"), timeout=_stage_timeout("research")),
+        Stage("contradiction", contradiction, deps=("hypothesis", "reuse"), timeout=_stage_timeout("contradiction")),
+        Stage("synthesis", synthesis, deps=("hypothesis", "research", "contradiction"), timeout=_stage_timeout("synthesis")),
+        Stage("alerts", alerts, deps=("synthesis",), timeout=_stage_timeout("alerts")),
+        Stage("save", save, deps=("hypothesis", "synthesis", "alerts"), timeout=_stage_timeout("save")),
+    ])
+
+async def _execute(hypothesis: str, db: AsyncSession, bypass_cache: bool, max_age: Optional[int], on_stage_complete=None) -> dict:
+    if max_age is None:
+        max_age = REPORT_REUSE_MAX_AGE
+    # Runs in this request's context only; agents spawned below inherit it.
+    llm_cache.bypass.set(bypass_cache)
+    # Both evidence agents fetch the same news and quote; share them per request.
+    # Every stage task inherits the trace id, so all of this run's logs carry it.
+    with trace(), request_scope(), metrics.analyses_in_flight.track():
+        run = await build_pipeline(hypothesis, db, bypass_cache, max_age).run(on_stage_complete)
+        for name, timing in run.timings.items():
+            if timing.duration is not None:
+                metrics.stage_seconds.observe(timing.duration, stage=name, status=timing.status)
+        logger.info("Analysis finished", extra={"halted": run.halted, "timings": run.timing_summary()})
+
+    if run.halted:
+        return run.outcome
+    return run.results["save"]
+
+async def run_analysis(
+    hypothesis: str,
+    db: AsyncSession,
+    bypass_cache: bool = False,
+    max_age: Optional[int] = None,
+    on_stage_complete: Optional[Callable[[str, Any], Awaitable[None]]] = None
+) -> dict:
+    """
+    This is the main orchestrator for the agentic workflow.
+
+    A report saved for the same structured hypothesis within `max_age` seconds
+    is returned as-is, unless `bypass_cache` is set. `on_stage_complete` is
+    awaited with each stage's name and result as it finishes.
+    """
+    return await _execute(hypothesis, db, bypass_cache, max_age, on_stage_complete)
+
+# Stage results worth showing to a client as soon as they exist, by event name.
+STREAMED_STAGES = {
+    "hypothesis": "hypothesis",
+    "context": "context",
+    "research": "supporting_evidence",
+    "contradiction": "contradictions",
+    "synthesis": "report",
+    "alerts": "alerts",
+}
+
+async def stream_analysis(
+    hypothesis: str,
+    db: AsyncSession,
+    bypass_cache: bool = False,
+    max_age: Optional[int] = None
+) -> AsyncIterator[dict]:
+    """
+    Runs the same pipeline as run_analysis, yielding {"event", "data"} dicts as
+    stages finish and a final "result" event with the saved report.
+    """
+    queue = asyncio.Queue()
+    done = object()
+
+    async def publish(stage_name, value):
+        event = STREAMED_STAGES.get(stage_name)
+        if event is not None:
+            await queue.put({"event": event, "data": value})
+
+    async def produce():
+        try:
+            result = await _execute(hypothesis, db, bypass_cache, max_age, on_stage_complete=publish)
+            await queue.put({"event": "error" if "error" in result else "result", "data": result})
+        except Exception as e:
+            await queue.put({"event": "error", "data": {"error": "Analysis failed.", "details": str(e)}})
+        finally:
+            await queue.put(done)
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        # The client went away (or we finished); do not keep spending on the pipeline.
+        if not producer.done():
+            producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
+async def run_batch(
+    hypotheses: List[str],
+    session_factory: Callable[[], AsyncSession],
+    concurrency: Optional[int] = None,
+    bypass_cache: bool = False,
+    max_age: Optional[int] = None
+) -> List[dict]:
+    """
+    Analyzes many hypotheses with bounded concurrency.
+
+    All items share one tool scope, so news and quotes are fetched once per
+    distinct topic and symbol across the batch. Results are returned in input
+    order; a failing item yields an error entry without failing the batch.
+    """
+    limit = max(1, min(concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY))
+    slots = asyncio.Semaphore(limit)
+
+    async def analyze(hypothesis: str) -> dict:
+        async with slots:
+            # Sessions are not safe for concurrent use, so each item gets its own.
+            async with session_factory() as db:
+                try:
+                    result = await run_analysis(hypothesis, db, bypass_cache=bypass_cache, max_age=max_age)
+                except Exception as e:
+                    result = {"error": "Analysis failed.", "details": str(e)}
+        status = "error" if "error" in result else "ok"
+        return {"hypothesis": hypothesis, "status": status, "result": result}
+
+    logger.info("Running batch", extra={"items": len(hypotheses), "concurrency": limit})
+    with request_scope():
+        return await asyncio.gather(*(analyze(hypothesis) for hypothesis in hypotheses))
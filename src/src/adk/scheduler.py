@@ -0,0 +1,138 @@
+import time
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from ..utils.log import get_logger
+
+logger = get_logger("scheduler")
+
+
+class Halt(Exception):
+    """
+    Raised by a stage to end the pipeline early with `result` as its outcome
+    (e.g. an agent error, or a reused report that makes later stages moot).
+    """
+
+    def __init__(self, result: Any):
+        super().__init__("pipeline halted")
+        self.result = result
+
+
+@dataclass
+class Stage:
+    """
+    One node of the pipeline graph.
+
+    `fn` receives a dict holding the results of the stages named in `deps` and
+    is started as soon as all of them have finished. A stage that is not
+    `required` may fail without failing the pipeline; its dependents are skipped.
+    """
+    name: str
+    fn: Callable[[Dict[str, Any]], Awaitable[Any]]
+    deps: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+    required: bool = True
+
+
+@dataclass
+class StageTiming:
+    start: float
+    end: Optional[float] = None
+    status: str = "running"
+
+    @property
+    def duration(self) -> Optional[float]:
+        return None if self.end is None else self.end - self.start
+
+
+@dataclass
+class PipelineRun:
+    results: Dict[str, Any] = field(default_factory=dict)
+    timings: Dict[str, StageTiming] = field(default_factory=dict)
+    halted: bool = False
+    outcome: Any = None
+
+    def timing_summary(self) -> str:
+        return ", ".join(
+            f"{name} {timing.start:.2f}-{timing.end:.2f}s ({timing.status})"
+            for name, timing in self.timings.items()
+            if timing.end is not None
+        )
+
+
+class Scheduler:
+    """
+    Runs a dependency graph of async stages with maximal overlap.
+
+    Each stage is launched the moment its inputs exist. Start/end offsets (in
+    seconds from the start of the run) are recorded for every stage.
+    """
+
+    def __init__(self, stages):
+        self.stages = {stage.name: stage for stage in stages}
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+    async def run(self, on_stage_complete: Callable[[str, Any], Awaitable[None]] = None) -> PipelineRun:
+        run = PipelineRun()
+        origin = time.perf_counter()
+        pending = dict(self.stages)
+        running = {}
+
+        async def execute(stage: Stage):
+            inputs = {dep: run.results[dep] for dep in stage.deps}
+            if stage.timeout is None:
+                return await stage.fn(inputs)
+            return await asyncio.wait_for(stage.fn(inputs), timeout=stage.timeout)
+
+        try:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if all(dep in run.results for dep in stage.deps):
+                        del pending[name]
+                        run.timings[name] = StageTiming(start=time.perf_counter() - origin)
+                        running[asyncio.ensure_future(execute(stage))] = stage
+
+                if not running:
+                    # Remaining stages depend on an optional stage that failed.
+                    for name in pending:
+                        run.timings[name] = StageTiming(start=time.perf_counter() - origin, status="skipped")
+                        run.timings[name].end = run.timings[name].start
+                    break
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    stage = running.pop(task)
+                    timing = run.timings[stage.name]
+                    timing.end = time.perf_counter() - origin
+                    try:
+                        value = task.result()
+                    except Halt as halt:
+                        timing.status = "halted"
+                        run.halted, run.outcome = True, halt.result
+                        return run
+                    except Exception as e:
+                        timed_out = isinstance(e, asyncio.TimeoutError)
+                        timing.status = "timeout" if timed_out else "error"
+                        details = f"timed out after {stage.timeout}s" if timed_out else str(e)
+                        if stage.required:
+                            run.halted = True
+                            run.outcome = {"error": f"Stage '{stage.name}' failed.", "details": details}
+                            return run
+                        logger.warning("Optional stage failed", extra={"stage": stage.name, "details": details})
+                        continue
+
+                    timing.status = "ok"
+                    run.results[stage.name] = value
+                    if on_stage_complete is not None:
+                        await on_stage_complete(stage.name, value)
+            return run
+        finally:
+            for task, stage in running.items():
+                task.cancel()
+                run.timings[stage.name].status = "cancelled"
+                run.timings[stage.name].end = time.perf_counter() - origin
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
@@ -1,45 +1,383 @@
-from sqlalchemy.orm import Session
+import base64
+from sqlalchemy import delete, insert, or_, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import load_only
+from sqlalchemy.ext.asyncio import AsyncSession
 from . import models
-from typing import List
+from typing import List, Optional, Tuple
+import uuid
+from datetime import datetime, timedelta
+from ..utils.text_processor import canonicalize_hypothesis, extract_symbol
+from ..utils import metrics
+from ..utils.log import get_logger
 
-def save_report(db: Session, hypothesis: str, report_data: dict) -> models.Report:
+logger = get_logger("crud")
+
+def to_dict(row, columns=None) -> dict:
+    """
+    Converts a model instance to a plain dictionary of its (selected) columns.
     """
-    Saves a completed analysis report to the database.
+    names = columns or [c.name for c in row.__table__.columns]
+    return {name: getattr(row, name) for name in names}
+
+@metrics.timed(metrics.db_seconds, operation="save_report")
+async def save_report(
+    db: AsyncSession,
+    hypothesis: str,
+    report_data: dict,
+    alerts_data: List[dict] = (),
+    sector: Optional[str] = None
+) -> Tuple[models.Report, List[models.Alert]]:
+    """
+    Saves a completed analysis report and its alerts in a single transaction.
+
+    Alerts are bulk-inserted with RETURNING rather than refreshed one by one.
     """
     db_report = models.Report(
         hypothesis=hypothesis,
+        symbol=extract_symbol(hypothesis) or None,
+        normalized_hypothesis=canonicalize_hypothesis(hypothesis),
         summary=report_data.get("summary"),
         confidence_score=report_data.get("confidence_score"),
         recommendation=report_data.get("recommendation"),
+        sector=sector,
         confirmations=report_data.get("confirmations", []),
         contradictions=report_data.get("contradictions", [])
     )
-    db.add(db_report)
-    db.commit()
-    db.refresh(db_report)
-    print(f"Report saved with ID: {db_report.id}")
-    return db_report
-
-def save_alerts(db: Session, report_id: int, alerts_data: List[dict]) -> List[models.Alert]:
-    """
-    Saves a list of alerts associated with a report.
-    """
-    alerts = []
-    for alert_data in alerts_data:
-        if "error" in alert_data:
-            continue
-        db_alert = models.Alert(
-            report_id=report_id,
-            type=alert_data.get("type"),
-            message=alert_data.get("message"),
-            priority=alert_data.get("priority")
+    try:
+        db.add(db_report)
+        await db.flush()
+        alerts = await _insert_alerts(db, db_report.id, alerts_data)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    logger.info("Report saved", extra={"report_id": db_report.id, "alerts": len(alerts)})
+    return db_report, alerts
+
+async def _insert_alerts(db: AsyncSession, report_id: int, alerts_data: List[dict]) -> List[models.Alert]:
+    rows = [
+        {
+            "report_id": report_id,
+            "type": alert_data.get("type"),
+            "message": alert_data.get("message"),
+            "priority": alert_data.get("priority"),
+            "created_at": datetime.utcnow()
+        }
+        for alert_data in alerts_data
+        if isinstance(alert_data, dict) and "error" not in alert_data
+    ]
+    if not rows:
+        return []
+    result = await db.scalars(insert(models.Alert).returning(models.Alert), rows)
+    return list(result)
+
+@metrics.timed(metrics.db_seconds, operation="get_recent_report")
+async def get_recent_report(db: AsyncSession, hypothesis: str, max_age: int) -> Optional[models.Report]:
+    """
+    Returns the newest report for the same canonical hypothesis created within
+    the last `max_age` seconds, if any.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age)
+    return await db.scalar(
+        select(models.Report)
+        .where(
+            models.Report.normalized_hypothesis == canonicalize_hypothesis(hypothesis),
+            models.Report.created_at >= cutoff,
+        )
+        .order_by(models.Report.created_at.desc())
+        .limit(1)
+    )
+
+@metrics.timed(metrics.db_seconds, operation="get_alerts")
+async def get_alerts(db: AsyncSession, report_id: int) -> List[models.Alert]:
+    """
+    Returns the alerts saved for a report.
+    """
+    result = await db.scalars(
+        select(models.Alert)
+        .where(models.Alert.report_id == report_id)
+        .order_by(models.Alert.created_at, models.Alert.id)
+    )
+    return list(result)
+
+@metrics.timed(metrics.db_seconds, operation="create_job")
+async def create_job(db: AsyncSession, hypothesis: str, bypass_cache: bool = False, max_age: Optional[int] = None) -> models.Job:
+    """
+    Persists a new queued analysis job.
+    """
+    db_job = models.Job(
+        id=uuid.uuid4().hex,
+        hypothesis=hypothesis,
+        bypass_cache=bypass_cache,
+        max_age=max_age,
+        status="queued",
+        progress={"completed_stages": []}
+    )
+    db.add(db_job)
+    await db.commit()
+    return db_job
+
+@metrics.timed(metrics.db_seconds, operation="get_job")
+async def get_job(db: AsyncSession, job_id: str) -> Optional[models.Job]:
+    return await db.get(models.Job, job_id)
+
+@metrics.timed(metrics.db_seconds, operation="update_job")
+async def update_job(db: AsyncSession, job_id: str, **fields) -> Optional[models.Job]:
+    """
+    Updates the given columns of a job.
+    """
+    db_job = await db.get(models.Job, job_id)
+    if db_job is None:
+        return None
+    for name, value in fields.items():
+        setattr(db_job, name, value)
+    await db.commit()
+    return db_job
+
+@metrics.timed(metrics.db_seconds, operation="claim_job")
+async def claim_job(db: AsyncSession, job_id: str, owner: str, lease_expires_at: datetime) -> bool:
+    """
+    Marks a queued job running under `owner`'s lease. The status check and the
+    update are one statement, so of several workers claiming the same job
+    exactly one succeeds. Returns whether this call claimed it.
+    """
+    result = await db.execute(
+        update(models.Job)
+        .where(models.Job.id == job_id, models.Job.status == "queued")
+        .values(status="running", owner=owner, lease_expires_at=lease_expires_at, started_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+@metrics.timed(metrics.db_seconds, operation="renew_job_lease")
+async def renew_job_lease(db: AsyncSession, job_id: str, owner: str, lease_expires_at: datetime) -> bool:
+    """
+    Extends `owner`'s lease on a running job. Returns False if the job is no
+    longer running under that owner.
+    """
+    result = await db.execute(
+        update(models.Job)
+        .where(models.Job.id == job_id, models.Job.status == "running", models.Job.owner == owner)
+        .values(lease_expires_at=lease_expires_at)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+@metrics.timed(metrics.db_seconds, operation="requeue_stale_jobs")
+async def requeue_stale_jobs(db: AsyncSession, now: datetime) -> int:
+    """
+    Puts running jobs whose lease lapsed before `now` (their process stopped)
+    back in the queued state. Returns how many were re-queued.
+    """
+    result = await db.execute(
+        update(models.Job)
+        .where(
+            models.Job.status == "running",
+            or_(models.Job.lease_expires_at.is_(None), models.Job.lease_expires_at < now),
+        )
+        .values(status="queued", owner=None, lease_expires_at=None, started_at=None, progress={"completed_stages": []})
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
+
+@metrics.timed(metrics.db_seconds, operation="get_queued_job_ids")
+async def get_queued_job_ids(db: AsyncSession, limit: int) -> List[str]:
+    """
+    Returns the ids of up to `limit` queued jobs, oldest first.
+    """
+    result = await db.scalars(
+        select(models.Job.id)
+        .where(models.Job.status == "queued")
+        .order_by(models.Job.created_at)
+        .limit(limit)
+    )
+    return list(result)
+
+# Columns returned by report listings; the large JSON evidence columns are left out.
+REPORT_LIST_COLUMNS = ("id", "hypothesis", "symbol", "summary", "confidence_score", "recommendation", "sector", "created_at")
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{row_id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Raises:
+        ValueError: if the cursor is malformed.
+    """
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+async def _keyset_page(db: AsyncSession, query, model, limit: int, cursor: Optional[str]):
+    # Newest first; the (created_at, id) pair of the last row is the next cursor.
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+    query = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+    rows = list(await db.scalars(query))
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+@metrics.timed(metrics.db_seconds, operation="list_reports")
+async def list_reports(
+    db: AsyncSession,
+    symbol: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None
+) -> Tuple[List[models.Report], Optional[str]]:
+    """
+    Returns a page of reports, newest first, and the cursor for the next page.
+    """
+    query = select(models.Report).options(
+        load_only(*(getattr(models.Report, name) for name in REPORT_LIST_COLUMNS))
+    )
+    if symbol:
+        query = query.where(models.Report.symbol == symbol.upper())
+    if start:
+        query = query.where(models.Report.created_at >= start)
+    if end:
+        query = query.where(models.Report.created_at < end)
+    return await _keyset_page(db, query, models.Report, limit, cursor)
+
+@metrics.timed(metrics.db_seconds, operation="get_report")
+async def get_report(db: AsyncSession, report_id: int) -> Optional[models.Report]:
+    return await db.get(models.Report, report_id)
+
+@metrics.timed(metrics.db_seconds, operation="list_alerts")
+async def list_alerts(
+    db: AsyncSession,
+    report_id: Optional[int] = None,
+    priority: Optional[str] = None,
+    alert_type: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None
+) -> Tuple[List[models.Alert], Optional[str]]:
+    """
+    Returns a page of alerts, newest first, and the cursor for the next page.
+    """
+    query = select(models.Alert)
+    if report_id is not None:
+        query = query.where(models.Alert.report_id == report_id)
+    if priority:
+        query = query.where(models.Alert.priority == priority)
+    if alert_type:
+        query = query.where(models.Alert.type == alert_type)
+    return await _keyset_page(db, query, models.Alert, limit, cursor)
+
+# Columns the backtest reads from every report
+BACKTEST_COLUMNS = ("id", "hypothesis", "symbol", "confidence_score", "recommendation", "sector", "created_at")
+
+@metrics.timed(metrics.db_seconds, operation="load_report_columns")
+async def load_report_columns(db: AsyncSession, batch_size: int = 50000) -> dict:
+    """
+    Returns the BACKTEST_COLUMNS of all reports as parallel lists, streamed in
+    batches as plain rows rather than ORM instances.
+    """
+    columns = {name: [] for name in BACKTEST_COLUMNS}
+    query = select(*(getattr(models.Report, name) for name in BACKTEST_COLUMNS)).execution_options(yield_per=batch_size)
+    result = await db.stream(query)
+    async for batch in result.partitions():
+        for name, values in zip(BACKTEST_COLUMNS, zip(*batch)):
+            columns[name].extend(values)
+    return columns
+
+@metrics.timed(metrics.db_seconds, operation="save_backtest_summary")
+async def save_backtest_summary(db: AsyncSession, run_id: str, rows: List[dict], as_of: datetime) -> int:
+    """Bulk-inserts the summary rows of one backtest run."""
+    created_at = datetime.utcnow()
+    if rows:
+        await db.execute(
+            insert(models.BacktestSummary),
+            [dict(row, run_id=run_id, as_of=as_of, created_at=created_at) for row in rows]
+        )
+    await db.commit()
+    return len(rows)
+
+@metrics.timed(metrics.db_seconds, operation="get_backtest_summary")
+async def get_backtest_summary(db: AsyncSession, run_id: Optional[str] = None) -> List[models.BacktestSummary]:
+    """
+    Returns the summary rows of a backtest run (the latest if `run_id` is not
+    given), in the order they were computed.
+    """
+    if run_id is None:
+        run_id = await db.scalar(
+            select(models.BacktestSummary.run_id)
+            .order_by(models.BacktestSummary.created_at.desc(), models.BacktestSummary.id.desc())
+            .limit(1)
         )
-        db.add(db_alert)
-        alerts.append(db_alert)
-    
-    db.commit()
-    for alert in alerts:
-        db.refresh(alert)
-    
-    print(f"Saved {len(alerts)} alerts for report ID: {report_id}")
-    return alerts
+        if run_id is None:
+            return []
+    result = await db.scalars(
+        select(models.BacktestSummary)
+        .where(models.BacktestSummary.run_id == run_id)
+        .order_by(models.BacktestSummary.id)
+    )
+    return list(result)
+
+def _insert_ignoring_conflicts(db: AsyncSession, model):
+    # INSERT ... ON CONFLICT DO NOTHING for the backends in use
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    return dialect.insert(model).on_conflict_do_nothing()
+
+@metrics.timed(metrics.db_seconds, operation="save_sentiment_observations")
+async def save_sentiment_observations(db: AsyncSession, observations: List[dict]) -> None:
+    """
+    Inserts (ticker, url, published, score, relevance) observations, skipping
+    those already stored for the same ticker and URL.
+    """
+    if observations:
+        await db.execute(_insert_ignoring_conflicts(db, models.SentimentObservation), observations)
+    await db.commit()
+
+@metrics.timed(metrics.db_seconds, operation="load_sentiment_observations")
+async def load_sentiment_observations(db: AsyncSession, since: datetime, tickers: Optional[List[str]] = None) -> dict:
+    """
+    Returns the ticker, published, score and relevance of the observations
+    published since `since` (for `tickers`, or all) as parallel lists.
+    """
+    names = ("ticker", "published", "score", "relevance")
+    query = select(*(getattr(models.SentimentObservation, name) for name in names)).where(
+        models.SentimentObservation.published >= since
+    )
+    if tickers is not None:
+        query = query.where(models.SentimentObservation.ticker.in_(tickers))
+    rows = (await db.execute(query)).all()
+    return {name: list(values) for name, values in zip(names, zip(*rows))} if rows else {name: [] for name in names}
+
+@metrics.timed(metrics.db_seconds, operation="replace_sentiment_aggregates")
+async def replace_sentiment_aggregates(db: AsyncSession, tickers: Optional[List[str]], rows: List[dict]) -> None:
+    """Replaces the aggregates of `tickers` (all if None) with `rows` in one transaction."""
+    query = delete(models.SentimentAggregate)
+    if tickers is not None:
+        query = query.where(models.SentimentAggregate.ticker.in_(tickers))
+    await db.execute(query)
+    if rows:
+        await db.execute(insert(models.SentimentAggregate), rows)
+    await db.commit()
+
+# Per-window fields of an aggregate, without its ticker and bookkeeping columns
+SENTIMENT_COLUMNS = ("articles", "mean", "dispersion", "bullish", "bearish", "last_published")
+
+@metrics.timed(metrics.db_seconds, operation="get_sentiment_aggregates")
+async def get_sentiment_aggregates(
+    db: AsyncSession,
+    tickers: Optional[List[str]] = None,
+    window: Optional[str] = None
+) -> List[models.SentimentAggregate]:
+    query = select(models.SentimentAggregate).order_by(models.SentimentAggregate.ticker, models.SentimentAggregate.id)
+    if tickers:
+        query = query.where(models.SentimentAggregate.ticker.in_([ticker.upper() for ticker in tickers]))
+    if window:
+        query = query.where(models.SentimentAggregate.window == window)
+    return list(await db.scalars(query))
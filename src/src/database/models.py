@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Index, Boolean, ForeignKey, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -9,19 +9,126 @@ class Report(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     hypothesis = Column(String, index=True)
+    # Ticker parsed from the structured hypothesis, e.g. "AAPL"
+    symbol = Column(String)
+    # Canonical form of the structured hypothesis, used to reuse recent reports
+    normalized_hypothesis = Column(String)
     summary = Column(String)
     confidence_score = Column(Float)
     recommendation = Column(String)
+    # Sector from the context agent, when it finished before the report was saved
+    sector = Column(String)
     confirmations = Column(JSON)
     contradictions = Column(JSON)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_reports_normalized_hypothesis_created_at", "normalized_hypothesis", "created_at"),
+        # Keyset pagination: newest first, overall and per symbol
+        Index("ix_reports_created_at_id", "created_at", "id"),
+        Index("ix_reports_symbol_created_at_id", "symbol", "created_at", "id"),
+    )
+
+class BacktestSummary(Base):
+    """One row per (run, dimension, group) of a backtest over saved reports."""
+    __tablename__ = "backtest_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String, nullable=False)
+    # "all", "recommendation" or "sector"
+    dimension = Column(String, nullable=False)
+    group = Column(String, nullable=False)
+    reports = Column(Integer)
+    resolved = Column(Integer)
+    pending = Column(Integer)
+    hits = Column(Integer)
+    hit_rate = Column(Float)
+    mean_confidence = Column(Float)
+    brier_score = Column(Float)
+    # 1 - Brier / Brier of always predicting the group's hit rate
+    brier_skill = Column(Float)
+    # [{"bin": "0.6-0.7", "count", "mean_confidence", "hit_rate"}, ...]
+    calibration = Column(JSON)
+    as_of = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_backtest_summaries_run_id_dimension", "run_id", "dimension"),
+        Index("ix_backtest_summaries_created_at", "created_at"),
+    )
+
+class SentimentObservation(Base):
+    """A news article's sentiment toward one ticker (Alpha Vantage ticker_sentiment)."""
+    __tablename__ = "sentiment_observations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    ticker = Column(String, nullable=False)
+    url = Column(String, nullable=False)
+    published = Column(DateTime, nullable=False)
+    score = Column(Float, nullable=False)
+    # How relevant the article is to the ticker (0-1), used as the weight
+    relevance = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("ticker", "url", name="uq_sentiment_observations_ticker_url"),
+        Index("ix_sentiment_observations_ticker_published", "ticker", "published"),
+    )
+
+class SentimentAggregate(Base):
+    """Rolling sentiment of one ticker over one window, recomputed as articles arrive."""
+    __tablename__ = "sentiment_aggregates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    ticker = Column(String, nullable=False)
+    # "1d", "7d" or "30d"
+    window = Column(String, nullable=False)
+    articles = Column(Integer)
+    # Relevance-weighted mean and standard deviation of the sentiment scores
+    mean = Column(Float)
+    dispersion = Column(Float)
+    # Share of articles scored Somewhat-Bullish or better / Somewhat-Bearish or worse
+    bullish = Column(Float)
+    bearish = Column(Float)
+    last_published = Column(DateTime)
+    as_of = Column(DateTime)
+
+    __table_args__ = (
+        UniqueConstraint("ticker", "window", name="uq_sentiment_aggregates_ticker_window"),
+    )
+
 class Alert(Base):
     __tablename__ = "alerts"
 
     id = Column(Integer, primary_key=True, index=True)
-    report_id = Column(Integer, index=True)
+    report_id = Column(Integer, ForeignKey("reports.id", ondelete="CASCADE"), nullable=False)
     type = Column(String)
     message = Column(String)
     priority = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_alerts_report_id_created_at_id", "report_id", "created_at", "id"),
+        Index("ix_alerts_priority_created_at_id", "priority", "created_at", "id"),
+        Index("ix_alerts_type_created_at_id", "type", "created_at", "id"),
+    )
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True)
+    hypothesis = Column(String)
+    bypass_cache = Column(Boolean, default=False)
+    max_age = Column(Integer, nullable=True)
+    # queued | running | succeeded | failed
+    status = Column(String, index=True, default="queued")
+    # {"completed_stages": [...]} updated as pipeline stages finish
+    progress = Column(JSON)
+    result = Column(JSON)
+    error = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    # Process running the job, and when its claim lapses unless renewed
+    owner = Column(String)
+    lease_expires_at = Column(DateTime)
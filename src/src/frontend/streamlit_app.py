@@ -3,7 +3,7 @@ import requests
 import json
 
 # Backend API URL
-API_URL = "http://localhost:8080/process"
+API_URL = "http://localhost:8080/process/stream"
 
 st.set_page_config(page_title="MarketAI", layout="wide")
 
@@ -16,57 +16,100 @@ hypothesis_input = st.text_input(
     "e.g., Apple will reach $250 by the end of 2025"
 )
 
-if st.button("Analyze Hypothesis"):
-    if hypothesis_input:
-        with st.spinner("The AI agents are analyzing your hypothesis... This may take a moment."):
-            try:
-                payload = {"hypothesis": hypothesis_input}
-                response = requests.post(API_URL, json=payload, timeout=300)
+def render_evidence(container, title, items):
+    with container:
+        st.write(title)
+        for item in items:
+            if not isinstance(item, dict):
+                st.markdown(str(item))
+                continue
+            with st.expander(f"**{item.get('quote')}**"):
+                st.markdown(f"**Reason:** {item.get('reason')}")
+                st.markdown(f"**Source:** {item.get('source')}")
+                st.markdown(f"**Strength:** {item.get('strength')}")
 
-                if response.status_code == 200:
-                    st.success("Analysis complete!")
-                    result = response.json()
+def render_report(container, result):
+    with container:
+        st.subheader("Analysis Report")
+        st.metric("Confidence Score", f"{(result.get('confidence_score') or 0.0) * 100:.1f}%", help="A score from 0.15 to 0.85 representing the AI's confidence.")
 
-                    # Display the results
-                    st.subheader("Analysis Report")
-                    st.metric("Confidence Score", f"{result.get('confidence_score', 0.0) * 100:.1f}%", help="A score from 0.15 to 0.85 representing the AI's confidence.")
-                    
-                    st.write("**Recommendation:**")
-                    st.info(result.get("recommendation", "No recommendation provided."))
+        st.write("**Recommendation:**")
+        st.info(result.get("recommendation", "No recommendation provided."))
 
-                    st.write("**Executive Summary:**")
-                    st.write(result.get("summary", "No summary provided."))
+        st.write("**Executive Summary:**")
+        st.write(result.get("summary", "No summary provided."))
 
-                    # Display Confirmations and Contradictions
-                    st.subheader("Evidence Breakdown")
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.write("✅ **Confirmations (Supporting Evidence)**")
-                        for item in result.get("confirmations", []):
-                            with st.expander(f"**{item.get('quote')}**"):
-                                st.markdown(f"**Reason:** {item.get('reason')}")
-                                st.markdown(f"**Source:** {item.get('source')}")
-                                st.markdown(f"**Strength:** {item.get('strength')}")
+        # Display Confirmations and Contradictions
+        st.subheader("Evidence Breakdown")
+        col1, col2 = st.columns(2)
+    render_evidence(col1, "✅ **Confirmations (Supporting Evidence)**", result.get("confirmations", []))
+    render_evidence(col2, "❌ **Contradictions (Risks & Headwinds)**", result.get("contradictions", []))
 
-                    with col2:
-                        st.write("❌ **Contradictions (Risks & Headwinds)**")
-                        for item in result.get("contradictions", []):
-                            with st.expander(f"**{item.get('quote')}**"):
-                                st.markdown(f"**Reason:** {item.get('reason')}")
-                                st.markdown(f"**Source:** {item.get('source')}")
-                                st.markdown(f"**Strength:** {item.get('strength')}")
+def render_alerts(container, alerts):
+    with container:
+        st.subheader("Alerts")
+        for alert in alerts:
+            if "error" in alert:
+                continue
+            st.markdown(f"- **[{alert.get('priority', '')}] {alert.get('type', '')}**: {alert.get('message', '')}")
 
-                    # Since the API returns the report, not the alerts, we can't display them here yet.
-                    # This would require a new API endpoint to fetch alerts for a given report ID.
-                    # For now, we will just show the main report.
-                    
-                    st.write("**Raw Report Data:**")
-                    st.json(result)
+if st.button("Analyze Hypothesis"):
+    if hypothesis_input:
+        status = st.status("The AI agents are analyzing your hypothesis...", expanded=True)
+        hypothesis_slot = st.empty()
+        evidence_slot = st.container()
+        report_slot = st.container()
+        alerts_slot = st.container()
+        raw_slot = st.container()
 
-                else:
+        try:
+            payload = {"hypothesis": hypothesis_input}
+            # Results arrive as one JSON line per finished stage.
+            with requests.post(API_URL, json=payload, stream=True, timeout=(10, 300)) as response:
+                if response.status_code != 200:
+                    status.update(label="Analysis failed", state="error")
                     st.error(f"Error from API: {response.status_code} - {response.text}")
+                else:
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        message = json.loads(line)
+                        event, data = message.get("event"), message.get("data")
+
+                        if event == "hypothesis":
+                            status.write("Hypothesis structured.")
+                            hypothesis_slot.markdown(f"**Structured hypothesis:** {data.get('structured_hypothesis', '')}")
+                        elif event == "context":
+                            status.write("Market context extracted.")
+                        elif event == "supporting_evidence":
+                            status.write("Supporting evidence gathered.")
+                            with evidence_slot.expander("Research findings"):
+                                for finding in data:
+                                    st.markdown(str(finding))
+                        elif event == "contradictions":
+                            status.write("Contradictions gathered.")
+                            render_evidence(evidence_slot.expander("Raw contradictions"), "", data)
+                        elif event == "report":
+                            status.write("Report synthesized.")
+                            render_report(report_slot, data)
+                        elif event == "alerts":
+                            status.write("Alerts generated.")
+                            render_alerts(alerts_slot, data)
+                        elif event == "result":
+                            status.update(label="Analysis complete!", state="complete", expanded=False)
+                            if data.get("reused"):
+                                # A recent saved report was returned, so no stage events preceded it.
+                                render_report(report_slot, data)
+                                render_alerts(alerts_slot, data.get("alerts", []))
+                            with raw_slot:
+                                st.write("**Raw Report Data:**")
+                                st.json(data)
+                        elif event == "error":
+                            status.update(label="Analysis failed", state="error")
+                            st.error(f"Analysis failed: {data.get('error')} {data.get('details', '')}")
 
-            except requests.exceptions.RequestException as e:
-                st.error(f"Failed to connect to the backend API: {e}")
+        except requests.exceptions.RequestException as e:
+            status.update(label="Analysis failed", state="error")
+            st.error(f"Failed to connect to the backend API: {e}")
     else:
         st.warning("Please enter a hypothesis to analyze.")
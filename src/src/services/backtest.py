@@ -0,0 +1,254 @@
+from datetime import date
+from typing import Dict, Mapping
+
+import numpy as np
+
+from ..utils import quant
+from ..utils.text_processor import extract_symbol
+
+# Outcome codes per report
+UNRESOLVABLE, PENDING, HIT, MISS = 0, 1, 2, 3
+CALIBRATION_BINS = 10
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+def factorize(values) -> tuple:
+    """
+    Integer codes for `values` in order of first appearance, and the distinct
+    values. Missing values (None or "") get code -1.
+    """
+    lookup = {}
+    codes = np.fromiter(
+        (lookup.setdefault(value, len(lookup)) if value is not None and value != "" else -1 for value in values),
+        dtype=np.int64,
+        count=len(values),
+    )
+    uniques = np.empty(len(lookup), dtype=object)
+    uniques[:] = list(lookup)
+    return codes, uniques
+
+
+def parse_hypotheses(hypotheses, symbols=None) -> Dict[str, np.ndarray]:
+    """
+    Parses symbol, target price, deadline and direction from hypotheses.
+
+    Each distinct hypothesis is parsed once and the results are broadcast back,
+    so repeated hypotheses cost one array gather each.
+
+    Returns:
+        Arrays aligned with `hypotheses`: "symbol" (object, None if unknown),
+        "target" (nan if none), "deadline" (days since the epoch, -1 if none) and
+        "down" (1 downside, 0 upside, -1 to infer from the entry price).
+    """
+    codes, uniques = factorize(hypotheses)
+    parsed_symbol = np.empty(len(uniques) + 1, dtype=object)
+    parsed_target = np.full(len(uniques) + 1, np.nan)
+    parsed_deadline = np.full(len(uniques) + 1, -1, dtype=np.int64)
+    parsed_down = np.full(len(uniques) + 1, -1, dtype=np.int8)
+    for index, text in enumerate(uniques):
+        text = str(text)
+        parsed_symbol[index] = extract_symbol(text) or None
+        target = quant.parse_target(text)
+        if target:
+            parsed_target[index] = target
+        deadline = quant.parse_deadline(text)
+        if deadline is not None:
+            parsed_deadline[index] = deadline.toordinal() - _EPOCH
+        direction = quant.parse_direction(text)
+        if direction is not None:
+            parsed_down[index] = direction
+
+    # Missing hypotheses (code -1) gather the trailing empty slot
+    result = {
+        "symbol": parsed_symbol[codes],
+        "target": parsed_target[codes],
+        "deadline": parsed_deadline[codes],
+        "down": parsed_down[codes],
+    }
+    if symbols is not None:
+        # A stored symbol column wins over the parsed one
+        stored = np.asarray(symbols, dtype=object)
+        result["symbol"] = np.where(stored != None, stored, result["symbol"])  # noqa: E711
+    return result
+
+
+def _sparse_table(values: np.ndarray, levels: int, op) -> list:
+    # table[k][i] = op over values[i:i + 2**k]
+    table = [values]
+    for level in range(1, levels):
+        previous, step = table[-1], 1 << (level - 1)
+        table.append(op(previous[:-step], previous[step:]))
+    return table
+
+
+def _range_query(table: list, start: np.ndarray, end: np.ndarray, op) -> np.ndarray:
+    # op over values[start:end] for every pair (end > start), in O(1) each
+    level = np.log2(end - start).astype(np.int64)
+    result = np.empty(len(start))
+    for k in np.unique(level):
+        rows = level == k
+        result[rows] = op(table[k][start[rows]], table[k][end[rows] - (1 << int(k))])
+    return result
+
+
+def evaluate(
+    symbols: np.ndarray,
+    created: np.ndarray,
+    target: np.ndarray,
+    deadline: np.ndarray,
+    down: np.ndarray,
+    histories: Mapping[str, dict],
+    as_of: int,
+) -> Dict[str, np.ndarray]:
+    """
+    Scores reports against daily price history.
+
+    A report is a HIT if the price touched its target (high at or above it for
+    upside calls, low at or below for downside ones) on any bar after it was
+    created and up to its deadline, a MISS if the history covers the deadline
+    without a touch, PENDING while the deadline is still ahead, and
+    UNRESOLVABLE without symbol, target, deadline or history. Reports are
+    grouped per symbol and each group is scored with array operations:
+    searchsorted for the window bounds and sparse tables for range max/min.
+
+    Args:
+        symbols: Ticker per report (object array, None if unknown).
+        created: Creation day per report (days since the epoch).
+        target, deadline, down: As returned by parse_hypotheses.
+        histories: {symbol: {"date", "high", "low", "close"}} arrays, oldest first.
+        as_of: Last day to take into account (days since the epoch).
+
+    Returns:
+        Arrays per report: "status", "entry" (close on or before creation),
+        "down" (resolved direction) and "extreme" (best high/low reached).
+    """
+    count = len(target)
+    status = np.full(count, UNRESOLVABLE, dtype=np.int8)
+    entry = np.full(count, np.nan)
+    extreme = np.full(count, np.nan)
+    resolved_down = down.copy()
+
+    codes, uniques = factorize(symbols)
+    usable = (codes >= 0) & (target > 0) & (deadline >= 0) & (deadline >= created)
+    order = np.argsort(codes, kind="stable")
+    order = order[usable[order]]
+    sorted_codes = codes[order]
+    boundaries = np.flatnonzero(np.diff(sorted_codes)) + 1
+
+    for rows in np.split(order, boundaries):
+        if not len(rows):
+            continue
+        history = histories.get(uniques[codes[rows[0]]])
+        if history is None or len(history["date"]) == 0:
+            continue
+        days = np.asarray(history["date"], dtype=np.int64)
+        high, low, close = (np.asarray(history[column], dtype=np.float64) for column in ("high", "low", "close"))
+
+        first = np.searchsorted(days, created[rows], side="right")
+        last_day = min(int(days[-1]), as_of)
+        end = np.searchsorted(days, np.minimum(deadline[rows], last_day), side="right")
+        has_entry = first > 0
+        rows, first, end = rows[has_entry], first[has_entry], end[has_entry]
+        if not len(rows):
+            continue
+        entry[rows] = close[first - 1]
+
+        direction = resolved_down[rows]
+        inferred = direction < 0
+        direction[inferred] = target[rows][inferred] < entry[rows][inferred]
+        resolved_down[rows] = direction
+
+        window = end > first
+        best = np.full(len(rows), np.nan)
+        if window.any():
+            levels = int(np.log2((end - first)[window].max())) + 1
+            is_down = direction[window] == 1
+            lows = _range_query(_sparse_table(low, levels, np.minimum), first[window], end[window], np.minimum)
+            highs = _range_query(_sparse_table(high, levels, np.maximum), first[window], end[window], np.maximum)
+            best[window] = np.where(is_down, lows, highs)
+        extreme[rows] = best
+
+        hit = np.where(direction == 1, best <= target[rows], best >= target[rows]) & window
+        expired = deadline[rows] <= last_day
+        status[rows] = np.where(hit, HIT, np.where(expired, MISS, PENDING))
+
+    return {"status": status, "entry": entry, "down": resolved_down, "extreme": extreme}
+
+
+def _calibration(bins: np.ndarray, confidence: np.ndarray, outcome: np.ndarray, count: int) -> tuple:
+    totals = np.bincount(bins, minlength=count)
+    confidence_sums = np.bincount(bins, weights=confidence, minlength=count)
+    hit_sums = np.bincount(bins, weights=outcome, minlength=count)
+    return totals, confidence_sums, hit_sums
+
+
+def summarize(status: np.ndarray, confidence: np.ndarray, groups: Mapping[str, np.ndarray] = None, bins: int = CALIBRATION_BINS) -> list:
+    """
+    Hit rate, Brier score and calibration curve of `confidence`, overall and
+    per group of each dimension in `groups` (e.g. {"sector": labels}).
+
+    Only HIT and MISS reports with a confidence score count as resolved. All
+    per-group sums are single bincount passes.
+    """
+    confidence = np.asarray(confidence, dtype=np.float64)
+    resolved = ((status == HIT) | (status == MISS)) & np.isfinite(confidence)
+    outcome = (status == HIT).astype(np.float64)
+    probability = np.clip(np.nan_to_num(confidence), 0.0, 1.0)
+    squared_error = (probability - outcome) ** 2
+    bin_index = np.minimum((probability * bins).astype(np.int64), bins - 1)
+
+    dimensions = {"all": np.zeros(len(status), dtype=np.int64)}
+    labels = {"all": np.array(["all"], dtype=object)}
+    for name, values in (groups or {}).items():
+        values = np.asarray(values, dtype=object)
+        values = np.where((values == None) | (values == ""), "unknown", values)  # noqa: E711
+        codes, uniques = factorize(values)
+        # Sorted labels keep the summary's row order independent of the report order
+        order = np.argsort(uniques.astype(str), kind="stable")
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        dimensions[name], labels[name] = rank[codes], uniques[order]
+
+    rows = []
+    for name, codes in dimensions.items():
+        size = len(labels[name])
+        reports = np.bincount(codes, minlength=size)
+        pending = np.bincount(codes, weights=status == PENDING, minlength=size)
+        res_codes = codes[resolved]
+        resolved_counts = np.bincount(res_codes, minlength=size)
+        hits = np.bincount(res_codes, weights=outcome[resolved], minlength=size)
+        confidence_sums = np.bincount(res_codes, weights=probability[resolved], minlength=size)
+        error_sums = np.bincount(res_codes, weights=squared_error[resolved], minlength=size)
+        totals, bin_confidence, bin_hits = _calibration(
+            res_codes * bins + bin_index[resolved], probability[resolved], outcome[resolved], size * bins
+        )
+
+        for code, label in enumerate(labels[name]):
+            n = int(resolved_counts[code])
+            hit_rate = hits[code] / n if n else None
+            brier = error_sums[code] / n if n else None
+            reference = hit_rate * (1 - hit_rate) if n else None
+            calibration = []
+            for b in range(bins):
+                total = int(totals[code * bins + b])
+                if total:
+                    calibration.append({
+                        "bin": f"{b / bins:.1f}-{(b + 1) / bins:.1f}",
+                        "count": total,
+                        "mean_confidence": round(float(bin_confidence[code * bins + b] / total), 4),
+                        "hit_rate": round(float(bin_hits[code * bins + b] / total), 4),
+                    })
+            rows.append({
+                "dimension": name,
+                "group": str(label),
+                "reports": int(reports[code]),
+                "resolved": n,
+                "pending": int(pending[code]),
+                "hits": int(hits[code]),
+                "hit_rate": round(float(hit_rate), 4) if n else None,
+                "mean_confidence": round(float(confidence_sums[code] / n), 4) if n else None,
+                "brier_score": round(float(brier), 4) if n else None,
+                "brier_skill": round(float(1 - brier / reference), 4) if n and reference else None,
+                "calibration": calibration,
+            })
+    return rows
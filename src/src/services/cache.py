@@ -0,0 +1,157 @@
+import time
+import random
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+from ..utils.log import get_logger
+
+logger = get_logger("cache")
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "stale_until", "negative")
+
+    def __init__(self, value, expires_at, stale_until, negative):
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.negative = negative
+
+
+class TTLCache:
+    """
+    A bounded LRU cache with jittered per-entry TTLs.
+
+    Entries past their TTL but inside the stale window are still served while a
+    single background refresh runs. Negative results (e.g. a symbol that every
+    provider rejected) are cached for a shorter time and never served stale.
+    Failures the loader raises (e.g. a provider outage) are not cached at all.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 300,
+        jitter: float = 0.1,
+        stale_ttl: float = 600,
+        negative_ttl: float = 60,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.jitter = jitter
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = {}
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "refreshes": 0,
+        }
+
+    def _jittered(self, ttl: float) -> float:
+        # Spread expiries so entries written together do not all expire together.
+        return ttl * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def _new_entry(self, value: Any, negative: bool, now: float) -> _Entry:
+        if negative:
+            expires_at = now + self._jittered(self.negative_ttl)
+            stale_until = expires_at
+        else:
+            expires_at = now + self._jittered(self.ttl)
+            stale_until = expires_at + self.stale_ttl
+        return _Entry(value, expires_at, stale_until, negative)
+
+    def set(self, key: Hashable, value: Any, negative: bool = False):
+        """Stores a value, evicting the least recently used entries past the size bound."""
+        self.set_many({key: value}, negative=negative)
+
+    def set_many(self, items: dict, negative: bool = False):
+        """Stores several values under one lock acquisition."""
+        now = time.monotonic()
+        entries = {key: self._new_entry(value, negative, now) for key, value in items.items()}
+        with self._lock:
+            for key, entry in entries.items():
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def lookup(self, key: Hashable):
+        """
+        Returns (state, value) where state is "fresh", "stale" or "miss".
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return "miss", None
+            if now >= entry.stale_until:
+                del self._entries[key]
+                self._stats["misses"] += 1
+                return "miss", None
+            self._entries.move_to_end(key)
+            if now < entry.expires_at:
+                self._stats["negative_hits" if entry.negative else "hits"] += 1
+                return "fresh", entry.value
+            self._stats["stale_hits"] += 1
+            return "stale", entry.value
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        is_negative: Callable[[Any], bool] = lambda value: False,
+    ):
+        """
+        Returns the cached value for key, loading it on a miss and refreshing it
+        in the background when stale.
+
+        A loader that raises leaves the cache as it was: on a miss the error
+        propagates and the next call loads again; a failed refresh keeps the
+        stale value until its stale window ends.
+        """
+        state, value = self.lookup(key)
+        if state == "fresh":
+            return value
+        if state == "stale":
+            if key not in self._refreshing:
+                task = asyncio.ensure_future(self._refresh(key, loader, is_negative))
+                self._refreshing[key] = task
+                task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+            return value
+
+        value = await loader()
+        self.set(key, value, negative=is_negative(value))
+        return value
+
+    async def _refresh(self, key, loader, is_negative):
+        self._stats["refreshes"] += 1
+        try:
+            value = await loader()
+        except Exception as e:
+            logger.warning("Background refresh failed for %s: %s", key, e)
+            return
+        # Keep serving the stale value rather than replacing good data with a failure.
+        if not is_negative(value):
+            self.set(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Returns a snapshot of the hit/miss/eviction counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["negative_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        return stats
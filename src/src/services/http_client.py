@@ -0,0 +1,103 @@
+import os
+import asyncio
+import threading
+import weakref
+from urllib.parse import urlsplit
+
+import httpx
+from ..utils.env import load_env
+
+load_env()
+
+# Pool settings shared by every outbound call made by the services.
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "10"))
+
+
+class _LoopState:
+    """The pooled client and per-host limits owned by one event loop."""
+
+    def __init__(self):
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            follow_redirects=True,
+        )
+        self.host_limits = {}
+
+    def host_limit(self, host: str) -> asyncio.Semaphore:
+        semaphore = self.host_limits.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(HTTP_MAX_PER_HOST)
+            self.host_limits[host] = semaphore
+        return semaphore
+
+
+# httpx clients and asyncio semaphores are bound to the loop that created them,
+# so uvicorn's loop and the sync portal loop each get their own pool.
+_states = weakref.WeakKeyDictionary()
+
+
+def _state() -> _LoopState:
+    loop = asyncio.get_running_loop()
+    state = _states.get(loop)
+    if state is None or state.client.is_closed:
+        state = _LoopState()
+        _states[loop] = state
+    return state
+
+
+def get_client() -> httpx.AsyncClient:
+    """Returns the shared keep-alive client for the running event loop."""
+    return _state().client
+
+
+async def get(url: str, params: dict = None, headers: dict = None, timeout: float = None) -> httpx.Response:
+    """
+    Performs a GET through the shared pool, honouring the per-host connection limit.
+    """
+    state = _state()
+    kwargs = {"params": params, "headers": headers}
+    if timeout is not None:
+        kwargs["timeout"] = httpx.Timeout(timeout, connect=min(timeout, HTTP_CONNECT_TIMEOUT))
+    async with state.host_limit(urlsplit(url).hostname or ""):
+        return await state.client.get(url, **kwargs)
+
+
+async def aclose():
+    """Closes the client owned by the running event loop, if any."""
+    state = _states.pop(asyncio.get_running_loop(), None)
+    if state is not None:
+        await state.client.aclose()
+
+
+# Sync callers (Streamlit, scripts) share one long-lived background loop so they
+# reuse a single connection pool instead of building one per call.
+_portal_loop = None
+_portal_lock = threading.Lock()
+
+
+def _portal() -> asyncio.AbstractEventLoop:
+    global _portal_loop
+    with _portal_lock:
+        if _portal_loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="http-portal", daemon=True)
+            thread.start()
+            _portal_loop = loop
+    return _portal_loop
+
+
+def run_sync(coro):
+    """
+    Runs a service coroutine to completion from synchronous code.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _portal()).result()
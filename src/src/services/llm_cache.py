@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+import contextvars
+from ..utils.env import load_env
+from ..utils.log import get_logger
+
+logger = get_logger("llm_cache")
+
+load_env()
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+LLM_CACHE_PATH = os.path.expanduser(os.getenv("LLM_CACHE_PATH", "~/.cache/marketai/llm_cache.sqlite3"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Default TTLs in seconds. Agents fed live market data expire quickly; the
+# hypothesis and context agents only depend on the user's text.
+DEFAULT_TTLS = {
+    "hypothesis": 7 * 24 * 3600,
+    "context": 24 * 3600,
+    "research": 900,
+    "contradiction": 900,
+    "synthesis": 900,
+    "alert": 900,
+}
+
+# Set per request (HypothesisRequest.bypass_cache) to skip reads but still refresh entries.
+bypass = contextvars.ContextVar("llm_cache_bypass", default=False)
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def make_key(model_name: str, instruction: str, inputs: dict) -> str:
+    """Content address for a prompt: the model, its instruction and the normalized inputs."""
+    payload = json.dumps(
+        {"model": model_name, "instruction": instruction, "inputs": _normalize(inputs)},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    On-disk SQLite store of LLM responses shared by every worker on the host.
+
+    WAL mode lets uvicorn workers read concurrently while one writes. When the
+    stored responses exceed max_bytes the least recently used ones are evicted.
+    """
+
+    def __init__(self, path: str, max_bytes: int, enabled: bool = True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._local = threading.local()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "bypassed": 0}
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        with self._init_lock:
+            if not self._initialized:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS responses (
+                        key TEXT PRIMARY KEY,
+                        agent TEXT NOT NULL,
+                        model TEXT NOT NULL,
+                        response TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_access REAL NOT NULL,
+                        expires_at REAL NOT NULL
+                    )
+                    """
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_last_access ON responses (last_access)")
+                self._initialized = True
+        return conn
+
+    def ttl_for(self, agent: str) -> float:
+        return float(os.getenv(f"LLM_CACHE_TTL_{agent.upper()}", DEFAULT_TTLS.get(agent, 900)))
+
+    def _get(self, key: str):
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute(
+            "SELECT response, expires_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] <= now:
+            return None
+        conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def _put(self, key: str, agent: str, model_name: str, response: str):
+        conn = self._connection()
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, agent, model_name, response, size, now, now, now + self.ttl_for(agent)),
+        )
+        self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        evicted = conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.max_bytes:
+            # Trim to 90% of the budget so eviction does not run on every write.
+            excess = total - int(self.max_bytes * 0.9)
+            rows = conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall()
+            victims = []
+            for key, size in rows:
+                if excess <= 0:
+                    break
+                victims.append((key,))
+                excess -= size
+            conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+            evicted += len(victims)
+        self._stats["evictions"] += evicted
+
+    async def get(self, key: str):
+        """Returns the cached response text, or None on a miss, bypass or error."""
+        if not self.enabled:
+            return None
+        if bypass.get():
+            self._stats["bypassed"] += 1
+            return None
+        try:
+            response = await asyncio.to_thread(self._get, key)
+        except sqlite3.Error as e:
+            logger.warning("LLM cache read failed: %s", e)
+            return None
+        self._stats["hits" if response is not None else "misses"] += 1
+        return response
+
+    async def put(self, key: str, agent: str, model_name: str, response: str):
+        if not self.enabled:
+            return
+        try:
+            await asyncio.to_thread(self._put, key, agent, model_name, response)
+            self._stats["writes"] += 1
+        except sqlite3.Error as e:
+            logger.warning("LLM cache write failed: %s", e)
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["enabled"] = self.enabled
+        return stats
+
+
+llm_cache = LLMCache(LLM_CACHE_PATH, LLM_CACHE_MAX_BYTES, enabled=LLM_CACHE_ENABLED)
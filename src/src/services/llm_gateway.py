@@ -0,0 +1,260 @@
+import os
+import time
+import random
+import asyncio
+from collections import deque
+from typing import Callable
+
+from ..utils.env import load_env
+
+from .llm_cache import llm_cache, make_key
+from .rate_limit import AdaptiveLimit, TokenBucket
+from ..utils import metrics
+from ..utils.evidence_digest import estimate_tokens
+from ..utils.log import get_logger
+
+logger = get_logger("llm_gateway")
+
+load_env()
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "60"))
+
+# Requests per second allowed towards Gemini (0 disables) and the burst size.
+GEMINI_RATE = float(os.getenv("GEMINI_RATE", "10"))
+GEMINI_BURST = float(os.getenv("GEMINI_BURST", "20"))
+
+# Process-wide cap on in-flight Gemini calls, shared by single, streamed and batch
+# analyses. It shrinks on 429/503/timeouts and grows back towards the maximum.
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_MIN_CONCURRENCY = int(os.getenv("GEMINI_MIN_CONCURRENCY", "1"))
+
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+GEMINI_BACKOFF_BASE = float(os.getenv("GEMINI_BACKOFF_BASE", "0.5"))
+GEMINI_BACKOFF_MAX = float(os.getenv("GEMINI_BACKOFF_MAX", "8"))
+
+# Send a second, identical request if the first has not answered after this many seconds (0 disables).
+GEMINI_HEDGE_AFTER = float(os.getenv("GEMINI_HEDGE_AFTER", "0"))
+
+_bucket = TokenBucket(GEMINI_RATE, GEMINI_BURST)
+_limit = AdaptiveLimit(GEMINI_MAX_CONCURRENCY, minimum=GEMINI_MIN_CONCURRENCY)
+
+# HTTP statuses that mean "slow down": they shrink the concurrency limit and are
+# retried. Timeouts count as overload too. Statuses in the second set are retried
+# without touching the limit. (google.api_core errors carry the status as `.code`.)
+_OVERLOAD_CODES = {429, 503, 504}
+_TRANSIENT_CODES = {500, 502}
+
+def _classify(error: Exception):
+    if isinstance(error, asyncio.TimeoutError):
+        return "overload"
+    code = getattr(error, "code", None)
+    if code in _OVERLOAD_CODES:
+        return "overload"
+    if code in _TRANSIENT_CODES:
+        return "transient"
+    return None
+
+_model = None
+
+def get_model():
+    """Returns the shared GenerativeModel, configuring the API key on first use."""
+    global _model
+    if _model is None:
+        # The SDK takes most of a cold start to import, so it is loaded on first use.
+        import google.generativeai as genai
+        genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
+        _model = genai.GenerativeModel(GEMINI_MODEL)
+    return _model
+
+def set_model(model):
+    """Replaces the shared model (e.g. with a stand-in for benchmarks)."""
+    global _model
+    _model = model
+
+
+class _AgentMetrics:
+    """Latency and quota counters for one agent's Gemini calls."""
+
+    def __init__(self):
+        self.counts = {
+            "calls": 0,
+            "cache_hits": 0,
+            "requests": 0,
+            "retries": 0,
+            "throttled": 0,
+            "hedges": 0,
+            "errors": 0,
+            "prompt_tokens_estimated": 0,
+            "prompt_tokens": 0,
+            "output_tokens": 0,
+        }
+        self.latencies = deque(maxlen=512)
+
+    def record_usage(self, response):
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            self.counts["prompt_tokens"] += getattr(usage, "prompt_token_count", 0) or 0
+            self.counts["output_tokens"] += getattr(usage, "candidates_token_count", 0) or 0
+
+    def to_dict(self) -> dict:
+        latencies = sorted(self.latencies)
+        result = dict(self.counts)
+        if latencies:
+            result["latency_ms"] = {
+                "avg": round(sum(latencies) / len(latencies) * 1000, 1),
+                "p50": round(latencies[len(latencies) // 2] * 1000, 1),
+                "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+                "max": round(latencies[-1] * 1000, 1),
+            }
+        return result
+
+
+_metrics = {}
+
+def _agent_metrics(agent: str) -> _AgentMetrics:
+    metrics = _metrics.get(agent)
+    if metrics is None:
+        metrics = _metrics[agent] = _AgentMetrics()
+    return metrics
+
+# Estimated prompt tokens per agent: {"calls": n, "total": tokens, "last": tokens}
+_prompt_tokens = {}
+
+def _record_prompt(agent: str, prompt: str) -> int:
+    tokens = estimate_tokens(prompt)
+    stats = _prompt_tokens.setdefault(agent, {"calls": 0, "total": 0, "last": 0})
+    stats["calls"] += 1
+    stats["total"] += tokens
+    stats["last"] = tokens
+    logger.debug("Prompt built", extra={"agent": agent, "tokens": tokens})
+    return tokens
+
+def prompt_stats() -> dict:
+    """Returns estimated prompt token counts per agent."""
+    return {
+        agent: dict(stats, average=round(stats["total"] / stats["calls"]))
+        for agent, stats in _prompt_tokens.items()
+    }
+
+def stats() -> dict:
+    """Returns limiter state and per-agent latency/quota metrics."""
+    return {
+        "model": GEMINI_MODEL,
+        "rate_limit": _bucket.stats(),
+        "concurrency": _limit.stats(),
+        "agents": {agent: metrics.to_dict() for agent, metrics in _metrics.items()},
+    }
+
+
+async def _attempt(model, prompt: str, metrics: _AgentMetrics, sent: asyncio.Event = None):
+    # One request: wait for rate and concurrency budget, then call with a timeout.
+    await _bucket.acquire()
+    await _limit.acquire()
+    outcome = None
+    try:
+        if sent is not None:
+            sent.set()
+        metrics.counts["requests"] += 1
+        response = await asyncio.wait_for(model.generate_content_async(prompt), GEMINI_TIMEOUT)
+        outcome = "ok"
+        return response
+    except Exception as e:
+        outcome = _classify(e)
+        raise
+    finally:
+        _limit.release(outcome)
+
+async def _hedged(model, prompt: str, metrics: _AgentMetrics):
+    if GEMINI_HEDGE_AFTER <= 0:
+        return await _attempt(model, prompt, metrics)
+
+    sent = asyncio.Event()
+    first = asyncio.ensure_future(_attempt(model, prompt, metrics, sent))
+    on_wire = asyncio.ensure_future(sent.wait())
+    pending = {first}
+    try:
+        # The hedge delay starts once the request is on the wire, not while it queues.
+        await asyncio.wait({first, on_wire}, return_when=asyncio.FIRST_COMPLETED)
+        on_wire.cancel()
+        done, pending = await asyncio.wait({first}, timeout=GEMINI_HEDGE_AFTER)
+        # Only hedge when there is spare concurrency; under saturation it would just add load.
+        if not done and _limit.in_flight < int(_limit.limit):
+            metrics.counts["hedges"] += 1
+            pending.add(asyncio.ensure_future(_attempt(model, prompt, metrics)))
+        error = None
+        while True:
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+            if not pending:
+                raise error
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def _call_with_retries(model, agent: str, prompt: str, metrics: _AgentMetrics):
+    for attempt in range(GEMINI_MAX_RETRIES + 1):
+        try:
+            return await _hedged(model, prompt, metrics)
+        except Exception as e:
+            kind = _classify(e)
+            if kind is None or attempt == GEMINI_MAX_RETRIES:
+                raise
+            if kind == "overload":
+                metrics.counts["throttled"] += 1
+            metrics.counts["retries"] += 1
+            # Full jitter keeps retrying agents from hitting the API in lockstep.
+            delay = random.uniform(0, min(GEMINI_BACKOFF_MAX, GEMINI_BACKOFF_BASE * 2 ** attempt))
+            logger.warning("Gemini call failed, retrying", extra={"agent": agent, "error": type(e).__name__, "retry": attempt + 1, "delay": round(delay, 2)})
+            await asyncio.sleep(delay)
+
+
+async def generate(agent: str, instruction: str, prompt: str, inputs: dict, parse: Callable = None, model=None):
+    """
+    Runs a Gemini call for an agent through the shared limits, serving identical
+    prompts from the response cache.
+
+    Args:
+        agent: Short agent name, used for per-agent TTLs and metrics (e.g. "context").
+        instruction: The agent's fixed instruction block.
+        prompt: The full prompt sent to the model.
+        inputs: The variable parts of the prompt that identify the request.
+        parse: Optional parser applied to the response text. Responses that fail
+            to parse raise and are not cached.
+        model: The GenerativeModel to call; defaults to the shared model.
+
+    Returns:
+        The response text, or parse(text) when a parser is given.
+    """
+    model = model or get_model()
+    agent_metrics = _agent_metrics(agent)
+    agent_metrics.counts["calls"] += 1
+    agent_metrics.counts["prompt_tokens_estimated"] += _record_prompt(agent, prompt)
+    metrics.llm_prompt_chars.observe(len(prompt), agent=agent)
+    started = time.perf_counter()
+    key = make_key(model.model_name, instruction, inputs)
+    text = await llm_cache.get(key)
+    if text is not None:
+        agent_metrics.counts["cache_hits"] += 1
+        metrics.agent_seconds.observe(time.perf_counter() - started, agent=agent, outcome="cache_hit")
+        return parse(text) if parse else text
+
+    try:
+        response = await _call_with_retries(model, agent, prompt, agent_metrics)
+    except Exception:
+        agent_metrics.counts["errors"] += 1
+        metrics.agent_seconds.observe(time.perf_counter() - started, agent=agent, outcome="error")
+        raise
+    elapsed = time.perf_counter() - started
+    agent_metrics.latencies.append(elapsed)
+    agent_metrics.record_usage(response)
+    metrics.agent_seconds.observe(elapsed, agent=agent, outcome="ok")
+
+    text = response.text
+    metrics.llm_response_chars.observe(len(text), agent=agent)
+    result = parse(text) if parse else text
+    await llm_cache.put(key, agent, model.model_name, text)
+    return result
@@ -1,61 +1,186 @@
 import os
-import time
-import requests
+import asyncio
 from datetime import datetime
-from dotenv import load_dotenv
+from ..utils.env import load_env
+from . import http_client
+from .cache import TTLCache
+from .provider_router import AllProvidersFailed, CircuitBreaker, NoData, Provider, ProviderRouter, is_outage
+from .yahoo_quote import parse_quote_page
+from ..utils.log import get_logger
 
-load_dotenv()
+logger = get_logger("market_data")
+
+load_env()
+
+# Columns of the bulk (columnar) quote result, alongside "symbol".
+QUOTE_COLUMNS = ("price", "previous_close", "change", "change_percent", "volume", "market_cap", "source", "error")
+# Symbols per FMP multi-symbol request, and parallel single fetches for everything else.
+FMP_BATCH_SIZE = int(os.getenv("FMP_BATCH_SIZE", "50"))
+QUOTE_BULK_CONCURRENCY = int(os.getenv("QUOTE_BULK_CONCURRENCY", "8"))
+# Provider endpoints; overridable to point at a local replay server (see benchmarks/load).
+ALPHA_VANTAGE_URL = os.getenv("ALPHA_VANTAGE_URL", "https://www.alphavantage.co/query")
+FMP_URL = os.getenv("FMP_URL", "https://financialmodelingprep.com/api/v3")
+YAHOO_QUOTE_URL = os.getenv("YAHOO_QUOTE_URL", "https://finance.yahoo.com/quote")
+
+def _to_columns(symbols: list, quotes: dict) -> dict:
+    columns = {"symbol": list(symbols)}
+    for field in QUOTE_COLUMNS:
+        columns[field] = [quotes.get(symbol, {"error": "No data"}).get(field) for symbol in symbols]
+    return columns
 
 class MarketDataService:
     def __init__(self):
         self.alpha_vantage_key = os.getenv("ALPHA_VANTAGE_API_KEY")
         self.fmp_key = os.getenv("FMP_API_KEY")
-        self._cache = {}
-        self._cache_duration = 300  # 5 minutes
+        self._cache = TTLCache(
+            max_entries=int(os.getenv("QUOTE_CACHE_MAX_ENTRIES", "1024")),
+            ttl=float(os.getenv("QUOTE_CACHE_TTL", "300")),  # 5 minutes
+            jitter=float(os.getenv("QUOTE_CACHE_JITTER", "0.1")),
+            stale_ttl=float(os.getenv("QUOTE_CACHE_STALE_TTL", "600")),
+            negative_ttl=float(os.getenv("QUOTE_CACHE_NEGATIVE_TTL", "60")),
+        )
+        self._router = ProviderRouter(
+            self._providers(),
+            timeout=float(os.getenv("QUOTE_PROVIDER_TIMEOUT", "8")),
+            hedge_default=float(os.getenv("QUOTE_HEDGE_DEFAULT", "1.0")),
+            min_samples=int(os.getenv("QUOTE_HEDGE_MIN_SAMPLES", "10")),
+        )
+        self._bulk_refreshes = set()
+
+    def _providers(self) -> list:
+        # Preference order: Alpha Vantage, FMP, then Yahoo scraping (always available).
+        fetchers = []
+        if self.alpha_vantage_key:
+            fetchers.append(("alpha_vantage", self._fetch_alpha_vantage))
+        if self.fmp_key:
+            fetchers.append(("fmp", self._fetch_fmp))
+        fetchers.append(("yahoo", self._fetch_yahoo))
+        return [
+            Provider(name, fetch, breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("QUOTE_BREAKER_FAILURES", "3")),
+                cooldown=float(os.getenv("QUOTE_BREAKER_COOLDOWN", "30")),
+            ))
+            for name, fetch in fetchers
+        ]
 
     def get_stock_data(self, symbol):
+        return http_client.run_sync(self.get_stock_data_async(symbol))
+
+    async def get_stock_data_async(self, symbol):
         if not symbol:
             return {'error': 'Invalid symbol'}
         
         symbol = symbol.upper().strip()
-        cache_key = f"{symbol}_{int(time.time() // self._cache_duration)}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
+        try:
+            return await self._cache.get_or_load(
+                symbol,
+                lambda: self._fetch_quote(symbol),
+                is_negative=lambda data: 'error' in data
+            )
+        except AllProvidersFailed:
+            return {'error': f'Data sources unavailable for {symbol}'}
 
-        # Try Alpha Vantage
-        if self.alpha_vantage_key:
-            try:
-                data = self._fetch_alpha_vantage(symbol)
-                self._cache[cache_key] = data
-                return data
-            except Exception as e:
-                print(f"Alpha Vantage failed for {symbol}: {e}")
+    def get_stock_data_many(self, symbols):
+        return http_client.run_sync(self.get_stock_data_many_async(symbols))
 
-        # Try FMP
-        if self.fmp_key:
-            try:
-                data = self._fetch_fmp(symbol)
-                self._cache[cache_key] = data
-                return data
-            except Exception as e:
-                print(f"FMP failed for {symbol}: {e}")
+    async def get_stock_data_many_async(self, symbols) -> dict:
+        """
+        Quotes several symbols at once.
+
+        Cached quotes are served directly (stale ones are refreshed in the
+        background). Misses use FMP's multi-symbol endpoint when it is available
+        and fall back to bounded parallel single fetches.
+
+        Returns:
+            Columns keyed by field ("symbol", "price", ..., "error"), aligned with
+            the normalized, de-duplicated symbols.
+        """
+        ordered = list(dict.fromkeys(symbol.upper().strip() for symbol in symbols if symbol and symbol.strip()))
+        quotes, missing, stale = {}, [], []
+        for symbol in ordered:
+            state, value = self._cache.lookup(symbol)
+            if state == "miss":
+                missing.append(symbol)
+                continue
+            quotes[symbol] = value
+            if state == "stale":
+                stale.append(symbol)
+
+        if missing:
+            quotes.update(await self._load_many(missing))
+        if stale:
+            task = asyncio.ensure_future(self._refresh_many(stale))
+            self._bulk_refreshes.add(task)
+            task.add_done_callback(self._bulk_refreshes.discard)
+        return _to_columns(ordered, quotes)
+
+    async def _load_many(self, symbols: list) -> dict:
+        found = await self._fetch_bulk(symbols)
+        self._cache.set_many(found)
+
+        rest = [symbol for symbol in symbols if symbol not in found]
+        if rest:
+            slots = asyncio.Semaphore(QUOTE_BULK_CONCURRENCY)
+
+            async def fetch_one(symbol):
+                async with slots:
+                    return symbol, await self.get_stock_data_async(symbol)
+
+            found.update(await asyncio.gather(*(fetch_one(symbol) for symbol in rest)))
+        return found
 
-        # Fallback to Yahoo Finance
+    async def _refresh_many(self, symbols: list):
+        # Like TTLCache._refresh: failures keep the stale quotes rather than replacing them.
+        found = await self._fetch_bulk(symbols)
+        for symbol in symbols:
+            if symbol not in found:
+                try:
+                    found[symbol] = await self._fetch_quote(symbol)
+                except Exception as e:
+                    logger.warning("Background refresh failed for %s: %s", symbol, e)
+        self._cache.set_many({symbol: quote for symbol, quote in found.items() if 'error' not in quote})
+
+    async def _fetch_bulk(self, symbols: list) -> dict:
+        """Quotes symbols through FMP's multi-symbol endpoint; returns only the ones it priced."""
+        if not self.fmp_key or not self._router.available("fmp"):
+            return {}
+        chunks = [symbols[i:i + FMP_BATCH_SIZE] for i in range(0, len(symbols), FMP_BATCH_SIZE)]
+        found = {}
+        for chunk, result in zip(chunks, await asyncio.gather(*(self._fetch_fmp_many(chunk) for chunk in chunks), return_exceptions=True)):
+            if isinstance(result, Exception):
+                logger.warning("FMP bulk quote failed", extra={"symbols": len(chunk), "details": str(result)})
+                if is_outage(result):
+                    self._router.record("fmp", False)
+            else:
+                self._router.record("fmp", True)
+                found.update(result)
+        return found
+
+    def cache_stats(self) -> dict:
+        return self._cache.stats()
+
+    def provider_stats(self) -> dict:
+        return self._router.stats()
+
+    async def _fetch_quote(self, symbol):
+        # Providers are raced (see ProviderRouter); the first valid quote wins.
         try:
-            data = self._fetch_yahoo(symbol)
-            self._cache[cache_key] = data
-            return data
-        except Exception as e:
-            print(f"Yahoo Finance failed for {symbol}: {e}")
+            return await self._router.fetch(symbol)
+        except AllProvidersFailed as e:
+            logger.warning("All data sources failed", extra={"symbol": symbol, "details": str(e), "outage": e.outage})
+            if e.outage:
+                # Raised rather than cached as "no data": a stale quote keeps being served and a miss is retried
+                raise
             return {'error': f'All data sources failed for {symbol}'}
 
-    def _fetch_alpha_vantage(self, symbol):
-        url = f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol={symbol}&apikey={self.alpha_vantage_key}"
-        response = requests.get(url, timeout=15)
+    async def _fetch_alpha_vantage(self, symbol):
+        url = ALPHA_VANTAGE_URL
+        params = {"function": "GLOBAL_QUOTE", "symbol": symbol, "apikey": self.alpha_vantage_key}
+        response = await http_client.get(url, params=params)
         response.raise_for_status()
         data = response.json()
         if 'Global Quote' not in data or not data['Global Quote']:
-            raise ValueError("Invalid symbol or no data from Alpha Vantage")
+            raise NoData("Invalid symbol or no data from Alpha Vantage")
         
         quote = data['Global Quote']
         price = float(quote.get('05. price', 0))
@@ -72,15 +197,33 @@ class MarketDataService:
             'volume': int(quote.get('06. volume', 0))
         }
 
-    def _fetch_fmp(self, symbol):
-        url = f"https://financialmodelingprep.com/api/v3/quote/{symbol}?apikey={self.fmp_key}"
-        response = requests.get(url, timeout=15)
+    async def _fetch_fmp(self, symbol):
+        url = f"{FMP_URL}/quote/{symbol}"
+        response = await http_client.get(url, params={"apikey": self.fmp_key})
         response.raise_for_status()
         data = response.json()
         if not data:
-            raise ValueError("Invalid symbol or no data from FMP")
-            
-        quote = data[0]
+            raise NoData("Invalid symbol or no data from FMP")
+        return self._parse_fmp_quote(symbol, data[0])
+
+    async def _fetch_fmp_many(self, symbols: list) -> dict:
+        url = f"{FMP_URL}/quote/{','.join(symbols)}"
+        response = await http_client.get(url, params={"apikey": self.fmp_key})
+        response.raise_for_status()
+        wanted = set(symbols)
+        quotes = {}
+        for quote in response.json() or []:
+            symbol = (quote.get('symbol') or '').upper()
+            if symbol not in wanted:
+                continue
+            try:
+                quotes[symbol] = self._parse_fmp_quote(symbol, quote)
+            except (TypeError, ValueError):
+                # Left to the single-symbol fallback
+                continue
+        return quotes
+
+    def _parse_fmp_quote(self, symbol, quote):
         price = float(quote.get('price', 0))
         if price <= 0:
             raise ValueError("Invalid price data from FMP")
@@ -96,30 +239,24 @@ class MarketDataService:
             'market_cap': int(quote.get('marketCap', 0))
         }
 
-    def _fetch_yahoo(self, symbol):
-        from bs4 import BeautifulSoup
+    async def _fetch_yahoo(self, symbol):
         headers = {'User-Agent': 'Mozilla/5.0'}
-        url = f"https://finance.yahoo.com/quote/{symbol}"
-        response = requests.get(url, headers=headers, timeout=15)
+        url = f"{YAHOO_QUOTE_URL}/{symbol}"
+        response = await http_client.get(url, headers=headers)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        price_element = soup.find('fin-streamer', {'data-field': 'regularMarketPrice'})
-        if not price_element:
-            raise ValueError("Could not find price element on Yahoo Finance page")
-            
-        price = float(price_element.get('value', 0))
-        if price <= 0:
-            raise ValueError("Invalid price data from Yahoo Finance")
-
-        return {
-            'source': 'yahoo_scraped',
-            'symbol': symbol,
-            'price': price
-        }
+        return parse_quote_page(response.text, symbol)
 
 # Singleton instance
 market_data_service = MarketDataService()
 
 def get_market_data(symbol: str) -> dict:
     return market_data_service.get_stock_data(symbol)
+
+async def get_market_data_async(symbol: str) -> dict:
+    return await market_data_service.get_stock_data_async(symbol)
+
+def get_market_data_many(symbols: list) -> dict:
+    return market_data_service.get_stock_data_many(symbols)
+
+async def get_market_data_many_async(symbols: list) -> dict:
+    return await market_data_service.get_stock_data_many_async(symbols)
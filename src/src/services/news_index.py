@@ -0,0 +1,236 @@
+import re
+import math
+import heapq
+import time
+from collections import defaultdict
+
+_TOKEN = re.compile(r"\$?[a-z0-9]+(?:[.,'][a-z0-9]+)*%?")
+STOPWORDS = frozenset(
+    "a an and are as at be been but by for from has have he her his in into is it its of on or our "
+    "s that the their them they this to was were which will with would you your end reach rise fall "
+    "says said after over new than more about up down".split()
+)
+
+FINGERPRINT_BITS = 64
+# Fingerprints at most this many bits apart are near-duplicates. Unrelated
+# headlines with summaries land 15+ bits apart, edited copies a few bits. With
+# eight 8-bit bands, two such fingerprints share at least one band exactly, so
+# only articles in the same band buckets need comparing.
+MAX_DISTANCE = 7
+_BANDS = 8
+_BAND_BITS = FINGERPRINT_BITS // _BANDS
+
+# SimHash sums a +1/-1 vote per feature and bit. Instead of looping over the
+# 64 bits, each byte of a feature hash is looked up as its 8 bits spread into
+# 16-bit counters of one integer, and the eight byte positions are summed
+# separately; a bit is set when more than half the features have it.
+_LANE_BITS = 16
+_MAX_FEATURES = (1 << _LANE_BITS) - 1
+_SPREAD = [sum(((byte >> bit) & 1) << (_LANE_BITS * bit) for bit in range(8)) for byte in range(256)]
+
+# BM25 parameters and the relevance/recency blend used for ranking
+BM25_K1 = 1.2
+BM25_B = 0.75
+RELEVANCE_WEIGHT = 0.6
+# Days over which recency decays by a factor of e
+RECENCY_DAYS = 3
+
+
+def tokenize(text: str) -> list:
+    return _TOKEN.findall((text or "").lower())
+
+
+def terms(text: str) -> set:
+    """Distinct index terms of `text` (tokens without stopwords or single characters)."""
+    return {token for token in tokenize(text) if len(token) > 1 and token not in STOPWORDS}
+
+
+def simhash(features) -> int:
+    """
+    64-bit SimHash of hashable features. Uses the built-in hash, so
+    fingerprints are only comparable within one process.
+    """
+    spread = _SPREAD
+    c0 = c1 = c2 = c3 = c4 = c5 = c6 = c7 = 0
+    total = 0
+    for feature in features:
+        # Shifts and masks of negative hashes act on their two's complement
+        value = hash(feature)
+        c0 += spread[value & 255]
+        c1 += spread[value >> 8 & 255]
+        c2 += spread[value >> 16 & 255]
+        c3 += spread[value >> 24 & 255]
+        c4 += spread[value >> 32 & 255]
+        c5 += spread[value >> 40 & 255]
+        c6 += spread[value >> 48 & 255]
+        c7 += spread[value >> 56 & 255]
+        total += 1
+        if total == _MAX_FEATURES:
+            break
+    fingerprint = 0
+    for position, count in enumerate((c0, c1, c2, c3, c4, c5, c6, c7)):
+        for bit in range(8):
+            if 2 * ((count >> (_LANE_BITS * bit)) & _MAX_FEATURES) > total:
+                fingerprint |= 1 << (8 * position + bit)
+    return fingerprint
+
+
+def fingerprint(title: str, summary: str) -> int:
+    """SimHash over the word bigrams of an article's title and summary."""
+    tokens = tokenize(f"{title} {summary}")
+    return simhash(zip(tokens, tokens[1:]) if len(tokens) > 1 else tokens)
+
+
+# Syndicated copies often cut the summary short, which moves the fingerprint
+# too far; matching the opening words of the summary catches those.
+LEAD_TOKENS = 12
+
+
+def _keys(title: str, summary: str) -> list:
+    keys = []
+    title_tokens = tokenize(title)
+    if title_tokens:
+        keys.append(("title", " ".join(title_tokens)))
+    lead = tokenize(summary)[:LEAD_TOKENS]
+    if len(lead) == LEAD_TOKENS:
+        keys.append(("lead", " ".join(lead)))
+    return keys
+
+
+class _Doc:
+    __slots__ = ("article", "published", "fingerprint", "keys", "length")
+
+    def __init__(self, article, published, fingerprint, keys, length):
+        self.article = article
+        self.published = published
+        self.fingerprint = fingerprint
+        self.keys = keys
+        self.length = length
+
+
+class NewsIndex:
+    """
+    Near-duplicate detection and an inverted index over a set of articles.
+
+    Articles are added once, when they enter the cache: add() returns the id
+    of an already-indexed near-duplicate (same normalized title or summary
+    opening, or SimHash fingerprints at most MAX_DISTANCE bits apart) instead
+    of indexing it, and
+    counts the copy on the original's "duplicates" field. search() ranks the
+    indexed articles by BM25 over the query terms blended with recency.
+    """
+
+    def __init__(self):
+        self._docs = {}
+        self._next_id = 0
+        self._postings = defaultdict(dict)
+        self._bands = defaultdict(set)
+        self._keys = {}
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _band_keys(self, value: int):
+        return [(band, (value >> (band * _BAND_BITS)) & ((1 << _BAND_BITS) - 1)) for band in range(_BANDS)]
+
+    def find_duplicate(self, keys: list, value: int):
+        """Id of an indexed near-duplicate, or None."""
+        for key in keys:
+            if key in self._keys:
+                return self._keys[key]
+        for key in self._band_keys(value):
+            for doc_id in self._bands.get(key, ()):
+                if (self._docs[doc_id].fingerprint ^ value).bit_count() <= MAX_DISTANCE:
+                    return doc_id
+        return None
+
+    def add(self, article: dict, published: float) -> tuple:
+        """
+        Indexes an article published at `published` (epoch seconds).
+
+        Returns:
+            (doc_id, True) for a new article, or (original_id, False) if it was
+            collapsed into an indexed near-duplicate.
+        """
+        title, summary = article.get("title", ""), article.get("summary", "")
+        keys = _keys(title, summary)
+        value = fingerprint(title, summary)
+        original = self.find_duplicate(keys, value)
+        if original is not None:
+            kept = self._docs[original].article
+            kept["duplicates"] = kept.get("duplicates", 0) + 1
+            return original, False
+
+        doc_id = self._next_id
+        self._next_id += 1
+        tokens = [token for token in tokenize(f"{title} {title} {summary}") if len(token) > 1 and token not in STOPWORDS]
+        for token in tokens:
+            postings = self._postings[token]
+            postings[doc_id] = postings.get(doc_id, 0) + 1
+        for key in self._band_keys(value):
+            self._bands[key].add(doc_id)
+        for key in keys:
+            self._keys[key] = doc_id
+        self._docs[doc_id] = _Doc(article, published, value, keys, len(tokens))
+        self._total_length += len(tokens)
+        return doc_id, True
+
+    def remove(self, doc_id: int):
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        self._total_length -= doc.length
+        for token in {token for token in tokenize(f"{doc.article.get('title', '')} {doc.article.get('summary', '')}")}:
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[token]
+        for key in self._band_keys(doc.fingerprint):
+            bucket = self._bands.get(key)
+            if bucket is not None:
+                bucket.discard(doc_id)
+                if not bucket:
+                    del self._bands[key]
+        for key in doc.keys:
+            if self._keys.get(key) == doc_id:
+                del self._keys[key]
+
+    def relevance(self, query_terms, doc_ids=None) -> dict:
+        """BM25 score per document id containing any of `query_terms`."""
+        count = len(self._docs)
+        if not count:
+            return {}
+        average_length = self._total_length / count or 1.0
+        scores = defaultdict(float)
+        for term in query_terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                if doc_ids is not None and doc_id not in doc_ids:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._docs[doc_id].length / average_length)
+                scores[doc_id] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        return scores
+
+    def search(self, query: str, doc_ids, limit: int, now: float = None) -> list:
+        """
+        Returns up to `limit` articles among `doc_ids`, best first, scored by
+        BM25 relevance to `query` (normalized to the best match) blended with
+        an exponential recency decay.
+        """
+        now = time.time() if now is None else now
+        doc_ids = set(doc_ids)
+        scores = self.relevance(terms(query), doc_ids)
+        best = max(scores.values(), default=0.0) or 1.0
+
+        def score(doc_id):
+            age_days = max(now - self._docs[doc_id].published, 0) / 86400
+            recency = math.exp(-age_days / RECENCY_DAYS)
+            return RELEVANCE_WEIGHT * scores.get(doc_id, 0.0) / best + (1 - RELEVANCE_WEIGHT) * recency
+
+        return [self._docs[doc_id].article for doc_id in heapq.nlargest(limit, doc_ids, key=score)]
+
@@ -1,58 +1,120 @@
 import os
-import requests
-from datetime import datetime, timedelta
-from dotenv import load_dotenv
+import asyncio
+import httpx
+from ..utils.env import load_env
+from . import http_client, sentiment_service
+from .news_store import NewsStore, is_av_timestamp, av_timestamp_to_iso
+from ..utils.log import get_logger
 
-load_dotenv()
+logger = get_logger("news")
 
-def get_news(query: str, days: int = 7) -> dict:
+load_env()
+
+NEWS_LIMIT = 20
+# Overridable to point at a local replay server (see benchmarks/load).
+ALPHA_VANTAGE_URL = os.getenv("ALPHA_VANTAGE_URL", "https://www.alphavantage.co/query")
+news_store = NewsStore(
+    freshness=float(os.getenv("NEWS_CACHE_FRESHNESS", "300")),
+    max_topics=int(os.getenv("NEWS_CACHE_MAX_TOPICS", "256")),
+    max_articles=int(os.getenv("NEWS_CACHE_MAX_ARTICLES", "500")),
+)
+# In-flight refresh per (event loop, topic), shared by concurrent callers
+_refreshing = {}
+
+def get_news(query: str, days: int = 7, relevant_to: str = "") -> dict:
     """
     Service for retrieving financial news from Alpha Vantage.
     """
+    return http_client.run_sync(get_news_async(query, days, relevant_to))
+
+async def get_news_async(query: str, days: int = 7, relevant_to: str = "") -> dict:
+    """
+    Non-blocking variant of get_news for use inside the event loop.
+
+    Feeds are cached per topic; once stale, only articles newer than the
+    newest one already held are fetched, once for all concurrent callers of
+    the topic whatever they rank against. Syndicated copies are collapsed
+    into one article with a "duplicates" count. With `relevant_to` (e.g. the
+    hypothesis), articles are ranked by relevance to its terms and recency
+    instead of by time alone, and the result is marked "ranked".
+    """
     api_key = os.environ.get("ALPHA_VANTAGE_API_KEY")
     if not api_key:
         return {"error": "ALPHA_VANTAGE_API_KEY not found in environment variables."}
 
-    url = f"https://www.alphavantage.co/query?function=NEWS_SENTIMENT&topics={query}&apikey={api_key}"
+    feed = news_store.feed(query)
+    if not news_store.is_fresh(feed):
+        error = await _refresh_shared(query, feed, api_key)
+        if error and feed.fetched_at is None:
+            return error
+        if error:
+            logger.warning("News refresh failed, serving cached articles", extra={"query": query, "details": error['error']})
+
+    # Limit to the 20 most relevant (or most recent) articles
+    articles = feed.search(relevant_to, days, NEWS_LIMIT) if relevant_to else feed.recent(days, NEWS_LIMIT)
+    return {
+        "query": query,
+        "articles": articles,
+        # Tells consumers (see evidence_digest) not to re-rank
+        "ranked": bool(relevant_to),
+        "status": "success"
+    }
+
+async def _refresh_shared(query: str, feed, api_key: str):
+    key = (asyncio.get_running_loop(), query)
+    task = _refreshing.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_refresh_feed(query, feed, api_key))
+        _refreshing[key] = task
+        task.add_done_callback(lambda _: _refreshing.pop(key, None))
+    # A caller that gives up must not cancel the refresh the others are waiting on
+    return await asyncio.shield(task)
+
+async def _refresh_feed(query: str, feed, api_key: str):
+    """
+    Fetches articles newer than the feed's newest one. Returns an error dict on failure.
+    """
+    url = ALPHA_VANTAGE_URL
+    params = {"function": "NEWS_SENTIMENT", "topics": query, "sort": "LATEST", "apikey": api_key}
+    if feed.newest:
+        # time_from has minute resolution; articles already held are skipped on merge.
+        params["time_from"] = feed.newest[:13]
 
     try:
-        response = requests.get(url)
+        response = await http_client.get(url, params=params)
         response.raise_for_status()
         data = response.json()
 
         if 'feed' not in data:
+            if feed.fetched_at is not None:
+                # Nothing new (or throttled); keep what we have for another window.
+                news_store.mark_fetched(feed)
             return {"error": "No news data found in API response.", "response": data}
 
-        # Filter for recent news
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        processed_articles = []
+        articles = []
         for article in data['feed']:
-            try:
-                # Alpha Vantage time format is YYYYMMDD'T'HHMMSS
-                published_time = datetime.strptime(article.get('time_published', ''), '%Y%m%dT%H%M%S')
-                if published_time >= cutoff_date:
-                    processed_articles.append({
-                        "title": article.get('title', ''),
-                        "summary": article.get('summary', ''),
-                        "source": article.get('source', ''),
-                        "url": article.get('url', ''),
-                        "published": published_time.isoformat(),
-                        "sentiment_score": article.get('overall_sentiment_score', 0),
-                        "sentiment_label": article.get('overall_sentiment_label', 'Neutral')
-                    })
-            except (ValueError, TypeError):
+            # Alpha Vantage time format is YYYYMMDD'T'HHMMSS
+            published = article.get('time_published', '')
+            if not is_av_timestamp(published):
                 # Skip articles with invalid date formats
                 continue
-        
-        # Limit to the 20 most recent articles
-        return {
-            "query": query,
-            "articles": processed_articles[:20],
-            "status": "success"
-        }
-
-    except requests.exceptions.RequestException as e:
+            articles.append((published, {
+                "title": article.get('title', ''),
+                "summary": article.get('summary', ''),
+                "source": article.get('source', ''),
+                "url": article.get('url', ''),
+                "published": av_timestamp_to_iso(published),
+                "sentiment_score": article.get('overall_sentiment_score', 0),
+                "sentiment_label": article.get('overall_sentiment_label', 'Neutral')
+            }))
+
+        feed.merge(articles, news_store.max_articles)
+        news_store.mark_fetched(feed)
+        # Per-ticker scores feed the rolling aggregates; already stored ones are skipped there.
+        sentiment_service.sentiment_pipeline.submit(sentiment_service.observations_from_feed(data['feed']))
+        return None
+
+    except httpx.HTTPError as e:
         return {"error": f"API request failed: {e}", "status": "error"}
     except Exception as e:
         return {"error": f"An unexpected error occurred: {e}", "status": "error"}
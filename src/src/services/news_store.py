@@ -0,0 +1,137 @@
+import time
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
+from .news_index import NewsIndex
+
+# Alpha Vantage timestamps (YYYYMMDD'T'HHMMSS) sort lexically in time order,
+# so the store compares raw strings and never needs to parse them.
+AV_TIME_FORMAT = '%Y%m%dT%H%M%S'
+
+
+def is_av_timestamp(value) -> bool:
+    return (
+        isinstance(value, str)
+        and len(value) == 15
+        and value[8] == 'T'
+        and value[:8].isdigit()
+        and value[9:].isdigit()
+    )
+
+
+def av_timestamp_to_iso(value: str) -> str:
+    return f"{value[0:4]}-{value[4:6]}-{value[6:8]}T{value[9:11]}:{value[11:13]}:{value[13:15]}"
+
+
+class TopicFeed:
+    """
+    Articles for one topic, kept sorted by publish time (oldest first).
+
+    Near-duplicates of held articles (syndicated copies) are collapsed on
+    merge, and held articles are indexed for relevance search.
+    """
+
+    def __init__(self):
+        self.timestamps = []
+        self.articles = []
+        self.doc_ids = []
+        self.urls = set()
+        self.index = NewsIndex()
+        # URLs of collapsed copies per held article, released with it
+        self.copy_urls = defaultdict(list)
+        self.collapsed = 0
+        self.fetched_at = None
+
+    @property
+    def newest(self):
+        return self.timestamps[-1] if self.timestamps else None
+
+    def merge(self, articles: list, max_articles: int) -> int:
+        """
+        Inserts (timestamp, article) pairs not already held. Returns how many were added.
+        """
+        added = 0
+        for published, article in articles:
+            url = article.get("url")
+            if url and url in self.urls:
+                continue
+            doc_id, is_new = self.index.add(article, datetime.strptime(published, AV_TIME_FORMAT).timestamp())
+            if url:
+                self.urls.add(url)
+            if not is_new:
+                self.collapsed += 1
+                if url:
+                    self.copy_urls[doc_id].append(url)
+                continue
+            index = bisect_right(self.timestamps, published)
+            self.timestamps.insert(index, published)
+            self.articles.insert(index, article)
+            self.doc_ids.insert(index, doc_id)
+            added += 1
+
+        overflow = len(self.articles) - max_articles
+        if overflow > 0:
+            for article, doc_id in zip(self.articles[:overflow], self.doc_ids[:overflow]):
+                self.urls.discard(article.get("url"))
+                self.urls.difference_update(self.copy_urls.pop(doc_id, ()))
+                self.index.remove(doc_id)
+            del self.timestamps[:overflow]
+            del self.articles[:overflow]
+            del self.doc_ids[:overflow]
+        return added
+
+    def recent(self, days: int, limit: int) -> list:
+        """Returns up to `limit` articles from the last `days` days, newest first."""
+        cutoff = (datetime.now() - timedelta(days=days)).strftime(AV_TIME_FORMAT)
+        start = max(bisect_left(self.timestamps, cutoff), len(self.articles) - limit)
+        return self.articles[start:][::-1]
+
+    def search(self, query: str, days: int, limit: int) -> list:
+        """
+        Returns up to `limit` articles from the last `days` days, ranked by
+        relevance to `query` blended with recency.
+        """
+        cutoff = (datetime.now() - timedelta(days=days)).strftime(AV_TIME_FORMAT)
+        return self.index.search(query, self.doc_ids[bisect_left(self.timestamps, cutoff):], limit)
+
+
+class NewsStore:
+    """
+    In-memory per-topic news cache that is refreshed incrementally.
+
+    A topic is considered fresh for `freshness` seconds after its last fetch;
+    after that only articles newer than the newest held one are requested.
+    """
+
+    def __init__(self, freshness: float = 300, max_topics: int = 256, max_articles: int = 500):
+        self.freshness = freshness
+        self.max_topics = max_topics
+        self.max_articles = max_articles
+        self._feeds = OrderedDict()
+        self._lock = threading.Lock()
+
+    def feed(self, topic: str) -> TopicFeed:
+        with self._lock:
+            feed = self._feeds.get(topic)
+            if feed is None:
+                feed = TopicFeed()
+                self._feeds[topic] = feed
+                while len(self._feeds) > self.max_topics:
+                    self._feeds.popitem(last=False)
+            self._feeds.move_to_end(topic)
+            return feed
+
+    def is_fresh(self, feed: TopicFeed) -> bool:
+        return feed.fetched_at is not None and time.monotonic() - feed.fetched_at < self.freshness
+
+    def mark_fetched(self, feed: TopicFeed):
+        feed.fetched_at = time.monotonic()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "topics": len(self._feeds),
+                "articles": sum(len(feed.articles) for feed in self._feeds.values()),
+                "duplicates_collapsed": sum(feed.collapsed for feed in self._feeds.values()),
+            }
@@ -0,0 +1,125 @@
+import os
+import re
+import threading
+from typing import Iterable, Optional
+
+import numpy as np
+
+# One append-only binary file per column per symbol: <root>/<SYMBOL>/<column>.bin
+COLUMNS = {
+    "date": np.dtype("<i4"),  # days since 1970-01-01
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "volume": np.dtype("<f8"),
+}
+_SYMBOL = re.compile(r"[A-Z0-9.^=-]{1,20}")
+
+
+def to_day(value: str) -> int:
+    """ISO date ("2025-01-30") to days since the epoch."""
+    return int(np.datetime64(value[:10], "D").astype(np.int64))
+
+
+def from_day(day: int) -> str:
+    return str(np.datetime64(int(day), "D"))
+
+
+class OHLCVStore:
+    """
+    Daily OHLCV bars stored column by column as raw little-endian arrays.
+
+    Reads memory-map the column files, so callers get NumPy arrays without
+    loading or parsing the history. Appends only add bars newer than the last
+    stored one. Columns left uneven by an interrupted append are trimmed to
+    their common length.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._stats = {"reads": 0, "appends": 0, "bars_appended": 0}
+
+    def _dir(self, symbol: str) -> str:
+        if not _SYMBOL.fullmatch(symbol):
+            raise ValueError(f"Invalid symbol for the price store: {symbol!r}")
+        return os.path.join(self.root, symbol)
+
+    def _path(self, symbol: str, column: str) -> str:
+        return os.path.join(self._dir(symbol), f"{column}.bin")
+
+    def _length(self, symbol: str) -> int:
+        lengths = []
+        for column, dtype in COLUMNS.items():
+            try:
+                lengths.append(os.path.getsize(self._path(symbol, column)) // dtype.itemsize)
+            except FileNotFoundError:
+                return 0
+        return min(lengths)
+
+    def __len__(self):
+        return len(self.symbols())
+
+    def symbols(self) -> list:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if _SYMBOL.fullmatch(name) and self._length(name))
+
+    def read(self, symbol: str) -> Optional[dict]:
+        """Returns {column: read-only array} for the symbol's bars, oldest first, or None."""
+        length = self._length(symbol)
+        if not length:
+            return None
+        self._stats["reads"] += 1
+        return {
+            column: np.memmap(self._path(symbol, column), dtype=dtype, mode="r", shape=(length,))
+            for column, dtype in COLUMNS.items()
+        }
+
+    def last_day(self, symbol: str) -> Optional[int]:
+        length = self._length(symbol)
+        if not length:
+            return None
+        with open(self._path(symbol, "date"), "rb") as f:
+            f.seek((length - 1) * COLUMNS["date"].itemsize)
+            return int(np.frombuffer(f.read(COLUMNS["date"].itemsize), dtype=COLUMNS["date"])[0])
+
+    def append(self, symbol: str, bars: Iterable[tuple]) -> int:
+        """
+        Appends (iso_date, open, high, low, close, volume) bars newer than the
+        last stored bar, in date order. Returns how many were added.
+        """
+        with self._lock:
+            os.makedirs(self._dir(symbol), exist_ok=True)
+            length = self._length(symbol)
+            for column, dtype in COLUMNS.items():
+                path = self._path(symbol, column)
+                if os.path.exists(path) and os.path.getsize(path) != length * dtype.itemsize:
+                    os.truncate(path, length * dtype.itemsize)
+
+            last = self.last_day(symbol)
+            rows = {}
+            for bar in bars:
+                day = to_day(bar[0])
+                if last is None or day > last:
+                    rows[day] = bar[1:]
+            if not rows:
+                return 0
+
+            days = np.array(sorted(rows), dtype=COLUMNS["date"])
+            values = np.array([rows[day] for day in days.tolist()], dtype=np.float64)
+            arrays = {"date": days}
+            for index, column in enumerate(("open", "high", "low", "close", "volume")):
+                arrays[column] = values[:, index].astype(COLUMNS[column])
+            # Date last, so a bar only counts once every column holds it
+            for column in ("open", "high", "low", "close", "volume", "date"):
+                with open(self._path(symbol, column), "ab") as f:
+                    f.write(arrays[column].tobytes())
+
+            self._stats["appends"] += 1
+            self._stats["bars_appended"] += len(days)
+            return len(days)
+
+    def stats(self) -> dict:
+        return dict(self._stats, symbols=len(self))
@@ -0,0 +1,203 @@
+import os
+import time
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+from ..utils.env import load_env
+from ..utils import quant
+from . import http_client
+from .market_data_service import ALPHA_VANTAGE_URL, FMP_URL
+from .ohlcv_store import OHLCVStore, from_day
+from .provider_router import AllProvidersFailed, CircuitBreaker, NoData, Provider, ProviderRouter
+from ..utils.log import get_logger
+
+logger = get_logger("price_history")
+
+load_env()
+
+OHLCV_STORE_PATH = os.path.expanduser(os.getenv("OHLCV_STORE_PATH", "~/.cache/marketai/ohlcv"))
+# Years of daily bars fetched the first time a symbol is seen
+HISTORY_YEARS = int(os.getenv("HISTORY_YEARS", "5"))
+# Seconds between update checks for a symbol whose latest bar is behind
+HISTORY_REFRESH_INTERVAL = float(os.getenv("HISTORY_REFRESH_INTERVAL", "3600"))
+YAHOO_CHART_URL = os.getenv("YAHOO_CHART_URL", "https://query1.finance.yahoo.com/v8/finance/chart")
+# Alpha Vantage's free tier returns the last 100 daily bars ("compact")
+_AV_COMPACT_BARS = 100
+
+
+def _last_weekday(today: date) -> date:
+    return today - timedelta(days=max(0, today.weekday() - 4))
+
+
+class PriceHistoryService:
+    """
+    Keeps daily OHLCV history per symbol in a local OHLCVStore and derives
+    quant facts (returns, volatility, drawdowns, required move) from it.
+
+    A symbol is downloaded once; later updates fetch only the bars after the
+    last stored one.
+    """
+
+    def __init__(self, store: OHLCVStore = None):
+        self.alpha_vantage_key = os.getenv("ALPHA_VANTAGE_API_KEY")
+        self.fmp_key = os.getenv("FMP_API_KEY")
+        self.store = store or OHLCVStore(OHLCV_STORE_PATH)
+        self._router = ProviderRouter(
+            self._providers(),
+            timeout=float(os.getenv("HISTORY_PROVIDER_TIMEOUT", "20")),
+            hedge_default=float(os.getenv("HISTORY_HEDGE_DEFAULT", "5")),
+        )
+        self._checked = {}
+        self._stats = {"updates": 0, "update_failures": 0, "served_stale": 0}
+
+    def _providers(self) -> list:
+        # Preference order: FMP, Yahoo (no key), then Alpha Vantage, whose free
+        # tier only has 100 bars per call and a small daily quota.
+        fetchers = []
+        if self.fmp_key:
+            fetchers.append(("fmp", self._fetch_fmp))
+        fetchers.append(("yahoo", self._fetch_yahoo))
+        if self.alpha_vantage_key:
+            fetchers.append(("alpha_vantage", self._fetch_alpha_vantage))
+        return [
+            Provider(name, fetch, breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("QUOTE_BREAKER_FAILURES", "3")),
+                cooldown=float(os.getenv("QUOTE_BREAKER_COOLDOWN", "30")),
+            ))
+            for name, fetch in fetchers
+        ]
+
+    def _start(self, last_day) -> date:
+        if last_day is None:
+            return date.today() - timedelta(days=365 * HISTORY_YEARS)
+        return date.fromisoformat(from_day(last_day)) + timedelta(days=1)
+
+    async def _fetch_fmp(self, request):
+        symbol, start = request
+        url = f"{FMP_URL}/historical-price-full/{symbol}"
+        response = await http_client.get(url, params={"from": start.isoformat(), "apikey": self.fmp_key})
+        response.raise_for_status()
+        data = response.json()
+        if not isinstance(data, dict) or "historical" not in data:
+            raise NoData("No price history from FMP")
+        return [
+            (bar["date"], bar["open"], bar["high"], bar["low"], bar["close"], bar.get("volume") or 0)
+            for bar in data["historical"]
+            if bar.get("close") is not None
+        ]
+
+    async def _fetch_yahoo(self, request):
+        symbol, start = request
+        period1 = int(datetime(start.year, start.month, start.day, tzinfo=timezone.utc).timestamp())
+        params = {"period1": period1, "period2": int(time.time()), "interval": "1d"}
+        response = await http_client.get(f"{YAHOO_CHART_URL}/{symbol}", params=params, headers={'User-Agent': 'Mozilla/5.0'})
+        response.raise_for_status()
+        result = (response.json().get("chart", {}).get("result") or [None])[0]
+        if not result or "timestamp" not in result:
+            raise NoData("No price history from Yahoo")
+        bars = result["indicators"]["quote"][0]
+        days = np.array(result["timestamp"], dtype="datetime64[s]").astype("datetime64[D]").astype(str)
+        return [
+            (day, open_, high, low, close, volume or 0)
+            for day, open_, high, low, close, volume in zip(days.tolist(), bars["open"], bars["high"], bars["low"], bars["close"], bars["volume"])
+            if None not in (open_, high, low, close)
+        ]
+
+    async def _fetch_alpha_vantage(self, request):
+        symbol, start = request
+        outputsize = "compact" if np.busday_count(start, date.today()) < _AV_COMPACT_BARS else "full"
+        params = {"function": "TIME_SERIES_DAILY", "symbol": symbol, "outputsize": outputsize, "apikey": self.alpha_vantage_key}
+        response = await http_client.get(ALPHA_VANTAGE_URL, params=params)
+        response.raise_for_status()
+        series = response.json().get("Time Series (Daily)")
+        if not series:
+            raise NoData("No price history from Alpha Vantage")
+        return [
+            (day, float(bar["1. open"]), float(bar["2. high"]), float(bar["3. low"]), float(bar["4. close"]), float(bar["5. volume"]))
+            for day, bar in series.items()
+        ]
+
+    def _is_current(self, symbol: str, last_day) -> bool:
+        if last_day is None:
+            return False
+        if date.fromisoformat(from_day(last_day)) >= _last_weekday(date.today()):
+            return True
+        # Behind (weekend, holiday or not yet published): check again after the interval.
+        return time.monotonic() - self._checked.get(symbol, float("-inf")) < HISTORY_REFRESH_INTERVAL
+
+    async def update(self, symbol: str) -> int:
+        """
+        Fetches and appends bars newer than the last stored one. Returns how many were added.
+
+        Raises:
+            AllProvidersFailed: if no provider returned history.
+        """
+        last_day = self.store.last_day(symbol)
+        bars = await self._router.fetch((symbol, self._start(last_day)))
+        self._checked[symbol] = time.monotonic()
+        # Files are small, but appends still touch disk; keep them off the event loop.
+        added = await asyncio.to_thread(self.store.append, symbol, bars)
+        self._stats["updates"] += 1
+        logger.debug("Price history updated", extra={"symbol": symbol, "bars_added": added})
+        return added
+
+    async def get_history_async(self, symbol: str):
+        """
+        Returns the symbol's stored bars ({column: array}, oldest first), updating
+        them first when they are behind, or an error dict.
+        """
+        if not symbol:
+            return {'error': 'Invalid symbol'}
+        symbol = symbol.upper().strip()
+        try:
+            last_day = self.store.last_day(symbol)
+        except ValueError as e:
+            return {'error': str(e)}
+
+        if not self._is_current(symbol, last_day):
+            try:
+                await self.update(symbol)
+            except AllProvidersFailed as e:
+                self._checked[symbol] = time.monotonic()
+                self._stats["update_failures"] += 1
+                logger.warning("Price history update failed", extra={"symbol": symbol, "details": str(e)})
+                if last_day is None:
+                    return {'error': f'No price history available for {symbol}'}
+                self._stats["served_stale"] += 1
+
+        history = self.store.read(symbol)
+        if history is None:
+            return {'error': f'No price history available for {symbol}'}
+        return history
+
+    async def get_quant_facts_async(self, symbol: str, hypothesis: str = "") -> dict:
+        """
+        Computes price facts for a symbol from its daily history. When the
+        hypothesis names a dollar target and a timeframe, also the required move
+        and the estimated probability of reaching the target in time.
+        """
+        history = await self.get_history_async(symbol)
+        if "error" in history:
+            return history
+        if len(history["close"]) < 2:
+            return {'error': f'Not enough price history for {symbol}'}
+        facts = quant.quant_facts(
+            history["date"], history["close"], history["high"], history["low"],
+            target=quant.parse_target(hypothesis),
+            deadline=quant.parse_deadline(hypothesis),
+        )
+        return {"symbol": symbol.upper().strip(), "source": "price_history", **facts}
+
+    def stats(self) -> dict:
+        return dict(self._stats, store=self.store.stats(), providers=self._router.stats())
+
+# Singleton instance
+price_history_service = PriceHistoryService()
+
+async def get_quant_facts_async(symbol: str, hypothesis: str = "") -> dict:
+    return await price_history_service.get_quant_facts_async(symbol, hypothesis)
+
+def get_quant_facts(symbol: str, hypothesis: str = "") -> dict:
+    return http_client.run_sync(get_quant_facts_async(symbol, hypothesis))
@@ -0,0 +1,257 @@
+import time
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, List
+import httpx
+from ..utils import metrics
+
+
+class AllProvidersFailed(Exception):
+    """
+    Raised when no provider returned a valid result. `outage` is set when any
+    of them was down (see is_outage) or skipped by its breaker, so the key may
+    well have data: callers should not cache the failure as "no data".
+    """
+
+    def __init__(self, errors: dict, outage: bool = False):
+        self.errors = errors
+        self.outage = outage
+        super().__init__("; ".join(f"{name}: {error}" for name, error in errors.items()) or "no provider available")
+
+
+class NoData(ValueError):
+    """Raised by a provider fetch that answered but has nothing for the key (e.g. an unknown symbol)."""
+
+
+def is_outage(error: BaseException) -> bool:
+    """
+    Whether an error says the provider itself is failing: a timeout, a
+    transport error, or a 5xx/429 response. Anything else (no data, a 4xx or
+    an unusable payload) is about the key asked for and leaves the breaker alone.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return isinstance(error, (asyncio.TimeoutError, httpx.TransportError))
+
+
+class CircuitBreaker:
+    """
+    Stops routing to a provider that keeps failing.
+
+    Opens after `failure_threshold` consecutive failures, or when the rolling
+    error rate reaches `error_rate_threshold`. After `cooldown` seconds one trial
+    call is let through (half-open); its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold: int = 3, error_rate_threshold: float = 0.5, cooldown: float = 30):
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self._trial_running = False
+
+    def allow(self) -> bool:
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = "half_open"
+        if self.state == "closed":
+            return True
+        if self.state == "half_open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record(self, ok: bool, error_rate: float, samples: int, min_samples: int):
+        self._trial_running = False
+        if ok:
+            self.consecutive_failures = 0
+            self.state = "closed"
+            return
+        self.consecutive_failures += 1
+        if (
+            self.state == "half_open"
+            or self.consecutive_failures >= self.failure_threshold
+            or (samples >= min_samples and error_rate >= self.error_rate_threshold)
+        ):
+            if self.state != "open":
+                self.opens += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        # A half-open trial that was cancelled (it lost a race) settles nothing.
+        self._trial_running = False
+
+
+class Provider:
+    """A named data source with its rolling latency/error profile and breaker."""
+
+    def __init__(self, name: str, fetch: Callable[[Any], Awaitable], window: int = 50, breaker: CircuitBreaker = None):
+        self.name = name
+        self.fetch = fetch
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.counts = {"calls": 0, "successes": 0, "failures": 0, "no_data": 0, "wins": 0, "cancelled": 0, "skipped": 0}
+
+    @property
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def percentile(self, fraction: float):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    def stats(self) -> dict:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return dict(
+            self.counts,
+            breaker=self.breaker.state,
+            breaker_opens=self.breaker.opens,
+            error_rate=round(self.error_rate, 3),
+            p50_ms=round(p50 * 1000, 1) if p50 is not None else None,
+            p95_ms=round(p95 * 1000, 1) if p95 is not None else None,
+        )
+
+
+class ProviderRouter:
+    """
+    Races providers in preference order and returns the first valid result.
+
+    The first available provider starts immediately. The next one is started
+    as soon as a running one fails, or once the last started has been running
+    longer than its p95 latency (a hedge). Providers with an open breaker are
+    skipped. Losing calls are cancelled once a winner is in. Only outages (see
+    is_outage) count as failures; a provider without data for the key is
+    passed over without touching its breaker.
+    """
+
+    def __init__(
+        self,
+        providers: List[Provider],
+        timeout: float = 8,
+        hedge_default: float = 1.0,
+        hedge_min: float = 0.05,
+        min_samples: int = 10,
+    ):
+        self.providers = providers
+        self.timeout = timeout
+        self.hedge_default = hedge_default
+        self.hedge_min = hedge_min
+        self.min_samples = min_samples
+        self.hedges = 0
+
+    def hedge_delay(self, provider: Provider) -> float:
+        """Seconds to wait on a provider before also starting the next one."""
+        if len(provider.latencies) < self.min_samples:
+            return self.hedge_default
+        return max(self.hedge_min, provider.percentile(0.95))
+
+    def available(self, name: str) -> bool:
+        """Whether the named provider is configured and its breaker is not open."""
+        return any(provider.name == name and provider.breaker.state != "open" for provider in self.providers)
+
+    def record(self, name: str, ok: bool, seconds: float = None):
+        """
+        Feeds the outcome of a call made outside fetch() (e.g. a bulk request)
+        into the named provider's profile and breaker.
+        """
+        for provider in self.providers:
+            if provider.name == name:
+                self._record(provider, ok, seconds)
+
+    def _record(self, provider: Provider, ok: bool, seconds: float = None):
+        provider.counts["successes" if ok else "failures"] += 1
+        provider.outcomes.append(ok)
+        if ok and seconds is not None:
+            provider.latencies.append(seconds)
+        provider.breaker.record(ok, provider.error_rate, len(provider.outcomes), self.min_samples)
+
+    async def _call(self, provider: Provider, key):
+        provider.counts["calls"] += 1
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(provider.fetch(key), self.timeout)
+        except asyncio.CancelledError:
+            provider.counts["cancelled"] += 1
+            provider.breaker.release_trial()
+            metrics.provider_seconds.observe(time.monotonic() - started, provider=provider.name, outcome="cancelled")
+            raise
+        except Exception as e:
+            if is_outage(e):
+                self._record(provider, False)
+                outcome = "error"
+            else:
+                provider.counts["no_data"] += 1
+                provider.breaker.release_trial()
+                outcome = "no_data"
+            metrics.provider_seconds.observe(time.monotonic() - started, provider=provider.name, outcome=outcome)
+            raise
+        elapsed = time.monotonic() - started
+        self._record(provider, True, elapsed)
+        metrics.provider_seconds.observe(elapsed, provider=provider.name, outcome="ok")
+        return result
+
+    async def fetch(self, key):
+        """
+        Returns the first valid result for `key`.
+
+        Raises:
+            AllProvidersFailed: with each attempted provider's error.
+        """
+        queue = deque(self.providers)
+        running = {}
+        errors = {}
+        outage = False
+        last_started = None
+
+        def start_next() -> bool:
+            nonlocal last_started, outage
+            while queue:
+                provider = queue.popleft()
+                if provider.breaker.allow():
+                    running[asyncio.ensure_future(self._call(provider, key))] = provider
+                    last_started = (provider, time.monotonic())
+                    return True
+                provider.counts["skipped"] += 1
+                errors[provider.name] = "circuit open"
+                outage = True
+            return False
+
+        try:
+            start_next()
+            while running:
+                # Hedge once the most recently started provider has run past its p95.
+                timeout = None
+                if queue:
+                    provider, started = last_started
+                    timeout = max(0.0, started + self.hedge_delay(provider) - time.monotonic())
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if start_next():
+                        self.hedges += 1
+                    continue
+                for task in done:
+                    provider = running.pop(task)
+                    if task.exception() is None:
+                        provider.counts["wins"] += 1
+                        return task.result()
+                    errors[provider.name] = str(task.exception()) or type(task.exception()).__name__
+                    outage = outage or is_outage(task.exception())
+                # A failure frees its slot right away instead of waiting out a hedge delay
+                start_next()
+            raise AllProvidersFailed(errors, outage)
+        finally:
+            for task in running:
+                task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "hedges": self.hedges,
+            "providers": {provider.name: provider.stats() for provider in self.providers},
+        }
@@ -0,0 +1,107 @@
+import time
+import asyncio
+from collections import deque
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` requests per second with bursts of up to `capacity`.
+
+    Waiters are served in arrival order. A rate of 0 disables the limit.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._stats = {"acquired": 0, "delayed": 0, "waited_seconds": 0.0}
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Waits until a token is available and takes it."""
+        self._stats["acquired"] += 1
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                wait = (1 - self._tokens) / self.rate
+                self._stats["delayed"] += 1
+                self._stats["waited_seconds"] += wait
+                await asyncio.sleep(wait)
+                self._refill()
+            self._tokens -= 1
+
+    def stats(self) -> dict:
+        return dict(self._stats, waited_seconds=round(self._stats["waited_seconds"], 3), rate=self.rate)
+
+
+class AdaptiveLimit:
+    """
+    Concurrency cap adjusted by AIMD (additive increase, multiplicative decrease).
+
+    Every successful call raises the limit by `increase / limit` (about +1 per
+    window of calls); an overload signal (429, 503, timeout) multiplies it by
+    `decrease`. The limit stays within [minimum, maximum].
+    """
+
+    def __init__(self, maximum: int, minimum: int = 1, initial: int = None, increase: float = 1.0, decrease: float = 0.5):
+        self.maximum = maximum
+        self.minimum = max(1, min(minimum, maximum))
+        self.limit = float(initial if initial is not None else maximum)
+        self.increase = increase
+        self.decrease = decrease
+        self.in_flight = 0
+        self._waiters = deque()
+        self._stats = {"decreases": 0, "queued": 0}
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    async def acquire(self):
+        """Waits for a slot under the current limit."""
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return
+        self._stats["queued"] += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before the cancellation landed.
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self, outcome: str = None):
+        """
+        Frees a slot and adapts the limit: "ok" grows it, "overload" shrinks it,
+        anything else leaves it unchanged.
+        """
+        self.in_flight -= 1
+        if outcome == "ok":
+            self.limit = min(self.maximum, self.limit + self.increase / max(self.limit, 1.0))
+        elif outcome == "overload":
+            self.limit = max(self.minimum, self.limit * self.decrease)
+            self._stats["decreases"] += 1
+        self._wake()
+
+    def stats(self) -> dict:
+        return dict(
+            self._stats,
+            limit=round(self.limit, 2),
+            in_flight=self.in_flight,
+            waiting=len(self._waiters),
+            maximum=self.maximum,
+        )
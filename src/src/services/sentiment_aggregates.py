@@ -0,0 +1,81 @@
+from datetime import datetime
+from typing import Mapping
+
+import numpy as np
+
+# Rolling windows in days
+WINDOWS = {"1d": 1, "7d": 7, "30d": 30}
+# Alpha Vantage labels scores from 0.15 up Somewhat-Bullish and from -0.15 down Somewhat-Bearish
+BULLISH = 0.15
+BEARISH = -0.15
+
+
+def _round(values: np.ndarray, valid: np.ndarray) -> list:
+    return [round(float(value), 4) if ok else None for value, ok in zip(values, valid)]
+
+
+def aggregate(observations: Mapping[str, list], now: datetime, windows: Mapping[str, int] = WINDOWS) -> list:
+    """
+    Rolling sentiment per ticker and window from parallel lists of ticker,
+    published, score and relevance.
+
+    Every (ticker, window) statistic is a weighted bincount over the ticker
+    codes with the window's mask applied, so all tickers and windows are
+    computed in a handful of array passes. A window whose articles all have
+    zero relevance falls back to equal weights.
+
+    Returns:
+        One row per ticker and window: articles, relevance-weighted mean and
+        dispersion (standard deviation), bullish/bearish shares, the newest
+        article's publish time and as_of.
+    """
+    if not observations["ticker"]:
+        return []
+    tickers, codes = np.unique(np.asarray(observations["ticker"], dtype=str), return_inverse=True)
+    size = len(tickers)
+    # Epoch seconds via timestamp() is several times faster than building a datetime64 array
+    seconds = np.fromiter((published.timestamp() for published in observations["published"]), dtype=np.float64,
+                          count=len(observations["published"]))
+    age = now.timestamp() - seconds
+    score = np.asarray(observations["score"], dtype=np.float64)
+    weight = np.clip(np.nan_to_num(np.asarray(observations["relevance"], dtype=np.float64)), 0.0, 1.0)
+
+    rows = []
+    for name, days in windows.items():
+        # Articles stamped slightly ahead of `now` (clock or timezone skew) count as new
+        inside = age < days * 86400
+        articles = np.bincount(codes, weights=inside, minlength=size)
+        window_weight = weight * inside
+        weights = np.bincount(codes, weights=window_weight, minlength=size)
+        unweighted = (weights == 0) & (articles > 0)
+        if unweighted.any():
+            window_weight = np.where(unweighted[codes], 1.0, weight) * inside
+            weights = np.bincount(codes, weights=window_weight, minlength=size)
+        weighted = weights > 0
+        total = np.where(weighted, weights, 1.0)
+        mean = np.bincount(codes, weights=window_weight * score, minlength=size) / total
+        second = np.bincount(codes, weights=window_weight * score ** 2, minlength=size) / total
+        dispersion = np.sqrt(np.maximum(second - mean ** 2, 0.0))
+        counted = articles > 0
+        share = np.where(counted, articles, 1.0)
+        bullish = np.bincount(codes, weights=inside & (score >= BULLISH), minlength=size) / share
+        bearish = np.bincount(codes, weights=inside & (score <= BEARISH), minlength=size) / share
+        newest = np.full(size, -np.inf)
+        np.maximum.at(newest, codes[inside], seconds[inside])
+
+        for ticker, count, mean_value, dispersion_value, bullish_value, bearish_value, last in zip(
+            tickers, articles, _round(mean, weighted), _round(dispersion, weighted),
+            _round(bullish, counted), _round(bearish, counted), newest
+        ):
+            rows.append({
+                "ticker": str(ticker),
+                "window": name,
+                "articles": int(count),
+                "mean": mean_value,
+                "dispersion": dispersion_value,
+                "bullish": bullish_value,
+                "bearish": bearish_value,
+                "last_published": datetime.fromtimestamp(last) if count else None,
+                "as_of": now,
+            })
+    return rows
@@ -0,0 +1,176 @@
+import os
+import time
+import asyncio
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import crud, database
+from ..utils.env import load_env
+from ..utils.log import get_logger
+
+logger = get_logger("sentiment")
+
+load_env()
+
+# Seconds new observations wait so one flush covers a burst of news refreshes
+SENTIMENT_BATCH_DELAY = float(os.getenv("SENTIMENT_BATCH_DELAY", "1"))
+# Seconds between recomputing every ticker, so windows roll forward without new articles
+SENTIMENT_REFRESH_INTERVAL = float(os.getenv("SENTIMENT_REFRESH_INTERVAL", "900"))
+# Observations held while waiting for a flush; further ones are dropped
+SENTIMENT_MAX_PENDING = int(os.getenv("SENTIMENT_MAX_PENDING", "10000"))
+
+
+def observations_from_feed(feed: Iterable[dict]) -> List[dict]:
+    """
+    Per-ticker sentiment observations from an Alpha Vantage NEWS_SENTIMENT
+    feed. Articles without a URL, timestamp or ticker_sentiment are skipped.
+    """
+    observations = []
+    for article in feed:
+        url = article.get("url")
+        try:
+            published = datetime.strptime(article.get("time_published", ""), "%Y%m%dT%H%M%S")
+        except (TypeError, ValueError):
+            continue
+        if not url:
+            continue
+        for entry in article.get("ticker_sentiment") or ():
+            try:
+                observations.append({
+                    "ticker": entry["ticker"].upper(),
+                    "url": url,
+                    "published": published,
+                    "score": float(entry["ticker_sentiment_score"]),
+                    "relevance": float(entry.get("relevance_score", 1)),
+                })
+            except (KeyError, TypeError, ValueError, AttributeError):
+                continue
+    return observations
+
+
+class SentimentPipeline:
+    """
+    Keeps the sentiment_aggregates table current.
+
+    News refreshes submit their per-ticker observations; a background task
+    stores them (skipping ones already held) and recomputes the rolling
+    windows of just the tickers they touched. Every refresh interval all
+    tickers are recomputed so the windows roll forward. The window math
+    runs in sentiment_aggregates (NumPy), loaded on the first flush.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession]):
+        self.session_factory = session_factory
+        self._pending = []
+        self._wake = None
+        self._task = None
+        self._stats = {"submitted": 0, "dropped": 0, "flushes": 0, "tickers_updated": 0, "failures": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def submit(self, observations: List[dict]):
+        """Queues observations for the next flush. Ignored while the pipeline is not running."""
+        if self._task is None or not observations:
+            return
+        room = SENTIMENT_MAX_PENDING - len(self._pending)
+        self._pending.extend(observations[:max(room, 0)])
+        self._stats["submitted"] += len(observations)
+        self._stats["dropped"] += max(len(observations) - max(room, 0), 0)
+        self._wake.set()
+
+    async def start(self):
+        self._wake = asyncio.Event()
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """Stops the background task after flushing what is pending."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        if self._pending:
+            await self._flush_safely(self._take())
+
+    def _take(self) -> List[dict]:
+        batch, self._pending = self._pending, []
+        self._wake.clear()
+        return batch
+
+    async def _run(self):
+        # The first full refresh runs at startup, catching up on time spent down.
+        refreshed = float("-inf")
+        while True:
+            timeout = max(SENTIMENT_REFRESH_INTERVAL - (time.monotonic() - refreshed), 0)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                refreshed = time.monotonic()
+                await self._flush_safely([], refresh_all=True)
+                continue
+            await asyncio.sleep(SENTIMENT_BATCH_DELAY)
+            await self._flush_safely(self._take())
+
+    async def _flush_safely(self, observations: List[dict], refresh_all: bool = False):
+        try:
+            await self.flush(observations, refresh_all=refresh_all)
+        except Exception:
+            self._stats["failures"] += 1
+            logger.exception("Sentiment flush failed", extra={"observations": len(observations)})
+
+    async def flush(self, observations: List[dict], refresh_all: bool = False) -> int:
+        """
+        Stores `observations` and recomputes the aggregates of their tickers
+        (of every ticker with recent observations if `refresh_all`). Returns
+        how many tickers were updated.
+        """
+        from . import sentiment_aggregates
+
+        tickers = None if refresh_all else sorted({observation["ticker"] for observation in observations})
+        if tickers == []:
+            return 0
+        now = datetime.now()
+        since = now - timedelta(days=max(sentiment_aggregates.WINDOWS.values()))
+        async with self.session_factory() as db:
+            await crud.save_sentiment_observations(db, observations)
+            recent = await crud.load_sentiment_observations(db, since, tickers)
+            rows = await asyncio.to_thread(sentiment_aggregates.aggregate, recent, now)
+            # On a full refresh, tickers whose observations all aged out are dropped
+            await crud.replace_sentiment_aggregates(db, tickers, rows)
+        updated = len({row["ticker"] for row in rows})
+        self._stats["flushes"] += 1
+        self._stats["tickers_updated"] += updated
+        logger.debug("Sentiment aggregates updated", extra={"tickers": updated, "observations": len(observations)})
+        return updated
+
+    def stats(self) -> dict:
+        return dict(self._stats, pending=len(self._pending), running=self.running)
+
+
+def by_window(rows: list) -> dict:
+    """One ticker's aggregate rows as {"ticker", "as_of", "windows": {window: fields}}."""
+    return {
+        "ticker": rows[0].ticker,
+        "as_of": rows[0].as_of,
+        "windows": {row.window: crud.to_dict(row, crud.SENTIMENT_COLUMNS) for row in rows},
+    }
+
+
+async def get_sentiment_async(symbol: str) -> dict:
+    """Returns the stored rolling sentiment of a ticker, or an error dict."""
+    if not symbol:
+        return {'error': 'Invalid symbol'}
+    try:
+        async with database.SessionLocal() as db:
+            rows = await crud.get_sentiment_aggregates(db, [symbol.strip()])
+    except SQLAlchemyError as e:
+        return {'error': 'Sentiment aggregates unavailable', 'details': str(e)}
+    if not rows:
+        return {'error': f'No sentiment aggregates for {symbol.upper()}'}
+    return by_window(rows)
+
+
+sentiment_pipeline = SentimentPipeline(database.SessionLocal)
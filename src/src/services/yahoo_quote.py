@@ -0,0 +1,123 @@
+import re
+
+# Quote fields read from the page, keyed by Yahoo's field name.
+FIELDS = {
+    "regularMarketPrice": "price",
+    "regularMarketPreviousClose": "previous_close",
+    "regularMarketChange": "change",
+    "regularMarketChangePercent": "change_percent",
+    "regularMarketVolume": "volume",
+}
+
+_STREAMER = re.compile(r'<fin-streamer\b([^>]*)>', re.IGNORECASE)
+_ATTR = re.compile(r'([\w-]+)\s*=\s*"([^"]*)"')
+_PREV_CLOSE_CELL = re.compile(r'data-test="PREV_CLOSE-value"[^>]*>\s*(?:<[^>]+>\s*)*([\d,.]+)')
+# Embedded JSON payload, possibly inside an escaped JSON string: "regularMarketPrice":{"raw":195.64,...}
+_JSON_FIELD = re.compile(r'\\?"(' + "|".join(FIELDS) + r')\\?"\s*:\s*\{\s*\\?"raw\\?"\s*:\s*(-?[\d.]+(?:[eE][-+]?\d+)?)')
+# A field or a brace, to follow nesting inside a quote object
+_JSON_TOKEN = re.compile(_JSON_FIELD.pattern + r'|[{}]')
+_BRACE = re.compile(r'[{}]')
+_JSON_WINDOW = 6000
+
+
+def _number(text: str):
+    try:
+        return float(text.replace(",", "").rstrip("%"))
+    except (AttributeError, ValueError):
+        return None
+
+
+def _from_streamers(html: str, symbol: str, found: dict):
+    # Tags are scanned in page order and the scan stops once every field is known.
+    for match in _STREAMER.finditer(html):
+        attrs = dict(_ATTR.findall(match.group(1)))
+        field = FIELDS.get(attrs.get("data-field"))
+        if field is None or field in found:
+            continue
+        # Header tickers (indices, futures) use the same tags for other symbols.
+        if attrs.get("data-symbol", symbol).upper() != symbol:
+            continue
+        value = _number(attrs.get("value") or attrs.get("data-value"))
+        if value is not None:
+            found[field] = value
+            if len(found) == len(FIELDS):
+                return
+
+
+def _object_start(html: str, end: int):
+    # The "{" opening the object that encloses html[end], within _JSON_WINDOW
+    depth = 0
+    for match in reversed(list(_BRACE.finditer(html, max(0, end - _JSON_WINDOW), end))):
+        if match.group() == "}":
+            depth += 1
+        elif depth:
+            depth -= 1
+        else:
+            return match.start()
+    return None
+
+
+def _from_json(html: str, symbol: str, found: dict):
+    # Only the fields of the object holding this symbol count: pages embed
+    # related tickers' quotes right before and after it.
+    # Starts with a literal so the regex engine can skip ahead quickly.
+    marker = re.compile(r'symbol\\?"\s*:\s*\\?"' + re.escape(symbol) + r'\\?"')
+    for match in marker.finditer(html):
+        start = _object_start(html, match.start())
+        if start is None:
+            continue
+        depth = 0
+        for token in _JSON_TOKEN.finditer(html, start, match.end() + _JSON_WINDOW):
+            name = token.group(1)
+            if name:
+                # Direct members only, not a nested quote of another ticker
+                if depth == 1:
+                    found.setdefault(FIELDS[name], float(token.group(2)))
+                # The field's match consumed the "{" of its {"raw": ...} value
+                depth += 1
+            elif token.group() == "{":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    break
+        if len(found) == len(FIELDS):
+            return
+
+
+def parse_quote_page(html: str, symbol: str) -> dict:
+    """
+    Extracts a quote from a Yahoo Finance quote page without building a DOM.
+
+    Reads the symbol's fin-streamer tags, falling back to the previous-close
+    table cell and the embedded JSON payload for anything still missing.
+
+    Raises:
+        ValueError: if no positive price is found.
+    """
+    symbol = symbol.upper()
+    found = {}
+    _from_streamers(html, symbol, found)
+    if "previous_close" not in found:
+        match = _PREV_CLOSE_CELL.search(html)
+        if match and _number(match.group(1)) is not None:
+            found["previous_close"] = _number(match.group(1))
+    if len(found) < len(FIELDS):
+        _from_json(html, symbol, found)
+
+    price = found.get("price") or 0
+    if price <= 0:
+        raise ValueError("Could not find price on Yahoo Finance page")
+
+    quote = {"source": "yahoo_scraped", "symbol": symbol, "price": price}
+    if "previous_close" in found:
+        quote["previous_close"] = found["previous_close"]
+        if found["previous_close"]:
+            found.setdefault("change", round(price - found["previous_close"], 4))
+            found.setdefault("change_percent", round(found["change"] / found["previous_close"] * 100, 4))
+    for field in ("change", "change_percent"):
+        if field in found:
+            quote[field] = found[field]
+    if "volume" in found:
+        quote["volume"] = int(found["volume"])
+    return quote
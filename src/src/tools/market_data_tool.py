@@ -1,4 +1,9 @@
 from ..services import market_data_service
+from .single_flight import tool_calls
+from ..utils import metrics
+from ..utils.log import get_logger
+
+logger = get_logger("tools")
 
 def search_market_data(symbol: str) -> dict:
     """
@@ -11,5 +16,53 @@ def search_market_data(symbol: str) -> dict:
     Returns:
         A dictionary containing market data or an error message.
     """
-    print(f"Tool 'search_market_data' called with symbol: {symbol}")
+    logger.debug("Tool called", extra={"tool": "search_market_data", "symbol": symbol})
     return market_data_service.get_market_data(symbol=symbol)
+
+async def search_market_data_async(symbol: str) -> dict:
+    """
+    Async variant of search_market_data. Identical concurrent calls share one upstream request.
+
+    Args:
+        symbol: The stock symbol (e.g., "AAPL", "GOOG").
+
+    Returns:
+        A dictionary containing market data or an error message.
+    """
+    logger.debug("Tool called", extra={"tool": "search_market_data_async", "symbol": symbol})
+    with metrics.tool_seconds.time(tool="search_market_data"):
+        return await tool_calls.do(
+            ("search_market_data", (symbol or "").upper().strip()),
+            lambda: market_data_service.get_market_data_async(symbol=symbol)
+        )
+
+def search_market_data_many(symbols: list) -> dict:
+    """
+    A tool that quotes several stock symbols in one call (e.g. a watchlist).
+
+    Args:
+        symbols: The stock symbols (e.g., ["AAPL", "GOOG"]).
+
+    Returns:
+        A columnar dictionary: "symbol" plus one list per field (price, change,
+        volume, ..., error), aligned by position.
+    """
+    logger.debug("Tool called", extra={"tool": "search_market_data_many", "symbols": len(symbols)})
+    return market_data_service.get_market_data_many(symbols=symbols)
+
+async def search_market_data_many_async(symbols: list) -> dict:
+    """
+    Async variant of search_market_data_many. Identical concurrent calls share one upstream request.
+
+    Args:
+        symbols: The stock symbols (e.g., ["AAPL", "GOOG"]).
+
+    Returns:
+        A columnar dictionary: "symbol" plus one list per field, aligned by position.
+    """
+    logger.debug("Tool called", extra={"tool": "search_market_data_many_async", "symbols": len(symbols)})
+    with metrics.tool_seconds.time(tool="search_market_data_many"):
+        return await tool_calls.do(
+            ("search_market_data_many", tuple((symbol or "").upper().strip() for symbol in symbols)),
+            lambda: market_data_service.get_market_data_many_async(symbols=symbols)
+        )
@@ -1,15 +1,40 @@
 from ..services import news_service
+from .single_flight import tool_calls
+from ..utils import metrics
+from ..utils.log import get_logger
 
-def search_news(query: str, days: int = 7) -> dict:
+logger = get_logger("tools")
+
+def search_news(query: str, days: int = 7, relevant_to: str = "") -> dict:
     """
     A tool that allows an agent to search for financial news.
 
     Args:
         query: The search term (e.g., a company name or stock symbol).
         days: The number of past days to search within.
+        relevant_to: Text (e.g., the hypothesis) to rank the articles against; most recent first if empty.
+
+    Returns:
+        A dictionary containing a list of articles or an error message.
+    """
+    logger.debug("Tool called", extra={"tool": "search_news", "query": query})
+    return news_service.get_news(query=query, days=days, relevant_to=relevant_to)
+
+async def search_news_async(query: str, days: int = 7, relevant_to: str = "") -> dict:
+    """
+    Async variant of search_news. Identical concurrent calls share one upstream request.
+
+    Args:
+        query: The search term (e.g., a company name or stock symbol).
+        days: The number of past days to search within.
+        relevant_to: Text (e.g., the hypothesis) to rank the articles against; most recent first if empty.
 
     Returns:
         A dictionary containing a list of articles or an error message.
     """
-    print(f"Tool 'search_news' called with query: {query}")
-    return news_service.get_news(query=query, days=days)
+    logger.debug("Tool called", extra={"tool": "search_news_async", "query": query})
+    with metrics.tool_seconds.time(tool="search_news"):
+        return await tool_calls.do(
+            ("search_news", query, days, relevant_to),
+            lambda: news_service.get_news_async(query=query, days=days, relevant_to=relevant_to)
+        )
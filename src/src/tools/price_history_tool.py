@@ -0,0 +1,55 @@
+from .single_flight import tool_calls
+from ..utils import metrics
+from ..utils.log import get_logger
+
+logger = get_logger("tools")
+
+_service_module = None
+
+def _service():
+    # NumPy adds a noticeable share to the API's cold start, so the history
+    # service (and NumPy with it) is loaded on first use.
+    global _service_module
+    if _service_module is None:
+        from ..services import price_history_service
+        _service_module = price_history_service
+    return _service_module
+
+def stats():
+    """Price history counters, or None while the service has not been used."""
+    return _service_module.price_history_service.stats() if _service_module else None
+
+def get_quant_facts(symbol: str, hypothesis: str = "") -> dict:
+    """
+    A tool that computes exact price statistics for a stock symbol from its
+    daily history: trailing returns, realized volatility, drawdowns, the
+    52-week range and, if the hypothesis names a target price and timeframe,
+    the required move and the estimated probability of reaching it.
+
+    Args:
+        symbol: The stock symbol (e.g., "AAPL", "GOOG").
+        hypothesis: The structured hypothesis, read for its target and timeframe.
+
+    Returns:
+        A dictionary of facts or an error message.
+    """
+    logger.debug("Tool called", extra={"tool": "get_quant_facts", "symbol": symbol})
+    return _service().get_quant_facts(symbol, hypothesis)
+
+async def get_quant_facts_async(symbol: str, hypothesis: str = "") -> dict:
+    """
+    Async variant of get_quant_facts. Identical concurrent calls share one computation.
+
+    Args:
+        symbol: The stock symbol (e.g., "AAPL", "GOOG").
+        hypothesis: The structured hypothesis, read for its target and timeframe.
+
+    Returns:
+        A dictionary of facts or an error message.
+    """
+    logger.debug("Tool called", extra={"tool": "get_quant_facts_async", "symbol": symbol})
+    with metrics.tool_seconds.time(tool="get_quant_facts"):
+        return await tool_calls.do(
+            ("get_quant_facts", (symbol or "").upper().strip(), hypothesis),
+            lambda: _service().get_quant_facts_async(symbol, hypothesis)
+        )
@@ -0,0 +1,25 @@
+from ..services import sentiment_service
+from .single_flight import tool_calls
+from ..utils import metrics
+from ..utils.log import get_logger
+
+logger = get_logger("tools")
+
+async def get_sentiment_async(symbol: str) -> dict:
+    """
+    A tool that returns the precomputed rolling news sentiment of a stock
+    symbol over the last 1, 7 and 30 days: article count, relevance-weighted
+    mean score, dispersion and bullish/bearish shares. No model call is made.
+
+    Args:
+        symbol: The stock symbol (e.g., "AAPL", "GOOG").
+
+    Returns:
+        A dictionary of aggregates per window or an error message.
+    """
+    logger.debug("Tool called", extra={"tool": "get_sentiment_async", "symbol": symbol})
+    with metrics.tool_seconds.time(tool="get_sentiment"):
+        return await tool_calls.do(
+            ("get_sentiment", (symbol or "").upper().strip()),
+            lambda: sentiment_service.get_sentiment_async(symbol)
+        )
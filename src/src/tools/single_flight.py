@@ -0,0 +1,85 @@
+import asyncio
+import contextvars
+import weakref
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Hashable
+
+# Results memoized for the lifetime of one analysis request (see request_scope).
+_request_memo = contextvars.ContextVar("single_flight_request_memo", default=None)
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key onto one in-flight task.
+
+    Callers that arrive while a task for their key is running await that task
+    instead of starting their own. Inside a request_scope, completed results are
+    also reused for the rest of the request.
+    """
+
+    def __init__(self):
+        # Tasks are bound to the loop that created them, so track them per loop.
+        self._inflight = weakref.WeakKeyDictionary()
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0, "request_hits": 0}
+
+    def _inflight_for_loop(self) -> dict:
+        loop = asyncio.get_running_loop()
+        inflight = self._inflight.get(loop)
+        if inflight is None:
+            inflight = {}
+            self._inflight[loop] = inflight
+        return inflight
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        """
+        Runs fn() once per key among concurrent callers and returns its result.
+        """
+        self._stats["calls"] += 1
+        memo = _request_memo.get()
+        if memo is not None and key in memo:
+            task = memo[key]
+            self._stats["request_hits" if task.done() else "coalesced"] += 1
+            return await asyncio.shield(task)
+
+        inflight = self._inflight_for_loop()
+        task = inflight.get(key)
+        if task is None:
+            self._stats["executions"] += 1
+            task = asyncio.ensure_future(fn())
+            inflight[key] = task
+            task.add_done_callback(lambda done: inflight.pop(key, None) if inflight.get(key) is done else None)
+        else:
+            self._stats["coalesced"] += 1
+
+        if memo is not None:
+            memo[key] = task
+        # Shield so one cancelled caller does not cancel the shared call for everyone.
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        """Returns a snapshot of the call counters."""
+        stats = dict(self._stats)
+        stats["in_flight"] = sum(len(tasks) for tasks in self._inflight.values())
+        return stats
+
+
+@contextmanager
+def request_scope():
+    """
+    Shares tool results between every agent running within one analysis request.
+
+    Nested scopes join the outer one, so a batch of analyses opened under a
+    single scope fetches each distinct (tool, args) once for the whole batch.
+    """
+    if _request_memo.get() is not None:
+        yield
+        return
+    token = _request_memo.set({})
+    try:
+        yield
+    finally:
+        _request_memo.reset(token)
+
+
+# Process-wide group shared by all tools, so concurrent requests coalesce too.
+tool_calls = SingleFlight()
@@ -0,0 +1,10 @@
+from dotenv import load_dotenv
+
+_loaded = False
+
+def load_env():
+    """Loads .env into os.environ once per process; later calls are no-ops."""
+    global _loaded
+    if not _loaded:
+        load_dotenv()
+        _loaded = True
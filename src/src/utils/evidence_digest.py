@@ -0,0 +1,194 @@
+import os
+import re
+import json
+import math
+from datetime import datetime
+
+# Per-agent prompt budgets (estimated tokens) for the evidence section
+DEFAULT_BUDGETS = {
+    "research": 1200,
+    "contradiction": 1200,
+    "synthesis": 2000,
+}
+SUMMARY_CHARS = int(os.getenv("DIGEST_SUMMARY_CHARS", "240"))
+
+_WORD = re.compile(r"[a-z0-9$%.]+")
+_STOPWORDS = {"will", "by", "to", "the", "a", "an", "of", "and", "in", "on", "at", "for", "end", "reach", "rise", "fall"}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for Gemini prompts (about four characters per token)."""
+    return math.ceil(len(text) / 4)
+
+
+def budget_for(agent: str) -> int:
+    return int(os.getenv(f"DIGEST_BUDGET_{agent.upper()}", DEFAULT_BUDGETS.get(agent, 1200)))
+
+
+def _terms(text: str) -> set:
+    return {word for word in _WORD.findall((text or "").lower()) if word not in _STOPWORDS and len(word) > 1}
+
+
+def _truncate(text: str, limit: int) -> str:
+    text = " ".join((text or "").split())
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0] + "…"
+
+
+def _pack(lines: list, budget: int) -> list:
+    packed, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            break
+        packed.append(line)
+        used += cost
+    return packed
+
+
+def rank_articles(articles: list, query_terms: set, now: datetime = None) -> list:
+    """
+    Drops duplicate articles (same URL or title) and orders the rest by a blend
+    of term relevance and recency.
+    """
+    now = now or datetime.now()
+    seen, unique = set(), []
+    for article in articles:
+        title_key = " ".join(_WORD.findall((article.get("title") or "").lower()))
+        url = article.get("url")
+        if title_key in seen or (url and url in seen):
+            continue
+        seen.add(title_key)
+        if url:
+            seen.add(url)
+        unique.append(article)
+
+    def score(article):
+        text_terms = _terms(f"{article.get('title', '')} {article.get('summary', '')}")
+        relevance = len(query_terms & text_terms) / len(query_terms) if query_terms else 0.0
+        try:
+            age_days = max((now - datetime.fromisoformat(article.get("published", ""))).total_seconds() / 86400, 0)
+        except (TypeError, ValueError):
+            age_days = 30
+        recency = math.exp(-age_days / 3)
+        return 0.6 * relevance + 0.4 * recency
+
+    return sorted(unique, key=score, reverse=True)
+
+
+def _article_line(article: dict) -> str:
+    published = (article.get("published") or "")[:10]
+    sentiment = article.get("sentiment_label") or "Neutral"
+    # Syndicated copies collapsed into this article indicate how widely it was covered
+    copies = f"; +{article['duplicates']} copies" if article.get("duplicates") else ""
+    line = f"- [{published}] {article.get('title', '').strip()} ({article.get('source', '')}; {sentiment}{copies})"
+    summary = _truncate(article.get("summary", ""), SUMMARY_CHARS)
+    return f"{line}: {summary}" if summary else line
+
+
+def _market_line(market_data: dict) -> str:
+    if not market_data or "error" in market_data:
+        return f"Market: unavailable ({(market_data or {}).get('error', 'no data')})"
+    fields = [f"{market_data.get('symbol', '')} price ${market_data.get('price')}"]
+    if market_data.get("previous_close"):
+        fields.append(f"prev close ${market_data['previous_close']}")
+    if market_data.get("change") is not None and "change_percent" in market_data:
+        fields.append(f"change {market_data['change']:+} ({market_data['change_percent']:+}%)")
+    if market_data.get("volume"):
+        fields.append(f"volume {market_data['volume']:,}")
+    if market_data.get("market_cap"):
+        fields.append(f"market cap ${market_data['market_cap']:,}")
+    fields.append(f"source {market_data.get('source', 'unknown')}")
+    return "Market: " + ", ".join(fields)
+
+
+def _pct(value, sign: str = "+") -> str:
+    return "n/a" if value is None else f"{value * 100:{sign}.1f}%"
+
+
+def _score(value, spec: str) -> str:
+    return "n/a" if value is None else f"{value:{spec}}"
+
+
+def _quant_lines(facts: dict) -> list:
+    if not facts or "error" in facts:
+        return [f"Quant: unavailable ({(facts or {}).get('error', 'no data')})"]
+    returns, volatility = facts["returns"], facts["volatility"]
+    lines = [
+        f"Quant ({facts['symbol']}, {facts['bars']} daily bars to {facts['as_of']}; exact, use as given): "
+        f"last close ${facts['last_close']}; returns 1M {_pct(returns['1m'])}, 3M {_pct(returns['3m'])}, "
+        f"6M {_pct(returns['6m'])}, 1Y {_pct(returns['1y'])}, YTD {_pct(returns['ytd'])}; "
+        f"realized vol (annualized) 1M {_pct(volatility['1m'], '')}, 1Y {_pct(volatility['1y'], '')}; "
+        f"max drawdown 1Y {_pct(facts['max_drawdown_1y'])}, {_pct(facts['current_drawdown'])} from peak now; "
+        f"52w range ${facts['low_52w']}-${facts['high_52w']}"
+    ]
+    if "required_move" in facts:
+        line = f"Target ${facts['target']:,} requires {_pct(facts['required_move'])} from the last close"
+        if "probability" in facts:
+            probability = facts["probability"]
+            line += (
+                f" within {facts['horizon_trading_days']} trading days (by {facts['deadline']}); "
+                f"estimated probability of touching it: {_pct(probability['model'], '')} (volatility model), "
+                f"{_pct(probability['historical'], '')} (historical hit rate)"
+            )
+        lines.append(line)
+    return lines
+
+
+def _sentiment_line(sentiment: dict) -> str:
+    windows = []
+    for name, window in sentiment["windows"].items():
+        if not window.get("articles"):
+            windows.append(f"{name} no articles")
+            continue
+        windows.append(
+            f"{name} n={window['articles']}, mean {_score(window.get('mean'), '+.2f')} "
+            f"(sd {_score(window.get('dispersion'), '.2f')}), "
+            f"{_pct(window['bullish'], '')} bullish/{_pct(window['bearish'], '')} bearish"
+        )
+    return f"News sentiment ({sentiment['ticker']}, scores -1 to +1): " + "; ".join(windows)
+
+
+def build_evidence_digest(hypothesis: str, news_data: dict, market_data: dict, budget: int,
+                          quant_facts: dict = None, sentiment: dict = None) -> str:
+    """
+    Packs market data, precomputed price facts, rolling news sentiment and the
+    most relevant, de-duplicated news into a compact text block of at most
+    `budget` estimated tokens. News already ranked by the news service is
+    kept in its order; anything else is ranked here.
+    """
+    lines = [_market_line(market_data)]
+    if quant_facts is not None:
+        lines.extend(_quant_lines(quant_facts))
+    # Missing aggregates (a ticker without recent coverage) are left out rather than reported
+    if sentiment and "error" not in sentiment:
+        lines.append(_sentiment_line(sentiment))
+    if not news_data or "error" in news_data:
+        lines.append(f"News: unavailable ({(news_data or {}).get('error', 'no data')})")
+    else:
+        articles = news_data.get("articles", [])
+        # Results the news service ranked against the hypothesis (BM25 and recency,
+        # near-duplicates collapsed) keep their order
+        if not news_data.get("ranked"):
+            articles = rank_articles(articles, _terms(hypothesis))
+        lines.append(f"News ({len(articles)} unique articles, most relevant first):")
+        lines.extend(_article_line(article) for article in articles)
+    return "\n".join(_pack(lines, budget))
+
+
+def digest_evidence(items: list, budget: int) -> str:
+    """
+    Serializes agent evidence compactly (one item per line, long text truncated)
+    within `budget` estimated tokens.
+    """
+    lines = []
+    for item in items:
+        if isinstance(item, dict):
+            if "error" in item:
+                continue
+            compact = {key: _truncate(str(value), 400) for key, value in item.items() if value}
+            lines.append("- " + json.dumps(compact, ensure_ascii=False, separators=(",", ":")))
+        else:
+            lines.append("- " + _truncate(str(item), 4 * (budget - 2)))
+    return "\n".join(_pack(lines, budget))
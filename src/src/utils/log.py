@@ -0,0 +1,128 @@
+import os
+import copy
+import json
+import uuid
+import atexit
+import logging
+import logging.handlers
+import contextvars
+import queue
+from contextlib import contextmanager
+from typing import Optional
+from .env import load_env
+
+load_env()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "json" for one structured object per line, "text" for human-readable lines
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+
+# Trace id of the analysis (or HTTP request) being handled; copied into every
+# task the scheduler starts, so all stages of one run log the same id.
+trace_id = contextvars.ContextVar("trace_id", default=None)
+
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+@contextmanager
+def trace(value: Optional[str] = None):
+    """Runs the block under a trace id, keeping an outer one if already set."""
+    if trace_id.get() is not None and value is None:
+        yield trace_id.get()
+        return
+    token = trace_id.set(value or new_trace_id())
+    try:
+        yield trace_id.get()
+    finally:
+        trace_id.reset(token)
+
+
+class _TraceFilter(logging.Filter):
+    def filter(self, record):
+        record.trace_id = trace_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON, including any `extra` fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.trace_id:
+            entry["trace_id"] = record.trace_id
+        for key, value in vars(record).items():
+            if key not in _RESERVED and key != "trace_id":
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record):
+        line = super().format(record)
+        extras = {key: value for key, value in vars(record).items() if key not in _RESERVED and key != "trace_id"}
+        if extras:
+            line += " " + " ".join(f"{key}={value}" for key, value in extras.items())
+        return line
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues records with their message merged but exc_info kept. The default
+    prepare() renders the traceback into msg and clears exc_info, so the
+    listener's formatter could not give it its own field.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        # Merge now: args may change before the listener thread formats the record
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+_listener = None
+
+
+def configure_logging():
+    """
+    Routes the app's loggers through a queue so formatting and stdout writes
+    happen on a background thread rather than on the event loop.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    handler = logging.StreamHandler()
+    if LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(_TextFormatter("%(asctime)s %(levelname)s %(name)s [%(trace_id)s] %(message)s"))
+
+    records = queue.SimpleQueue()
+    queue_handler = _QueueHandler(records)
+    # The trace id must be captured on the calling task, before the record is queued.
+    queue_handler.addFilter(_TraceFilter())
+    _listener = logging.handlers.QueueListener(records, handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    logger = logging.getLogger("marketai")
+    logger.handlers = [queue_handler]
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Returns a logger under the app's "marketai" namespace."""
+    configure_logging()
+    return logging.getLogger(f"marketai.{name}")
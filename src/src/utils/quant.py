@@ -0,0 +1,228 @@
+import re
+import math
+from datetime import date, timedelta
+from typing import Optional
+
+import numpy as np
+
+TRADING_DAYS = 252
+# Calendar lookbacks for trailing returns
+LOOKBACKS = {"1m": 30, "3m": 91, "6m": 182, "1y": 365}
+# Trading-day windows for realized volatility
+VOL_WINDOWS = {"1m": 21, "3m": 63, "1y": 252}
+
+_TARGET = re.compile(r"\$\s?(\d[\d,]*(?:\.\d+)?)\s*([kKmMbB])?\b")
+# Words right before an amount that make it the target ("will hit $250", "fall to $150").
+# The "up"/"down" groups also give the call's direction; the others leave it open.
+_TARGET_VERB = re.compile(
+    r"\b(?:(?P<up>exceeds?|surpass(?:es)?|tops?|above|(?:rises?|climbs?|gains?)\s+to)|"
+    r"(?P<down>below|(?:falls?|drops?|declines?|sinks?)\s+to)|"
+    r"reach(?:es)?|hits?|(?:goes|go|gets?)\s+to|target(?:\s+price)?(?:\s+of)?)\s*$",
+    re.IGNORECASE,
+)
+# A negation just before the target verb ("won't fall below", "will not go above")
+_NEGATED = re.compile(r"(?:\bnot|\bnever|n't)\s+(?:\w+\s+)?$", re.IGNORECASE)
+# Characters before an amount searched for a target verb
+_VERB_CONTEXT = 30
+_QUARTER = re.compile(r"\bQ([1-4])\s*(?:of\s*)?'?(\d{2}|\d{4})\b", re.IGNORECASE)
+_MONTH = re.compile(
+    r"\b(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s*(?:of\s*)?(\d{4})\b", re.IGNORECASE
+)
+_SEASON = re.compile(r"\b(spring|summer|fall|autumn|winter)\s*(?:of\s*)?(\d{4})\b", re.IGNORECASE)
+_YEAR_END = re.compile(r"\b(?:year[- ]end|end of(?: the year)?)\s*(?:of\s*)?(\d{4})\b|\b(\d{4})\s*year[- ]end\b", re.IGNORECASE)
+_YEAR = re.compile(r"\bby\s+(?:the\s+end\s+of\s+)?(\d{4})\b", re.IGNORECASE)
+_MONTHS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+_SEASON_END = {"spring": 5, "summer": 8, "fall": 11, "autumn": 11, "winter": 2}
+_SCALE = {"k": 1e3, "m": 1e6, "b": 1e9}
+
+
+def _month_end(year: int, month: int) -> date:
+    return date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+
+
+def _target_match(text: str) -> tuple:
+    # (amount match, target verb match or None) of the target amount, or (None, None)
+    matches = list(_TARGET.finditer(text))
+    for match in matches:
+        verb = _TARGET_VERB.search(text, max(0, match.start() - _VERB_CONTEXT), match.start())
+        if verb:
+            return match, verb
+    return (matches[-1], None) if matches else (None, None)
+
+
+def parse_target(text: str) -> Optional[float]:
+    """
+    Target price of a hypothesis ("$220", "$100,000", "$1.5k"), or None: the
+    first dollar amount right after a target verb ("AAPL at $195 will hit
+    $250" -> 250), else the last dollar amount.
+    """
+    match, _ = _target_match(text or "")
+    if match is None:
+        return None
+    value = float(match.group(1).replace(",", ""))
+    return value * _SCALE.get((match.group(2) or "").lower(), 1)
+
+
+def parse_direction(text: str) -> Optional[int]:
+    """
+    Direction of a hypothesis' target from the verb right before it: 1 for a
+    downside call ("fall to $150", "below $90"), 0 for an upside one ("exceed
+    $250", "rise to $250"), or None when that verb does not say ("reach",
+    "hit"), is negated, or is missing; callers then compare the target with
+    the entry price. Words elsewhere ("by fall 2025", "won't go down") do not count.
+    """
+    text = text or ""
+    _, verb = _target_match(text)
+    if verb is None or _NEGATED.search(text, max(0, verb.start() - _VERB_CONTEXT), verb.start()):
+        return None
+    if verb.group("down"):
+        return 1
+    if verb.group("up"):
+        return 0
+    return None
+
+
+def parse_deadline(text: str) -> Optional[date]:
+    """
+    Last day of the timeframe a hypothesis names ("Q2 2025", "March 2026",
+    "summer 2025", "year-end 2025", "by 2026"), or None.
+    """
+    text = text or ""
+    if match := _QUARTER.search(text):
+        year = int(match.group(2))
+        return _month_end(year + 2000 if year < 100 else year, int(match.group(1)) * 3)
+    if match := _YEAR_END.search(text):
+        return date(int(match.group(1) or match.group(2)), 12, 31)
+    if match := _MONTH.search(text):
+        return _month_end(int(match.group(2)), _MONTHS.index(match.group(1).lower()[:3]) + 1)
+    if match := _SEASON.search(text):
+        season, year = match.group(1).lower(), int(match.group(2))
+        # Winter runs into the following year
+        return _month_end(year + 1 if season == "winter" else year, _SEASON_END[season])
+    if match := _YEAR.search(text):
+        return date(int(match.group(1)), 12, 31)
+    return None
+
+
+def log_returns(close: np.ndarray) -> np.ndarray:
+    return np.diff(np.log(close))
+
+
+def trailing_returns(days: np.ndarray, close: np.ndarray) -> dict:
+    """
+    Returns over the LOOKBACKS plus year-to-date, measured from the close on
+    or before each start date. `days` are dates as days since the epoch.
+    """
+    last_day = int(days[-1])
+    starts = {name: last_day - span for name, span in LOOKBACKS.items()}
+    year = (np.datetime64(last_day, "D").astype("datetime64[Y]")).astype(int) + 1970
+    starts["ytd"] = int((np.datetime64(f"{year}-01-01") - np.datetime64(0, "D")).astype(int)) - 1
+
+    names = list(starts)
+    # Index of the last bar on or before each start date, all at once
+    indexes = np.searchsorted(days, np.array([starts[name] for name in names]), side="right") - 1
+    result = {}
+    for name, index in zip(names, indexes):
+        result[name] = round(float(close[-1] / close[index] - 1), 4) if 0 <= index < len(close) - 1 else None
+    return result
+
+
+def realized_volatility(close: np.ndarray) -> dict:
+    """Annualized standard deviation of daily log returns over each VOL_WINDOWS window."""
+    returns = log_returns(close)
+    result = {}
+    for name, window in VOL_WINDOWS.items():
+        if len(returns) < min(window, 10):
+            result[name] = None
+            continue
+        result[name] = round(float(returns[-window:].std(ddof=1) * math.sqrt(TRADING_DAYS)), 4)
+    return result
+
+
+def drawdowns(close: np.ndarray, window: int = TRADING_DAYS) -> dict:
+    """Maximum drawdown within the last `window` bars and the current drawdown from the peak."""
+    recent = close[-window:]
+    peaks = np.maximum.accumulate(recent)
+    underwater = recent / peaks - 1
+    return {
+        "max_drawdown_1y": round(float(underwater.min()), 4),
+        "current_drawdown": round(float(underwater[-1]), 4),
+    }
+
+
+def touch_probability(price: float, target: float, sigma: float, years: float) -> Optional[float]:
+    """
+    Probability that a driftless geometric Brownian motion starting at `price`
+    touches `target` within `years` (reflection principle). Works for targets
+    above and below the price.
+    """
+    if not sigma or years <= 0 or price <= 0 or target <= 0:
+        return None
+    barrier = math.log(target / price)
+    if barrier == 0:
+        return 1.0
+    nu = -0.5 * sigma ** 2
+    scale = sigma * math.sqrt(years)
+    if barrier < 0:
+        # Mirror a downside target into an upside one
+        barrier, nu = -barrier, -nu
+    cdf = lambda x: 0.5 * (1 + math.erf(x / math.sqrt(2)))
+    probability = cdf((-barrier + nu * years) / scale) + math.exp(2 * nu * barrier / sigma ** 2) * cdf((-barrier - nu * years) / scale)
+    return round(min(1.0, max(0.0, probability)), 4)
+
+
+def historical_hit_rate(close: np.ndarray, move: float, horizon: int, min_windows: int = 20) -> Optional[float]:
+    """
+    Share of past `horizon`-bar windows in which the close reached `move`
+    (a fraction, negative for downside targets) relative to the window's start.
+    None when the history holds fewer than `min_windows` such windows.
+    """
+    if horizon < 1 or len(close) - horizon < min_windows:
+        return None
+    ahead = np.lib.stride_tricks.sliding_window_view(close[1:], horizon)
+    start = close[:len(ahead)]
+    if move >= 0:
+        hits = ahead.max(axis=1) / start - 1 >= move
+    else:
+        hits = ahead.min(axis=1) / start - 1 <= move
+    return round(float(hits.mean()), 4)
+
+
+def quant_facts(days: np.ndarray, close: np.ndarray, high: np.ndarray, low: np.ndarray,
+                target: float = None, deadline: date = None, today: date = None) -> dict:
+    """
+    Precomputed price facts for a symbol's daily history: trailing returns,
+    realized volatility, drawdowns, 52-week range and, when a target is given,
+    the required move and estimated probabilities of reaching it by the deadline.
+    """
+    today = today or date.today()
+    last_close = float(close[-1])
+    year = slice(-TRADING_DAYS, None)
+    facts = {
+        "as_of": str(np.datetime64(int(days[-1]), "D")),
+        "bars": int(len(close)),
+        "last_close": round(last_close, 4),
+        "returns": trailing_returns(days, close),
+        "volatility": realized_volatility(close),
+        **drawdowns(close),
+        "high_52w": round(float(high[year].max()), 4),
+        "low_52w": round(float(low[year].min()), 4),
+    }
+    if not target:
+        return facts
+
+    move = target / last_close - 1
+    facts["target"] = target
+    facts["required_move"] = round(move, 4)
+    if deadline is None or deadline <= today:
+        return facts
+
+    horizon = int(np.busday_count(today, deadline))
+    sigma = facts["volatility"]["1y"] or facts["volatility"]["3m"]
+    facts["deadline"] = deadline.isoformat()
+    facts["horizon_trading_days"] = horizon
+    facts["probability"] = {
+        "model": touch_probability(last_close, target, sigma, horizon / TRADING_DAYS),
+        "historical": historical_hit_rate(close, move, horizon),
+    }
+    return facts
@@ -1,37 +1,214 @@
 import re
 import json
 
+_decoder = json.JSONDecoder()
+_CLOSERS = {"{": "}", "[": "]"}
+_VALID_ESCAPES = set('"\\/bfnrtu')
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+# Characters the repair pass has to look at; everything between them is copied as-is.
+_SPECIAL = re.compile(r'["\\\n{}\[\],]|\b(?:True|False|None)\b')
+# Characters the candidate scan has to look at
+_STRUCTURE = re.compile(r'["\\{}\[\]]')
+_FENCE = re.compile(r"```(?:json)?", re.IGNORECASE)
+# Levels of a span that failed to parse searched for JSON nested in it (e.g. "[see {...}]")
+_MAX_NESTING = 2
+
+def _drop_trailing_comma(out: list):
+    while out and not out[-1].strip():
+        out.pop()
+    if out and out[-1].rstrip().endswith(","):
+        out[-1] = out[-1].rstrip()[:-1]
+
+def _close(out: list, stack: list) -> str:
+    out = list(out)
+    for closer in reversed(stack):
+        _drop_trailing_comma(out)
+        out.append(closer)
+    return "".join(out)
+
+def _repair(text: str, start: int, end: int):
+    """
+    Rewrites the JSON value starting at text[start] in one pass, fixing common
+    LLM defects: trailing commas, invalid escapes (e.g. \\'), raw newlines
+    inside strings, Python literals, and brackets left open by a truncated
+    response. Returns the repaired text, stopping where the value closes or
+    at `end`.
+    """
+    out = []
+    stack = []
+    # Index in `out` of the last comma at each open depth, to drop a half-written member,
+    # and of the last nested value closed at that depth, which must not be dropped with it
+    commas = []
+    closes = []
+    in_string = False
+    pos = start
+    for match in _SPECIAL.finditer(text, start, end):
+        i = match.start()
+        if i < pos:
+            # Already consumed as part of an escape sequence
+            continue
+        token = match.group()
+        out.append(text[pos:i])
+        pos = match.end()
+
+        if in_string:
+            if token == "\\":
+                nxt = text[i + 1:i + 2]
+                if nxt in _VALID_ESCAPES:
+                    out.append(text[i:i + 2])
+                    pos = i + 2
+                # Otherwise drop the backslash of an invalid escape such as \\'
+            elif token == '"':
+                in_string = False
+                out.append(token)
+            elif token == "\n":
+                out.append("\\n")
+            else:
+                out.append(token)
+        elif token == '"':
+            in_string = True
+            out.append(token)
+        elif token in _CLOSERS:
+            stack.append(_CLOSERS[token])
+            commas.append(None)
+            closes.append(-1)
+            out.append(token)
+        elif token == "}" or token == "]":
+            _drop_trailing_comma(out)
+            stack.pop()
+            commas.pop()
+            closes.pop()
+            out.append(token)
+            if not stack:
+                return "".join(out)
+            closes[-1] = len(out) - 1
+        elif token == ",":
+            out.append(token)
+            commas[-1] = len(out) - 1
+        elif token in _LITERALS:
+            out.append(_LITERALS[token])
+        else:
+            out.append(token)
+
+    # The response was truncated: close what is open, or if the last member was
+    # cut off mid-way (e.g. a key without its value), drop it and close. Never
+    # drop a complete object or array: then the open bracket was prose.
+    out.append(text[pos:end])
+    if in_string:
+        out.append('"')
+    repaired = _close(out, stack)
+    try:
+        json.loads(repaired)
+        return repaired
+    except json.JSONDecodeError:
+        pass
+    for depth in range(len(stack) - 1, -1, -1):
+        if commas[depth] is not None and closes[depth] < commas[depth]:
+            return _close(out[:commas[depth]], stack[:depth + 1])
+    return repaired
+
+def _spans(text: str, start: int, end: int) -> tuple:
+    """
+    Candidate JSON spans of text[start:end], found in one left-to-right pass
+    tracking bracket depth and string state. Returns the closed bracketed
+    spans not nested in another closed one, as (open, close) pairs in text
+    order, and the position of the outermost bracket still open at `end` (a
+    truncated response, or a stray bracket in prose), or None.
+    """
+    stack = []
+    spans = []
+    in_string = False
+    skip = -1
+    for match in _STRUCTURE.finditer(text, start, end):
+        i = match.start()
+        token = match.group()
+        if in_string:
+            if i == skip:
+                continue
+            if token == "\\":
+                skip = i + 1
+            elif token == '"':
+                in_string = False
+        elif token == '"':
+            # Quotes in prose outside any bracket are not strings
+            in_string = bool(stack)
+        elif token in _CLOSERS:
+            stack.append(i)
+        elif token != "\\" and stack:
+            opened = stack.pop()
+            # Spans closed inside this one are superseded by it
+            while spans and spans[-1][0] > opened:
+                spans.pop()
+            spans.append((opened, i + 1))
+    return spans, (stack[0] if stack else None)
+
+def _decode(text: str, start: int, end: int):
+    try:
+        return _decoder.raw_decode(text, start)[0]
+    except (json.JSONDecodeError, RecursionError):
+        pass
+    try:
+        return json.loads(_repair(text, start, end))
+    except (json.JSONDecodeError, RecursionError):
+        return None
+
+def _first_value(text: str, start: int, end: int, nesting: int = _MAX_NESTING):
+    spans, tail = _spans(text, start, end)
+    if tail is not None:
+        # Brackets left open at `end`: a truncated response, repaired as a whole
+        # before the closed spans nested in it, or a stray bracket in prose
+        index = next((n for n, (opened, _) in enumerate(spans) if opened > tail), len(spans))
+        spans.insert(index, (tail, None))
+    for opened, closed in spans:
+        value = _decode(text, opened, closed or end)
+        if value is None and closed and nesting:
+            value = _first_value(text, opened + 1, closed - 1, nesting - 1)
+        if value is not None:
+            return value
+    if tail is not None and nesting:
+        # A stray bracket or quote may have hidden the JSON from this scan
+        return _first_value(text, tail + 1, end, nesting - 1)
+    return None
+
 def extract_json_from_response(text: str) -> dict or list:
     """
-    Extracts a JSON object or list from a string, even if it's wrapped
-    in markdown code blocks.
+    Extracts the first JSON object or array from a string, even if it's wrapped
+    in markdown code blocks or surrounded by prose.
+
+    A fenced block is searched first, then the whole text. One scan finds the
+    candidate spans; each is decoded in place and, only if that fails,
+    rewritten once by the repair pass. Brackets left open at the end are
+    repaired as a truncated response only when that drops no complete value;
+    otherwise the text after the open bracket is searched instead. Spans do
+    not overlap (bar a bounded look inside ones that failed), so the work
+    stays linear in the text.
     """
     if not isinstance(text, str):
         return text # Return as-is if already parsed
 
-    # Pattern to find JSON within ```json ... ``` blocks
-    match = re.search(r'```(json)?\s*([\s\S]*?)\s*```', text)
-    if match:
-        text_to_parse = match.group(2)
-    else:
-        text_to_parse = text
+    fence = _FENCE.search(text)
+    if fence:
+        closing = text.find("```", fence.end())
+        value = _first_value(text, fence.end(), closing if closing != -1 else len(text))
+        if value is not None:
+            return value
+    value = _first_value(text, 0, len(text))
+    if value is not None:
+        return value
+    raise ValueError(f"Could not find valid JSON in response: {text}")
 
-    # Sanitize the string to remove invalid escape sequences
-    text_to_parse = text_to_parse.replace("\\'", "'")
+def canonicalize_hypothesis(text: str) -> str:
+    """
+    Normalizes a structured hypothesis for equality lookups: case-folded,
+    whitespace collapsed and trailing punctuation removed.
+    """
+    return " ".join((text or "").casefold().split()).rstrip(".!?;, ")
 
-    try:
-        # Attempt to parse the cleaned text
-        return json.loads(text_to_parse.strip())
-    except json.JSONDecodeError as e:
-        print(f"Failed to decode JSON: {e}")
-        # As a last resort, try to find the first '{' and last '}'
-        try:
-            start = text_to_parse.find('{')
-            end = text_to_parse.rfind('}') + 1
-            if start != -1 and end != 0:
-                return json.loads(text_to_parse[start:end])
-        except json.JSONDecodeError:
-            # If all parsing fails, raise the error to be handled by the agent
-            raise ValueError(f"Could not parse JSON from response: {text}")
-    
-    raise ValueError(f"Could not find valid JSON in response: {text}")
+def extract_symbol(hypothesis: str) -> str:
+    """
+    Returns the ticker in parentheses of a structured hypothesis
+    ("Apple (AAPL) will reach $220 by Q2 2025" -> "AAPL"), or "" if none.
+    """
+    match = re.search(r'\((.*?)\)', hypothesis or "")
+    return match.group(1).strip().upper() if match else ""